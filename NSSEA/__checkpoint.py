@@ -0,0 +1,349 @@
+# -*- coding: utf-8 -*-
+
+##################################################################################
+##################################################################################
+##                                                                              ##
+## Copyright Yoann Robin, 2020                                                  ##
+##                                                                              ##
+## yoann.robin.k@gmail.com                                                      ##
+##                                                                              ##
+## This software is a computer program that is part of the NSSEA                ##
+## (Non-Stationary Statistics for Extreme Attribution) This library makes it    ##
+## possible to infer the probability of an (extreme) event in the factual /     ##
+## counter-factual world (without anthropic forcing) to attribute it to climate ##
+## change.                                                                      ##
+##                                                                              ##
+## This software is governed by the CeCILL-C license under French law and       ##
+## abiding by the rules of distribution of free software.  You can  use,        ##
+## modify and/ or redistribute the software under the terms of the CeCILL-C     ##
+## license as circulated by CEA, CNRS and INRIA at the following URL            ##
+## "http://www.cecill.info".                                                    ##
+##                                                                              ##
+## As a counterpart to the access to the source code and  rights to copy,       ##
+## modify and redistribute granted by the license, users are provided only      ##
+## with a limited warranty  and the software's author,  the holder of the       ##
+## economic rights,  and the successive licensors  have only  limited           ##
+## liability.                                                                   ##
+##                                                                              ##
+## In this respect, the user's attention is drawn to the risks associated       ##
+## with loading,  using,  modifying and/or developing or reproducing the        ##
+## software by the user in light of its specific status of free software,       ##
+## that may mean  that it is complicated to manipulate,  and  that  also        ##
+## therefore means  that it is reserved for developers  and  experienced        ##
+## professionals having in-depth computer knowledge. Users are therefore        ##
+## encouraged to load and test the software's suitability as regards their      ##
+## requirements in conditions enabling the security of their systems and/or     ##
+## data to be ensured and,  more generally, to use and operate it in the        ##
+## same conditions as regards security.                                         ##
+##                                                                              ##
+## The fact that you are presently reading this means that you have had         ##
+## knowledge of the CeCILL-C license and that you accept its terms.             ##
+##                                                                              ##
+##################################################################################
+##################################################################################
+
+##################################################################################
+##################################################################################
+##                                                                              ##
+## Copyright Yoann Robin, 2020                                                  ##
+##                                                                              ##
+## yoann.robin.k@gmail.com                                                      ##
+##                                                                              ##
+## Ce logiciel est un programme informatique faisant partie de la librairie     ##
+## NSSEA (Non-Stationary Statistics for Extreme Attribution). Cette librairie   ##
+## permet d'estimer la probabilité d'un evenement (extreme) dans le monde       ##
+## factuel / contre factuel (sans forcage anthropogenique) et de l'attribuer au ##
+## changement climatique.                                                       ##
+##                                                                              ##
+## Ce logiciel est régi par la licence CeCILL-C soumise au droit français et    ##
+## respectant les principes de diffusion des logiciels libres. Vous pouvez      ##
+## utiliser, modifier et/ou redistribuer ce programme sous les conditions       ##
+## de la licence CeCILL-C telle que diffusée par le CEA, le CNRS et l'INRIA     ##
+## sur le site "http://www.cecill.info".                                        ##
+##                                                                              ##
+## En contrepartie de l'accessibilité au code source et des droits de copie,    ##
+## de modification et de redistribution accordés par cette licence, il n'est    ##
+## offert aux utilisateurs qu'une garantie limitée.  Pour les mêmes raisons,    ##
+## seule une responsabilité restreinte pèse sur l'auteur du programme, le       ##
+## titulaire des droits patrimoniaux et les concédants successifs.              ##
+##                                                                              ##
+## A cet égard  l'attention de l'utilisateur est attirée sur les risques        ##
+## associés au chargement,  à l'utilisation,  à la modification et/ou au        ##
+## développement et à la reproduction du logiciel par l'utilisateur étant       ##
+## donné sa spécificité de logiciel libre, qui peut le rendre complexe à        ##
+## manipuler et qui le réserve donc à des développeurs et des professionnels    ##
+## avertis possédant  des  connaissances  informatiques approfondies.  Les      ##
+## utilisateurs sont donc invités à charger  et  tester  l'adéquation  du       ##
+## logiciel à leurs besoins dans des conditions permettant d'assurer la         ##
+## sécurité de leurs systèmes et ou de leurs données et, plus généralement,     ##
+## à l'utiliser et l'exploiter dans les mêmes conditions de sécurité.           ##
+##                                                                              ##
+## Le fait que vous puissiez accéder à cet en-tête signifie que vous avez       ##
+## pris connaissance de la licence CeCILL-C, et que vous en avez accepté les    ##
+## termes.                                                                      ##
+##                                                                              ##
+##################################################################################
+
+###############
+## Libraries ##
+###############
+
+import os
+import types
+import uuid
+import shutil
+import hashlib
+import numpy  as np
+import pandas as pd
+import xarray as xr
+
+
+###############
+## Functions ##
+###############
+
+def _hash_update( h , x ):##{{{
+	"""
+	Update the hashlib object h with the content of x (array, pandas or xarray
+	object, ns_law, list, dict or any object with a __dict__).
+	"""
+	if x is None or isinstance( x , (bool,int,float,complex,str,bytes,np.generic) ):
+		h.update( "{}:{}".format( type(x).__name__ , x ).encode() )
+	elif isinstance( x , np.ndarray ):
+		h.update( "ndarray:{}:{}".format( x.dtype , x.shape ).encode() )
+		if x.dtype.kind == "O":
+			h.update( repr(x.tolist()).encode() )
+		else:
+			h.update( np.ascontiguousarray(x).tobytes() )
+	elif isinstance( x , (pd.DataFrame,pd.Series) ):
+		h.update( type(x).__name__.encode() )
+		_hash_update( h , np.asarray(x.index) )
+		if isinstance( x , pd.DataFrame ):
+			_hash_update( h , np.asarray(x.columns) )
+		_hash_update( h , np.asarray(x.values) )
+	elif isinstance( x , xr.DataArray ):
+		## Read along the last dimension (the model), so a variable of a store
+		## is never fully in memory
+		h.update( "DataArray:{}".format(x.dims).encode() )
+		for d in x.dims:
+			_hash_update( h , np.asarray(x[d].values) )
+		if x.ndim > 1:
+			for i in range(x.shape[-1]):
+				_hash_update( h , x[...,i].values )
+		else:
+			_hash_update( h , x.values )
+	elif isinstance( x , (list,tuple) ):
+		h.update( "{}:{}".format( type(x).__name__ , len(x) ).encode() )
+		for y in x:
+			_hash_update( h , y )
+	elif isinstance( x , dict ):
+		h.update( "dict:{}".format(len(x)).encode() )
+		for k in sorted( x , key = str ):
+			_hash_update( h , k )
+			_hash_update( h , x[k] )
+	elif hasattr( x , "lparams" ) and hasattr( x , "n_ns_params" ):
+		## A ns_law, only the configuration (not the fitted coefficients)
+		h.update( "ns_law:{}:{}".format( type(x).__name__ , getattr( x , "name" , None ) ).encode() )
+		_hash_update( h , x.__dict__.get( "use_scipy" ) )
+		_hash_update( h , x.__dict__.get( "_mle_with_bayesian" ) )
+		for k,p in x.lparams.items():
+			if all( hasattr( p , a ) for a in ["name","is_cst","link"] ):
+				_hash_update( h , [p.name,p.is_cst,p.link] )
+			else:
+				## Not a NSSEA.models.Params (e.g. GEVRLSC), the law is
+				## defined by its class
+				_hash_update( h , k )
+	elif isinstance( x , (types.FunctionType,types.BuiltinFunctionType,type) ):
+		h.update( "{}.{}".format( x.__module__ , x.__qualname__ ).encode() )
+	elif hasattr( x , "__dict__" ):
+		h.update( type(x).__name__.encode() )
+		_hash_update( h , vars(x) )
+	else:
+		h.update( repr(x).encode() )
+##}}}
+
+def _hash( *args ):##{{{
+	"""
+	NSSEA._hash
+	===========
+	Hash (hexadecimal string) of the content of args, see NSSEA._hash_update.
+	"""
+	h = hashlib.sha1()
+	for x in args:
+		_hash_update( h , x )
+	return h.hexdigest()
+##}}}
+
+
+#############
+## Classes ##
+#############
+
+class Checkpoint:##{{{
+	"""
+	NSSEA.Checkpoint
+	================
+	Blocks of a stage (covariates_FC_GAM, nslaw_fit, constrain_law,
+	statistics) already computed, saved in the directory
+	path/stage/<hash of the inputs>, one file by block. A stage restarted
+	with the same inputs (and seed) finds the blocks computed, and does not
+	compute them again. Use Climatology.checkpoint to set the path.
+	
+	Example
+	-------
+	>> ckpt = Checkpoint( "ckpt" , "nslaw_fit" , lY , seed )
+	>> if "block0" not in ckpt.names():
+	>> 	ckpt.save( "block0" , coef = coef )
+	>> coef = ckpt.load("block0")["coef"]
+	"""
+	
+	def __init__( self , path , stage , *inputs ):##{{{
+		"""
+		Arguments
+		---------
+		path   : [str] Directory of the checkpoints
+		stage  : [str] Name of the stage
+		inputs : Inputs and parameters of the stage, the blocks are saved
+		         for their hash.
+		"""
+		self.path = os.path.join( path , stage , _hash( stage , *inputs ) )
+		os.makedirs( self.path , exist_ok = True )
+	##}}}
+	
+	def _file( self , name ):##{{{
+		return os.path.join( self.path , name + ".npz" )
+	##}}}
+	
+	def names( self ):##{{{
+		"""
+		Set of the names of the blocks saved.
+		"""
+		return set( f[:-4] for f in os.listdir(self.path) if f.endswith(".npz") )
+	##}}}
+	
+	def save( self , name = None , **arrays ):##{{{
+		"""
+		Save the arrays of the block name (a new name if None). The file is
+		written then renamed, so a block is saved entirely or not at all.
+		"""
+		if name is None:
+			name = uuid.uuid4().hex
+		ofile = self._file(name)
+		tmp   = ofile + ".tmp"
+		with open( tmp , "wb" ) as f:
+			np.savez( f , **arrays )
+		os.replace( tmp , ofile )
+	##}}}
+	
+	def load( self , name ):##{{{
+		"""
+		Dict of the arrays of the block name.
+		"""
+		with np.load( self._file(name) ) as data:
+			return { k : data[k] for k in data.files }
+	##}}}
+	
+	def clear( self ):##{{{
+		"""
+		Remove all the blocks saved.
+		"""
+		shutil.rmtree( self.path , ignore_errors = True )
+	##}}}
+	
+##}}}
+
+class StageCache:##{{{
+	"""
+	NSSEA.StageCache
+	================
+	Cache on disk of the results of the stages covariates_FC_GAM (clim.X),
+	nslaw_fit (clim.law_coef) and infer_multi_model (Multi_Synthesis,
+	mm_mean and mm_cov). A result is saved in a file named by the hash of the
+	inputs and parameters of the stage (lX, lY, XN, dof, ns_law, seed, ...),
+	so a stage called again with the same inputs reads its result instead of
+	computing it, e.g. when only the event is modified. The total size of the
+	cache is bounded, the least recently used results are removed first.
+	Use Climatology.cache to set the cache of a clim.
+	
+	Example
+	-------
+	>> clim.cache = NSSEA.StageCache( "cache" , max_size = 2**30 )
+	>> clim = NSSEA.covariates_FC_GAM( clim , lX , XN , seed = 1 ) ## Computed
+	>> clim = NSSEA.covariates_FC_GAM( clim , lX , XN , seed = 1 ) ## Read
+	"""
+	
+	def __init__( self , path , max_size = 2**30 ):##{{{
+		"""
+		Arguments
+		---------
+		path     : [str] Directory of the cache
+		max_size : [int] Maximal size of the cache, in bytes. Default is 1Go
+		"""
+		self.path     = path
+		self.max_size = max_size
+		os.makedirs( self.path , exist_ok = True )
+	##}}}
+	
+	def _file( self , stage , inputs ):##{{{
+		return os.path.join( self.path , "{}-{}.npz".format( stage , _hash( stage , *inputs ) ) )
+	##}}}
+	
+	@property
+	def size(self):
+		"""
+		Size of the cache, in bytes.
+		"""
+		return sum( os.path.getsize( os.path.join( self.path , f ) ) for f in os.listdir(self.path) if f.endswith(".npz") )
+	
+	def get( self , stage , *inputs ):##{{{
+		"""
+		Dict of the arrays saved for the stage and these inputs, None if they
+		are not in the cache.
+		"""
+		ifile = self._file( stage , inputs )
+		try:
+			with np.load(ifile) as data:
+				out = { k : data[k] for k in data.files }
+		except FileNotFoundError:
+			return None
+		## Last use, for the eviction
+		os.utime(ifile)
+		return out
+	##}}}
+	
+	def put( self , stage , inputs , **arrays ):##{{{
+		"""
+		Save the arrays for the stage and the inputs (a list), then remove the
+		least recently used results until the size of the cache is lower than
+		max_size.
+		"""
+		os.makedirs( self.path , exist_ok = True )
+		ofile = self._file( stage , inputs )
+		tmp   = ofile + ".tmp"
+		with open( tmp , "wb" ) as f:
+			np.savez( f , **arrays )
+		os.replace( tmp , ofile )
+		self._evict( keep = ofile )
+	##}}}
+	
+	def _evict( self , keep ):##{{{
+		files = [ os.path.join( self.path , f ) for f in os.listdir(self.path) if f.endswith(".npz") ]
+		files = sorted( [ f for f in files if f != keep ] , key = os.path.getmtime )
+		size  = sum( os.path.getsize(f) for f in files ) + os.path.getsize(keep)
+		for f in files:
+			if not size > self.max_size:
+				break
+			size -= os.path.getsize(f)
+			os.remove(f)
+	##}}}
+	
+	def clear( self ):##{{{
+		"""
+		Remove all the results of the cache.
+		"""
+		for f in os.listdir(self.path):
+			if f.endswith(".npz"):
+				os.remove( os.path.join( self.path , f ) )
+	##}}}
+	
+##}}}
@@ -88,19 +88,32 @@
 ## Libraries ##
 ###############
 
+import warnings
+from time import perf_counter
+
 import numpy as np
 import scipy.linalg as scl
 import scipy.optimize as sco
+import scipy.special as scs
 import scipy.stats as sc
 import pandas as pd
 import xarray as xr
 
 from.__multi_model import MultiModel
+from .__multi_model import _mm_from_clim
+from .__multi_model import _mm_to_clim
 from .__tools import matrix_squareroot
+from .__tools import SymmetricEigen
 from .__tools import ProgressBar
+from .__tools import pool_map
+from .__mcmc  import ensemble_mcmc
+from .__mcmc  import adaptive_mcmc
+from .__mcmc  import _adaptive_mcmc_kwargs
+from .__mcmc  import _prior_proposal_factor
 
 from .models.__Normal import Normal
 from .models.__GEV    import GEV
+from .models.__kernels import GEVKernel
 
 from SDFC.link import ULIdentity
 from SDFC.link import ULExponential
@@ -119,7 +132,61 @@ import SDFC as sd
 ## Covariate constraint
 ##=====================
 
-def constrain_covariate( climIn , Xo , time_reference = None , assume_good_scale = False , verbose = False ): ##{{{
+def _constrain_covariate_rescale( K , SY , res ):##{{{
+	"""
+	Factor lbda such that the observations covariance lbda * SY is coherent
+	with the residuals res, root of
+	f(lbda) = tr( (K + lbda SY)^+ lbda SY ) - res.T (K + lbda SY)^+ lbda SY (K + lbda SY)^+ res
+	
+	The pencil (K,SY) is diagonalized once on the range of SY: with
+	W = Q Lambda^{-1/2} (eigen decomposition of SY), W.T SY W = I and
+	W.T K W = V diag(d) V.T, so each evaluation of f is O(n).
+	"""
+	eig = SymmetricEigen(SY)
+	idx = eig.lbda > SY.shape[0] * np.finfo(float).eps * np.max( np.abs(eig.lbda) )
+	W   = eig.v[:,idx] / np.sqrt(eig.lbda[idx])
+	d,V = np.linalg.eigh( W.T @ K @ W )
+	d   = np.where( d > 0 , d , 0 )
+	w2  = ( V.T @ W.T @ res )**2
+	
+	def fct_to_root(lbda):
+		return np.sum( lbda / ( d + lbda ) ) - lbda * np.sum( w2 / ( d + lbda )**2 )
+	
+	a,b = 1e-2,1e2
+	while fct_to_root(a) * fct_to_root(b) > 0:
+		a /= 2
+		b *= 2
+	
+	return sco.brentq( fct_to_root , a = a , b = b )
+##}}}
+
+def _constrain_covariate_gain( SXH , HSXH , SY ):##{{{
+	"""
+	Cholesky factorization of the innovation covariance H SX H.T + SY,
+	restricted to the range of SY (the centering of the observations makes
+	SY, and H SX H.T, singular along the same direction).
+	
+	Return
+	------
+	solve : function, solve(D) = SX H.T (H SX H.T + SY)^+ D
+	R     : array, R @ R.T = SX H.T (H SX H.T + SY)^+ H SX, the decrease of
+	        the covariance
+	"""
+	eig = SymmetricEigen(SY)
+	idx = eig.lbda > SY.shape[0] * np.finfo(float).eps * np.max( np.abs(eig.lbda) )
+	Q   = eig.v[:,idx]
+	cS  = scl.cho_factor( Q.T @ ( HSXH + SY ) @ Q , lower = True )
+	SXHQ = SXH @ Q
+	
+	def solve( D ):
+		return SXHQ @ scl.cho_solve( cS , Q.T @ D )
+	
+	R = scl.solve_triangular( cS[0] , SXHQ.T , lower = True ).T
+	
+	return solve,R
+##}}}
+
+def constrain_covariate( climIn , Xo , time_reference = None , assume_good_scale = False , all_models = False , seed = None , verbose = False ): ##{{{
 	"""
 	NSSEA.constrain_covariate
 	=========================
@@ -135,6 +202,14 @@ def constrain_covariate( climIn , Xo , time_reference = None , assume_good_scale
 		Reference time period of Xo
 	assume_good_scale : boolean
 		If we assume than observations and multi-model have the same scale
+	all_models : boolean
+		If False (default), the covariates of all models are replaced by a
+		sample of the constrained multi-model. If True, the covariates of
+		each sample of each model are updated with the Kalman gain of the
+		multi-model, with perturbed observations (except for the best
+		estimate), so each model keeps its own covariates.
+	seed     : [integer or None]
+		Seed of the perturbations of the observations if all_models is True.
 	verbose  : bool
 		Print (or not) state of execution
 	
@@ -156,7 +231,8 @@ def constrain_covariate( climIn , Xo , time_reference = None , assume_good_scale
 	n_mm_coef   = clim.data["mm_mean"].size
 	n_coef      = clim.n_coef
 	n_sample    = clim.n_sample
-	samples     = clim.X.sample
+	n_model     = clim.n_model
+	samples     = clim.data["X"].sample
 	pb.print()
 	
 	## Projection matrix H
@@ -178,60 +254,56 @@ def constrain_covariate( climIn , Xo , time_reference = None , assume_good_scale
 	
 	# Other inputs : x, SX, y, SY
 	##===========================
-	X  = clim.data["mm_mean"].values
-	SX = clim.data["mm_cov"].values
-	Y  = np.ravel(centerY @ Xo)
-	SY = centerY @ centerY.T
+	## SX is only used through products, it stays in factored form if the
+	## multi-model is low rank
+	mmodel = _mm_from_clim(clim)
+	X    = mmodel.mean
+	Y    = np.ravel(centerY @ Xo)
+	SY   = centerY @ centerY.T
+	res  = Y - H @ X
+	SXH  = mmodel.cov_dot( H.T )
+	HSXH = H @ SXH
 	pb.print()
 	
 	## Rescale SY
 	##===========
+	lbda = 1.
 	if not assume_good_scale:
-		res = Y - H @ X
-		K   = H @ SX @ H.T
-		
-		def fct_to_root(lbda):
-			SY_tmp = lbda * SY
-			iSig = np.linalg.pinv( K + SY_tmp )
-			out = np.sum( np.diag( iSig @ SY_tmp ) ) - res.T @ iSig @ SY_tmp @ iSig @ res
-			return out
-		
-		a,b = 1e-2,1e2
-		while fct_to_root(a) * fct_to_root(b) > 0:
-			a /= 2
-			b *= 2
-		
-		lbda = sco.brentq( fct_to_root , a = a , b = b )
-		SY = lbda * SY
+		lbda = _constrain_covariate_rescale( HSXH , SY , res )
+		SY   = lbda * SY
 	pb.print()
 	
 	## Apply constraints
 	##==================
 	
-	Sinv = np.linalg.pinv( H @ SX @ H.T + SY )
-	K	 = SX @ H.T @ Sinv
-	clim.data["mm_mean"].values = X + K @ ( Y - H @ X )
-	clim.data["mm_cov"].values  = SX - SX @ H.T @ Sinv @ H @ SX
+	solve,R = _constrain_covariate_gain( SXH , HSXH , SY )
+	mmodel.mean = X + solve(res)
+	mmodel.downdate( R , observed = np.flatnonzero( np.any( H != 0 , axis = 0 ) ) )
+	_mm_to_clim( clim , mmodel )
 	pb.print()
 	
 	
 	## Sample from it
 	##===============
-	law       = MultiModel()
-	law.mean  = clim.data["mm_mean"].values
-	law.cov   = clim.data["mm_cov"].values
-	cx_sample = xr.DataArray( np.zeros( (n_time,n_sample + 1,2) ) , coords = [ clim.X.time , samples , clim.X.forcing ] , dims = ["time","sample","forcing"] )
-	
-	cx_sample.loc[:,"BE","F"] = law.mean[:n_time]
-	cx_sample.loc[:,"BE","C"] = law.mean[n_time:(2*n_time)]
-	
-	for s in samples[1:]:
-		draw = law.rvs()
-		cx_sample.loc[:,s,"F"] = draw[:n_time]
-		cx_sample.loc[:,s,"C"] = draw[n_time:(2*n_time)]
-	
-	for m in clim.model:
-		clim.X.loc[:,:,:,m] = cx_sample.values
+	if all_models:
+		XFC  = clim.data["X"].loc[:,:,["F","C"],:].values
+		XFC  = XFC.transpose( (2,0,1,3) ).reshape( 2 * n_time , -1 )
+		eps  = np.sqrt(lbda) * centerY @ np.random.default_rng(seed).normal( size = (n_time_Xo,n_sample + 1,n_model) ).reshape(n_time_Xo,-1)
+		eps  = eps.reshape( n_time_Xo , n_sample + 1 , n_model )
+		eps[:,0,:] = 0
+		XFC  = XFC + solve( Y.reshape(-1,1) + eps.reshape(n_time_Xo,-1) - H[:,:n_time] @ XFC[:n_time,:] )[:(2*n_time),:]
+		XFC  = XFC.reshape( (2,n_time,n_sample + 1,n_model) ).transpose( (1,2,0,3) )
+		cX   = xr.DataArray( XFC , coords = [ time , samples , ["F","C"] , clim.model ] , dims = ["time","sample","forcing","model"] )
+		clim.X = clim.data["X"].copy( data = cX.loc[:,:,clim.data["X"].forcing.values,:].values )
+	else:
+		cx_sample = xr.DataArray( np.zeros( (n_time,n_sample + 1,2) ) , coords = [ clim.data["X"].time , samples , clim.data["X"].forcing ] , dims = ["time","sample","forcing"] )
+		
+		draw = np.hstack( (mmodel.mean.reshape(-1,1),mmodel.rvs(n_sample)) )
+		cx_sample.loc[:,:,"F"] = draw[:n_time,:]
+		cx_sample.loc[:,:,"C"] = draw[n_time:(2*n_time),:]
+		
+		## Same sample for all models
+		clim.X = clim.data["X"].copy( data = np.repeat( cx_sample.values[:,:,:,np.newaxis] , n_model , axis = 3 ) )
 	
 	pb.end()
 	
@@ -242,40 +314,219 @@ def constrain_covariate( climIn , Xo , time_reference = None , assume_good_scale
 ## Bayesian constraint
 ##====================
 
-def _constrain_law_all( climIn , Yo , n_mcmc_drawn_min , n_mcmc_drawn_max , verbose , **kwargs ):##{{{
-	clim = climIn.copy()
+def _constrain_law_check_length( n_drawn , n_keep ):##{{{
+	"""
+	Raise a ValueError if a chain of n_drawn draws is too short to keep
+	n_keep draws without replacement.
+	"""
+	if n_drawn < n_keep:
+		raise ValueError( "Only {} draws in a chain after the burn-in, {} are kept: increase n_mcmc_drawn_min".format( n_drawn , n_keep ) )
+##}}}
+
+def _constrain_law_chain( args ):##{{{
+	"""
+	NSSEA._constrain_law_chain
+	==========================
+	Draw one Markov chain of the ns_law coefficients. The chain has its own
+	random generator initialized with seed, used to draw the length of the
+	chain, the seeds of each try of ns_law.drawn_bayesian and the coefficients
+	kept.
 	
-	pb = ProgressBar( clim.n_sample + 1 , "constrain_law" , verbose )
+	Arguments
+	---------
+	args : tuple
+		(ns_law,Yo,X,n_mcmc_drawn_min,n_mcmc_drawn_max,n_keep,prior_law,min_rate_accept,seed,kwargs).
+		If n_keep is None, only the last draw is kept, else n_keep draws
+		after the n_mcmc_drawn_min first are kept (without replacement, the
+		length of the chain is drawn between n_mcmc_drawn_min + n_keep and
+		n_mcmc_drawn_max).
 	
+	Return
+	------
+	coef : np.array
+		Coefficients kept, shape (n_coef,n_keep)
+	info : list
+		rate of acceptance, number of try, length of chain and wall time (s)
+	"""
+	ns_law,Yo,X,n_mcmc_drawn_min,n_mcmc_drawn_max,n_keep,prior_law,min_rate_accept,seed,kwargs = args
+	
+	start    = perf_counter()
+	rng      = np.random.default_rng(seed)
+	adaptive = kwargs.get( "adaptive" , False )
+	n_mcmc_drawn = n_mcmc_drawn_max if adaptive else int(rng.integers( n_mcmc_drawn_min + ( 0 if n_keep is None else n_keep ) , n_mcmc_drawn_max ))
+	if adaptive:
+		kwargs = { **kwargs , "n_mcmc_drawn_min" : n_mcmc_drawn_min }
+	draw,info = ns_law.drawn_bayesian( Yo , X , n_mcmc_drawn , prior_law , min_rate_accept , seed = int(rng.integers( 2**32 )) , return_info = True , **kwargs )
+	
+	if n_keep is None:
+		coef = draw[-1,:].reshape(-1,1)
+	else:
+		if not adaptive:
+			draw = draw[n_mcmc_drawn_min:,:]
+		_constrain_law_check_length( draw.shape[0] , n_keep )
+		coef = draw[rng.choice(draw.shape[0],n_keep,False),:].T
 	
-	min_rate_accept = kwargs.get("min_rate_accept")
+	return coef,[info["rate_accept"],info["n_try"],info.get("n_mcmc_drawn",n_mcmc_drawn),perf_counter() - start]
+##}}}
+
+def _constrain_law_ensemble( ns_law , Yo , X , l_index , n_mcmc_drawn_min , n_mcmc_drawn_max , keep_all , prior_law , min_rate_accept , seed , pb , **kwargs ):##{{{
+	"""
+	NSSEA._constrain_law_ensemble
+	=============================
+	Draw all the chains of constrain_law together with NSSEA.ensemble_mcmc.
+	The initial state of each chain is drawn from the prior. The random walk
+	is given by the keyword transition_scale (see NSSEA.ensemble_mcmc), by
+	default it is scaled on the covariance of the prior (see
+	NSSEA._prior_proposal_factor). The chains with a rate of acceptance lower
+	than min_rate_accept are drawn again (together), with a random walk
+	divided by 2, at most n_try_max times (keyword, default is 10): the
+	chains still rejected are then kept with a warning. If the keyword
+	adaptive is True, the chains are drawn by NSSEA.adaptive_mcmc.
+	
+	Return
+	------
+	l_coef : list of np.array
+		Coefficients kept of each chain, shape (n_coef,len(l_index[i]))
+	info : np.array
+		rate of acceptance, number of try, length of chain and wall time (s)
+		of the ensemble, shape (len(l_index),4)
+	"""
+	start    = perf_counter()
+	rng      = np.random.default_rng([int(seed)])
+	n_chains = len(l_index)
+	X        = X[:,[index[0] for index in l_index]]
+	n_try_max = kwargs.get( "n_try_max" , 10 )
+	
+	## Factor of the random walk of each chain
+	transition_scale = kwargs.get( "transition_scale" )
+	if transition_scale is None:
+		transition_scale = _prior_proposal_factor(prior_law)
+	transition_scale = np.asarray(transition_scale,dtype=float)
+	if transition_scale.ndim < 2:
+		transition_scale = np.diag( np.zeros(ns_law.n_ns_params) + transition_scale )
+	transition_scale = np.zeros( (n_chains,) + transition_scale.shape ) + transition_scale
+	
+	l_coef = [None for _ in range(n_chains)]
+	info   = np.zeros( (n_chains,4) )
+	todo   = np.arange( n_chains , dtype = int )
+	while todo.size > 0:
+		if kwargs.get( "adaptive" , False ):
+			init      = prior_law.rvs( size = todo.size , random_state = rng ).reshape(todo.size,-1)
+			draw,info_mcmc = adaptive_mcmc( ns_law , Yo , X[:,todo] , prior_law , init , n_mcmc_drawn_max , seed = int(rng.integers( 2**32 )) , **_adaptive_mcmc_kwargs({ **kwargs , "n_mcmc_drawn_min" : n_mcmc_drawn_min }) )
+			n_mcmc_drawn = info_mcmc["n_mcmc_drawn"]
+			rate_accept  = info_mcmc["rate_accept"]
+			if not keep_all:
+				for i,d in zip(todo,draw):
+					_constrain_law_check_length( d.shape[0] , len(l_index[i]) )
+			draw = [ d[-1:,:].T if keep_all else d[rng.choice(d.shape[0],len(l_index[i]),False),:].T for i,d in zip(todo,draw) ]
+		else:
+			n_keep       = 0 if keep_all else np.array( [ len(l_index[i]) for i in todo ] )
+			n_mcmc_drawn = rng.integers( n_mcmc_drawn_min + n_keep , n_mcmc_drawn_max , size = todo.size )
+			l_keep       = None if keep_all else [ n_mcmc_drawn_min + rng.choice( n - n_mcmc_drawn_min , len(l_index[i]) , False ) for i,n in zip(todo,n_mcmc_drawn) ]
+			init         = prior_law.rvs( size = todo.size , random_state = rng ).reshape(todo.size,-1)
+			draw,rate_accept = ensemble_mcmc( ns_law , Yo , X[:,todo] , prior_law , n_mcmc_drawn , init , l_keep , transition_scale[todo] , int(rng.integers( 2**32 )) )
+		
+		accept = rate_accept > min_rate_accept
+		last   = info[todo,1] + 1 >= n_try_max
+		for k,i in enumerate(todo):
+			l_coef[i]  = draw[k]
+			info[i,:3] = rate_accept[k] , info[i,1] + 1 , n_mcmc_drawn[k]
+			if accept[k] or last[k]:
+				pb.print()
+		if np.any( last & ~accept ):
+			warnings.warn( "constrain_law: {} chain(s) with a rate of acceptance lower than {} after {} tries are kept (see clim.mcmc_info)".format( np.sum( last & ~accept ) , min_rate_accept , n_try_max ) , RuntimeWarning )
+		transition_scale[todo[~accept]] /= 2
+		todo = todo[~( accept | last )]
+	info[:,3] = perf_counter() - start
+	
+	return l_coef,info
+##}}}
+
+def _constrain_law_run( clim , Yo , l_index , n_mcmc_drawn_min , n_mcmc_drawn_max , keep_all , method , n_jobs , executor , seed , ckpt , verbose , **kwargs ):##{{{
+	"""
+	NSSEA._constrain_law_run
+	========================
+	Run the chains of constrain_law. l_index is a list of list of samples
+	index, one chain is drawn for each element, with the covariate of the
+	first sample, and the coefficients drawn are given to all samples of the
+	element. The clim is modified in place. If ckpt (a NSSEA.Checkpoint) is
+	not None, each chain drawn is saved, and the chains saved are not drawn
+	again. With the method "ensemble" the chains are drawn together, so they
+	are saved together.
+	"""
+	min_rate_accept = kwargs.pop( "min_rate_accept" , None )
 	if min_rate_accept is None:
 		min_rate_accept = 0.05
-	else:
-		kwargs.pop("min_rate_accept")
 	
 	## Define prior
-	prior_mean   = clim.data["mm_mean"][-clim.n_coef:].values
-	prior_cov    = clim.data["mm_cov"][-clim.n_coef:,-clim.n_coef:].values
+	mmodel       = _mm_from_clim(clim)
+	prior_mean   = mmodel.mean[-clim.n_coef:]
+	prior_cov    = mmodel.sub_cov( slice(-clim.n_coef,None) )
 	prior_law    = sc.multivariate_normal( mean = prior_mean , cov = prior_cov , allow_singular = True )
 	
+	## Each chain must be long enough to keep its draws without replacement
+	n_keep = 0 if keep_all or len(l_index) == 0 else max( len(index) for index in l_index )
+	if not kwargs.get( "adaptive" , False ) and n_mcmc_drawn_min + n_keep >= n_mcmc_drawn_max:
+		raise ValueError( "n_mcmc_drawn_max ({}) must be greater than n_mcmc_drawn_min + the number of draws kept by chain ({})".format( n_mcmc_drawn_max , n_mcmc_drawn_min + n_keep ) )
+	
+	## Arguments of each chain
+	Yo_ = Yo.values.squeeze()
+	X   = clim.data["X"].loc[Yo.index,:,"F","Multi_Synthesis"].values
+	law_coef = clim.law_coef.loc[:,:,"Multi_Synthesis"].values.copy()
+	mcmc_info = np.zeros( (clim.n_sample + 1,4) ) + np.nan
+	
+	## Chains already drawn
+	done = set() if ckpt is None else ckpt.names()
+	if "ensemble" in done:
+		chains    = ckpt.load("ensemble")
+		law_coef  = chains["law_coef"]
+		mcmc_info = chains["mcmc_info"]
+		l_index   = []
+	for name in done - set(["ensemble"]):
+		chain = ckpt.load(name)
+		law_coef[:,chain["index"]]  = chain["coef"]
+		mcmc_info[chain["index"],:] = chain["info"]
+	l_index = [ index for index in l_index if "chain{}".format(index[0]) not in done ]
+	
+	l_args = [] if method == "ensemble" else [ (clim.ns_law,Yo_,X[:,index[0]],n_mcmc_drawn_min,n_mcmc_drawn_max,None if keep_all else len(index),prior_law,min_rate_accept,[int(seed),index[0]],kwargs) for index in l_index ]
+	
 	## And now MCMC loop
-	for s in clim.sample:
-		pb.print()
-		X   = clim.X.loc[Yo.index,s,"F","Multi_Synthesis"].values.squeeze()
-		n_mcmc_drawn = np.random.randint( n_mcmc_drawn_min , n_mcmc_drawn_max )
-		draw = clim.ns_law.drawn_bayesian( Yo.values.squeeze() , X , n_mcmc_drawn , prior_law , min_rate_accept , **kwargs )
-		clim.law_coef.loc[:,s,"Multi_Synthesis"] = draw[-1,:]
+	pb = ProgressBar( len(l_index) , "constrain_law" , verbose )
+	if method == "ensemble" and len(l_index) > 0:
+		l_coef,l_info = _constrain_law_ensemble( clim.ns_law , Yo_ , X , l_index , n_mcmc_drawn_min , n_mcmc_drawn_max , keep_all , prior_law , min_rate_accept , seed , pb , **kwargs )
+		for index,coef,info in zip( l_index , l_coef , l_info ):
+			law_coef[:,index]  = coef
+			mcmc_info[index,:] = info
+		if ckpt is not None:
+			ckpt.save( "ensemble" , law_coef = law_coef , mcmc_info = mcmc_info )
+	elif method != "ensemble":
+		for index,(coef,info) in zip( l_index , pool_map( _constrain_law_chain , l_args , n_jobs , executor ) ):
+			pb.print()
+			law_coef[:,index]  = coef
+			mcmc_info[index,:] = info
+			if ckpt is not None:
+				ckpt.save( "chain{}".format(index[0]) , index = np.array(index) , coef = coef , info = np.array(info) )
 	
-	clim.law_coef.loc[:,"BE",:] = clim.law_coef[:,1:,:].median( dim = "sample" )
-	clim.BE_is_median = True
+	clim.law_coef.loc[:,:,"Multi_Synthesis"] = law_coef
+	clim.mcmc_info = xr.DataArray( mcmc_info , coords = [clim.sample , ["rate_accept","n_try","n_mcmc_drawn","wall_time"]] , dims = ["sample","mcmc_stats"] )
 	
 	pb.end()
+##}}}
+
+def _constrain_law_all( climIn , Yo , n_mcmc_drawn_min , n_mcmc_drawn_max , method , n_jobs , executor , seed , ckpt , verbose , **kwargs ):##{{{
+	clim = climIn.copy()
+	
+	## One chain by sample
+	l_index = [ [i] for i in range(clim.n_sample + 1) ]
+	_constrain_law_run( clim , Yo , l_index , n_mcmc_drawn_min , n_mcmc_drawn_max , True , method , n_jobs , executor , seed , ckpt , verbose , **kwargs )
+	
+	clim.law_coef.loc[:,"BE",:] = clim.law_coef[:,1:,:].median( dim = "sample" )
+	clim.BE_is_median = True
 	
 	return clim
 ##}}}
 
-def _constrain_law_keep( climIn , Yo , keep , n_mcmc_drawn_min , n_mcmc_drawn_max , verbose , **kwargs ):##{{{
+def _constrain_law_keep( climIn , Yo , keep , n_mcmc_drawn_min , n_mcmc_drawn_max , method , n_jobs , executor , seed , ckpt , verbose , **kwargs ):##{{{
 	
 	clim = climIn.copy()
 	
@@ -283,52 +534,32 @@ def _constrain_law_keep( climIn , Yo , keep , n_mcmc_drawn_min , n_mcmc_drawn_ma
 	n_sample = clim.n_sample + 1
 	n_keep   = int(keep * n_sample)
 	
-	index_keep = np.random.choice( n_sample , n_keep , replace = False )
-	index_supp = np.array( [i for i in range(n_sample) if i not in index_keep] , dtype = np.int )
-	assoc      = np.random.choice( index_keep , n_sample - n_keep )
+	rng        = np.random.default_rng(seed)
+	index_keep = rng.choice( n_sample , n_keep , replace = False )
+	index_supp = np.array( [i for i in range(n_sample) if i not in index_keep] , dtype = int )
+	assoc      = rng.choice( index_keep , n_sample - n_keep )
 	
 	l_index = []
 	for i in index_keep:
 		l_index.append([i])
 		l_index[-1] = l_index[-1] + index_supp[assoc==i].tolist()
 	
-	pb = ProgressBar( n_keep , "constrain_law" , verbose )
-	
-	
-	min_rate_accept = kwargs.get("min_rate_accept")
-	if min_rate_accept is None: min_rate_accept = 0.05
-	
-	## Define prior
-	prior_mean   = clim.data["mm_mean"][-clim.n_coef:].values
-	prior_cov    = clim.data["mm_cov"][-clim.n_coef:,-clim.n_coef:].values
-	prior_law    = sc.multivariate_normal( mean = prior_mean , cov = prior_cov , allow_singular = True )
+	## One chain by kept sample, drawn coefficients shared with the associated samples
+	_constrain_law_run( clim , Yo , l_index , n_mcmc_drawn_min , n_mcmc_drawn_max , False , method , n_jobs , executor , seed , ckpt , verbose , **kwargs )
 	
-	## And now MCMC loop
+	## The covariate of associated samples is the covariate of the chain
+	X = clim.X.loc[:,:,:,"Multi_Synthesis"].values.copy()
 	for index in l_index:
-		pb.print()
-		X   = clim.X.loc[Yo.index,clim.sample[index[0]],"F","Multi_Synthesis"].values.squeeze()
-		n_mcmc_drawn = np.random.randint( n_mcmc_drawn_min , n_mcmc_drawn_max )
-		draw = clim.ns_law.drawn_bayesian( Yo.values.squeeze() , X , n_mcmc_drawn , prior_law , min_rate_accept  , **kwargs )
-		draw = draw[n_mcmc_drawn_min:,:]
-		
-		clim.law_coef.loc[:,clim.sample[index],"Multi_Synthesis"] = draw[np.random.choice(draw.shape[0],len(index),False),:].T
-		newX = np.zeros( (clim.time.size,len(index),2) )
-		for i in range(len(index)):
-			newX[:,i,:] = clim.X.loc[:,clim.sample[index[0]],:,"Multi_Synthesis"].values.squeeze()
-		clim.X.loc[:,clim.sample[index],:,"Multi_Synthesis"] = newX
+		X[:,index,:] = X[:,[index[0]],:]
+	clim.X.loc[:,:,:,"Multi_Synthesis"] = X
 	
 	clim.law_coef.loc[:,"BE",:] = clim.law_coef[:,1:,:].median( dim = "sample" )
 	clim.BE_is_median = True
 	
-	pb.end()
-	
 	return clim
-	
-	
-	pass
 ##}}}
 
-def constrain_law( climIn , Yo , keep = "all" , n_mcmc_drawn_min = 5000 , n_mcmc_drawn_max = 10000 , verbose = False , **kwargs ):##{{{
+def constrain_law( climIn , Yo , keep = "all" , n_mcmc_drawn_min = 5000 , n_mcmc_drawn_max = 10000 , method = "SDFC" , n_jobs = 1 , executor = None , seed = None , verbose = False , **kwargs ):##{{{
 	"""
 	NSSEA.constrain_law
 	===================
@@ -341,20 +572,63 @@ def constrain_law( climIn , Yo , keep = "all" , n_mcmc_drawn_min = 5000 , n_mcmc
 	keep     : [ "all" or a float between 0 and 1] If keep < 1, only a ratio of 
 	          keep covariates is used, and many coefficients are drawn for the
 	          same covariate. Faster, but can reduce confidence interval
-	          uncertainty.
+	          uncertainty. The draws of a chain are kept without
+	          replacement, so n_mcmc_drawn_max must be greater than
+	          n_mcmc_drawn_min plus the number of draws kept by chain.
 	n_mcmc_draw_min: [integer] Minimum number of coef to draw for each covariate
 	n_mcmc_draw_max: [integer] Maximum number of coef to draw for each covariate
+	method   : [str] "SDFC" (default), each chain is drawn by SDFC, or
+	           "ensemble", all chains are drawn together by
+	           NSSEA.ensemble_mcmc (n_jobs and executor are then not used, the
+	           random walk is given by the keyword transition_scale, default
+	           is scaled on the covariance of the prior, and divided by 2 at
+	           each new try of a chain)
+	n_jobs   : [integer] Number of process, the chains are drawn in a pool of
+	           n_jobs process. Default is 1 (serial)
+	executor : [concurrent.futures.Executor or None] An executor used instead
+	           of a new pool of n_jobs process
+	adaptive : [bool, in kwargs] If True, the chains have an adaptive length
+	           (NSSEA.adaptive_mcmc): the proposal is adapted during a
+	           burn-in, then each chain stops as soon as it has converged
+	           (split R-hat and effective sample size) and has at least
+	           n_mcmc_drawn_min draws, or after n_mcmc_drawn_max draws. A
+	           ValueError is raised if n_mcmc_drawn_max is lower than
+	           n_burn + 2 * check_every (see NSSEA.adaptive_mcmc). The keep
+	           mode draws its coefficients after the burn-in.
+	n_try_max: [integer, in kwargs] Maximal number of tries of a chain with
+	           the method "ensemble" or with adaptive, default is 10 (no
+	           limit for the chains of SDFC without adaptive). The chains
+	           still with a rate of acceptance lower than min_rate_accept are
+	           kept, with a warning.
+	seed     : [integer or None] Seed of chains. Each chain has its own
+	           generator derived from (seed,sample), and is drawn again with a
+	           new seed while its rate of acceptance is lower than
+	           min_rate_accept (given in kwargs, default is 0.05). If None,
+	           the seed is drawn from np.random. If climIn.checkpoint is set
+	           and the seed is given, each chain is saved as soon as it is
+	           drawn, and the chains already drawn with the same inputs and
+	           seed are not drawn again.
 	verbose  : [bool] Print (or not) state of execution
 	
 	Return
 	------
-	clim : [NSSEA.Climatology] A copy is returned
+	clim : [NSSEA.Climatology] A copy is returned. The rate of acceptance,
+	       number of try, length and wall time of the chain of each sample
+	       are given in clim.mcmc_info
 	"""
 	
+	ckpt = None
+	if seed is None:
+		seed = np.random.randint( 2**31 )
+	else:
+		n_coef = climIn.n_coef
+		mmodel = _mm_from_clim(climIn)
+		ckpt   = climIn._checkpoint( "constrain_law" , climIn.ns_law , Yo , climIn.data["X"].loc[:,:,"F","Multi_Synthesis"] , mmodel.mean[-n_coef:] , mmodel.sub_cov( slice(-n_coef,None) ) , keep , n_mcmc_drawn_min , n_mcmc_drawn_max , method , int(seed) , kwargs )
+	
 	if keep == "all" or not keep < 1:
-		return _constrain_law_all( climIn , Yo , n_mcmc_drawn_min , n_mcmc_drawn_max , verbose , **kwargs )
+		return _constrain_law_all( climIn , Yo , n_mcmc_drawn_min , n_mcmc_drawn_max , method , n_jobs , executor , seed , ckpt , verbose , **kwargs )
 	else:
-		return _constrain_law_keep( climIn , Yo , keep , n_mcmc_drawn_min , n_mcmc_drawn_max , verbose , **kwargs )
+		return _constrain_law_keep( climIn , Yo , keep , n_mcmc_drawn_min , n_mcmc_drawn_max , method , n_jobs , executor , seed , ckpt , verbose , **kwargs )
 	
 #	clim = climIn.copy()
 #	
@@ -389,6 +663,45 @@ def constrain_law( climIn , Yo , keep = "all" , n_mcmc_drawn_min = 5000 , n_mcmc
 ## C0 constraints
 ##===============
 
+def _constraint_C0_bootstrap( clim , Yo ):##{{{
+	"""
+	NSSEA._constraint_C0_bootstrap
+	==============================
+	Bootstrap of the observations Yo and of the factual covariate of clim at
+	the time of Yo. The best estimate is not resampled, and each sample s has
+	its own resampling of the time of Yo, shared by all models. The index of
+	the resampling are drawn in one call, and the bootstrap is built with
+	fancy indexing.
+	
+	Return
+	------
+	Yo_bs : xr.DataArray
+		Bootstrap of Yo, dims ["time","sample"]
+	Xo_bs : xr.DataArray
+		Bootstrap of the covariate, dims ["time","sample","model"]
+	"""
+	n_sample  = clim.n_sample
+	time_Yo   = Yo.index
+	n_time_Yo = Yo.size
+	
+	## One row by sample, drawn in the same order than one draw by sample
+	idx = np.random.choice( n_time_Yo , (n_sample,n_time_Yo) , replace = True ).T
+	Yo_ = np.ravel(Yo.values)
+	XF  = clim.data["X"].loc[time_Yo,:,"F",:].values
+	
+	Yo_bs = np.zeros( (n_time_Yo,n_sample+1) )
+	Xo_bs = np.zeros( (n_time_Yo,n_sample+1,clim.n_model) )
+	Yo_bs[:,0]    = Yo_
+	Xo_bs[:,0,:]  = XF[:,0,:]
+	Yo_bs[:,1:]   = Yo_[idx]
+	Xo_bs[:,1:,:] = XF[idx,np.arange( 1 , n_sample + 1 , 1 ).reshape(1,-1),:]
+	
+	Yo_bs = xr.DataArray( Yo_bs , coords = [time_Yo,clim.sample] , dims = ["time","sample"] )
+	Xo_bs = xr.DataArray( Xo_bs , coords = [time_Yo,clim.sample,clim.model] , dims = ["time","sample","model"] )
+	
+	return Yo_bs,Xo_bs
+##}}}
+
 def constraint_C0_Normal( climIn , Yo , verbose = False ): ##{{{
 	pb = ProgressBar( 4 , "constraint_C0" , verbose )
 	
@@ -407,15 +720,7 @@ def constraint_C0_Normal( climIn , Yo , verbose = False ): ##{{{
 	pb.print()
 	
 	## Bootstrap on Yo
-	Yo_bs = xr.DataArray( np.zeros( (n_time_Yo,n_sample+1) ) , coords = [time_Yo,samples] , dims = ["time","sample"] )
-	Xo_bs = xr.DataArray( np.zeros( (n_time_Yo,n_sample+1,n_model) ) , coords = [time_Yo,samples,models] , dims = ["time","sample","model"] )
-	Yo_bs.loc[:,"BE"] = np.ravel(Yo)
-	Xo_bs.loc[:,"BE",:] = clim.X.loc[time_Yo,"BE","F",:]
-	for s in samples[1:]:
-		idx = np.random.choice( time_Yo , n_time_Yo , replace = True )
-		Yo_bs.loc[:,s] = np.ravel( Yo.loc[idx].values )
-		for m in models:
-			Xo_bs.loc[:,s,m] = clim.X.loc[idx,s,"F",m].values
+	Yo_bs,Xo_bs = _constraint_C0_bootstrap( clim , Yo )
 	pb.print()
 	
 	
@@ -435,7 +740,7 @@ def constraint_C0_Normal( climIn , Yo , verbose = False ): ##{{{
 	pb.print()
 	
 	## Save
-	law_coef.loc["scale1",:,:] = law_coef.loc["scale1",:,:] * climIn.law_coef.loc["scale0",:,:]
+	law_coef.loc["scale1",:,:] = law_coef.loc["scale1",:,:] * climIn.data["law_coef"].loc["scale0",:,:]
 	clim.law_coef.values = law_coef.values
 	
 	pb.end()
@@ -460,15 +765,7 @@ def constraint_C0_Normal_exp( climIn , Yo , verbose = False ): ##{{{
 	pb.print()
 	
 	## Bootstrap on Yo
-	Yo_bs = xr.DataArray( np.zeros( (n_time_Yo,n_sample+1) ) , coords = [time_Yo,samples] , dims = ["time","sample"] )
-	Xo_bs = xr.DataArray( np.zeros( (n_time_Yo,n_sample+1,n_model) ) , coords = [time_Yo,samples,models] , dims = ["time","sample","model"] )
-	Yo_bs.loc[:,"BE"] = np.ravel(Yo)
-	Xo_bs.loc[:,"BE",:] = clim.X.loc[time_Yo,"BE","F",:]
-	for s in samples[1:]:
-		idx = np.random.choice( time_Yo , n_time_Yo , replace = True )
-		Yo_bs.loc[:,s] = np.ravel( Yo.loc[idx].values )
-		for m in models:
-			Xo_bs.loc[:,s,m] = clim.X.loc[idx,s,"F",m].values
+	Yo_bs,Xo_bs = _constraint_C0_bootstrap( clim , Yo )
 	pb.print()
 	
 	
@@ -496,14 +793,156 @@ def constraint_C0_Normal_exp( climIn , Yo , verbose = False ): ##{{{
 ##}}}
 
 
+def _gev_lmoments( Z ):##{{{
+	"""
+	NSSEA._gev_lmoments
+	===================
+	Scale and shape of the GEV fitted by L-moments (Hosking, 1985) on each
+	column of Z (shape (n_time,N)), the shape is clipped in [-0.45,0.45].
+	"""
+	n  = Z.shape[0]
+	Zs = np.sort( Z , axis = 0 )
+	i  = np.arange( 0 , n , 1 ).reshape(-1,1)
+	b0 = np.mean( Zs , axis = 0 )
+	b1 = np.sum( i / ( n - 1 ) * Zs , axis = 0 ) / n
+	b2 = np.sum( i * ( i - 1 ) / ( ( n - 1 ) * ( n - 2 ) ) * Zs , axis = 0 ) / n
+	l2 = 2 * b1 - b0
+	l3 = 6 * b2 - 6 * b1 + b0
+	c  = 2. / ( 3. + l3 / l2 ) - np.log(2) / np.log(3)
+	k  = np.clip( 7.8590 * c + 2.9554 * c**2 , -0.45 , 0.45 )
+	kk = np.where( np.abs(k) < 1e-6 , 1e-6 , k )
+	scale = np.abs( l2 * kk / ( ( 1 - 2**(-kk) ) * scs.gamma( 1 + kk ) ) )
+	return scale,-k
+##}}}
+
+def _gev_nll( Z , scale , shape ):##{{{
+	"""
+	NSSEA._gev_nll
+	==============
+	Negative log-likelihood of GEV(0,scale,shape) of each column of Z, inf
+	outside of the support.
+	"""
+	with np.errstate( all = "ignore" ):
+		nll = - np.sum( GEVKernel().logpdf( Z , 0. , scale , - shape ) , axis = 0 )
+	return np.where( np.isfinite(nll) , nll , np.inf )
+##}}}
+
+def _constraint_C0_GEV_fit( Z , l_scale , l_shape , maxit = 100 , tol = 1e-7 ):##{{{
+	"""
+	NSSEA._constraint_C0_GEV_fit
+	============================
+	Fit of stationary GEV(0,scale,shape) (i.e. with f_loc = 0) on each
+	series Z[:,...], all series are fitted together. The coefficients are in
+	the space of the links (scale = l_scale(coef[0]), shape =
+	l_shape(coef[1])), as sd.GEV().fit( Z[:,...] , f_loc = 0 , l_scale =
+	l_scale , l_shape = l_shape ).
+	
+	The fit is initialized by L-moments, and the negative log-likelihood is
+	minimized by a damped Newton method, vectorized over all series, with
+	derivatives computed by finite differences in the space of the links.
+	The series where this fails (or if a link has no inverse) are fitted
+	with SDFC.
+	
+	Arguments
+	---------
+	Z       : [np.array] Series, shape (n_time,...)
+	l_scale : [SDFC.link] Link of the scale
+	l_shape : [SDFC.link] Link of the shape
+	
+	Return
+	------
+	coef : [np.array] Coefficients, shape (2,...)
+	"""
+	n_time = Z.shape[0]
+	shape_ = Z.shape[1:]
+	Z      = Z.reshape(n_time,-1)
+	N      = Z.shape[1]
+	coef   = np.zeros( (2,N) ) + np.nan
+	failed = np.ones( N , dtype = bool )
+	
+	if hasattr( l_scale , "inverse" ) and hasattr( l_shape , "inverse" ):
+		nll = lambda th,idx : _gev_nll( Z[:,idx] , l_scale(th[0,:]) , l_shape(th[1,:]) )
+		
+		## Initialization, the scale is increased if an observation is
+		## outside of the support
+		scale,shape = _gev_lmoments(Z)
+		scale = np.maximum( scale , 1.1 * np.max( - shape * Z , axis = 0 ) )
+		theta = np.stack( (l_scale.inverse(scale),l_shape.inverse(shape)) )
+		f     = nll( theta , np.arange( 0 , N , 1 ) )
+		
+		## Damped Newton iterations
+		h      = 1e-4
+		active = np.flatnonzero( np.isfinite(f) & np.all( np.isfinite(theta) , axis = 0 ) )
+		failed[active] = False
+		for _ in range(maxit):
+			if active.size == 0:
+				break
+			th = theta[:,active]
+			fa = f[active]
+			fd = { (i,j) : nll( th + h * np.array([[i],[j]]) , active ) for i in [-1,0,1] for j in [-1,0,1] if not i == j == 0 }
+			g  = np.stack( ( fd[(1,0)] - fd[(-1,0)] , fd[(0,1)] - fd[(0,-1)] ) ) / ( 2 * h )
+			Haa = ( fd[(1,0)] - 2 * fa + fd[(-1,0)] ) / h**2
+			Hbb = ( fd[(0,1)] - 2 * fa + fd[(0,-1)] ) / h**2
+			Hab = ( fd[(1,1)] - fd[(1,-1)] - fd[(-1,1)] + fd[(-1,-1)] ) / ( 4 * h**2 )
+			
+			## Regularization of the hessian (Levenberg-Marquardt), to be
+			## definite positive
+			with np.errstate( all = "ignore" ):
+				lmin = ( Haa + Hbb ) / 2 - np.sqrt( ( ( Haa - Hbb ) / 2 )**2 + Hab**2 )
+				mu   = np.where( lmin > 0 , 0 , - lmin ) + 1e-6 * ( 1 + np.abs(Haa) + np.abs(Hbb) )
+				Haa  = Haa + mu
+				Hbb  = Hbb + mu
+				det  = Haa * Hbb - Hab**2
+				step = - np.stack( ( Hbb * g[0,:] - Hab * g[1,:] , Haa * g[1,:] - Hab * g[0,:] ) ) / det
+			
+			## Backtracking, only a decrease of the likelihood is accepted
+			valid = np.all( np.isfinite(g) , axis = 0 ) & np.all( np.isfinite(step) , axis = 0 )
+			accepted = np.zeros( active.size , dtype = bool )
+			alpha = 1.
+			for _ in range(30):
+				todo = np.flatnonzero( valid & ~accepted )
+				if todo.size == 0:
+					break
+				th_new = th[:,todo] + alpha * step[:,todo]
+				f_new  = nll( th_new , active[todo] )
+				better = f_new < fa[todo]
+				theta[:,active[todo[better]]] = th_new[:,better]
+				f[active[todo[better]]]       = f_new[better]
+				accepted[todo[better]]        = True
+				alpha /= 2
+			
+			## Converged: step small, or no decrease found at the minimum up to
+			## the finite differences (small Newton decrement)
+			with np.errstate( all = "ignore" ):
+				decrement = - np.sum( g * step , axis = 0 )
+			small     = np.max( np.abs( step ) , axis = 0 ) < tol
+			stalled   = valid & ~accepted
+			failed[active[ ~valid | ( stalled & ~( decrement < 1e-4 ) ) ]] = True
+			active = active[ valid & accepted & ~small ]
+		failed[active] = True
+		
+		## With shape < -1 the likelihood is not bounded, the minimum is on the
+		## boundary of the support
+		failed |= ~( l_shape(theta[1,:]) > -1 ) | ~np.isfinite( nll( theta , np.arange( 0 , N , 1 ) ) )
+		coef = theta
+	
+	## Fit with SDFC if the batched fit has failed
+	for k in np.flatnonzero(failed):
+		gev = sd.GEV()
+		gev.fit( Z[:,k] , f_loc = 0 , l_scale = l_scale , l_shape = l_shape )
+		coef[:,k] = gev.coef_[:2]
+	
+	return coef.reshape( (2,) + shape_ )
+##}}}
+
 def constraint_C0_GEV( climIn , Yo , verbose = False ): ##{{{
 	
-	pb = ProgressBar( climIn.n_sample * climIn.n_model + 1 , "constraint_C0" , verbose )
+	pb = ProgressBar( 3 , "constraint_C0" , verbose )
 	
 	clim      = climIn.copy()
 	n_model   = clim.n_model
 	n_sample  = clim.n_sample
-	models    = clim.X.model
+	models    = clim.model
 	time      = clim.time
 	time_Yo   = Yo.index
 	n_time_Yo = Yo.size
@@ -513,32 +952,23 @@ def constraint_C0_GEV( climIn , Yo , verbose = False ): ##{{{
 	clim.law_coef.loc["scale1",:,:] = clim.law_coef.loc["scale1",:,:] / clim.law_coef.loc["scale0",:,:]
 	
 	## Bootstrap on Yo
-	Yo_bs = xr.DataArray( np.zeros( (n_time_Yo,n_sample+1) ) , coords = [time_Yo,samples] , dims = ["time","sample"] )
-	Xo_bs = xr.DataArray( np.zeros( (n_time_Yo,n_sample+1,n_model) ) , coords = [time_Yo,samples,models] , dims = ["time","sample","model"] )
-	Yo_bs.loc[:,"BE"] = np.ravel(Yo)
-	Xo_bs.loc[:,"BE",:] = clim.X.loc[time_Yo,"BE","F",:]
-	for s in samples[1:]:
-		idx = np.random.choice( time_Yo , n_time_Yo , replace = True )
-		Yo_bs.loc[:,s] = np.ravel( Yo.loc[idx].values )
-		for m in models:
-			Xo_bs.loc[:,s,m] = clim.X.loc[idx,s,"F",m].values
+	Yo_bs,Xo_bs = _constraint_C0_bootstrap( clim , Yo )
+	pb.print()
 	
 	## Fit loc0
 	clim.law_coef.loc["loc0",:,:] = ( Yo_bs - clim.law_coef.loc["loc1",:,:] * Xo_bs ).quantile( np.exp(-1) , dim = "time" )
 	
 	## Fit scale0 and shape
 	Yo_GEV_stats = ( Yo_bs - clim.law_coef.loc["loc1",:,:] * Xo_bs - clim.law_coef.loc["loc0",:,:]) / ( 1 + clim.law_coef.loc["scale1",:,:] * Xo_bs ) ## Hypothesis : follow GEV(0,scale0,shape)
-	for s in samples:
-		for m in models:
-			gev = sd.GEV()
-			gev.fit( Yo_GEV_stats.loc[:,s,m].values , f_loc = 0 , l_scale = climIn.ns_law.lparams["scale"].link , l_shape = climIn.ns_law.lparams["shape"].link )
-			clim.law_coef.loc["scale0",s,m] = gev.coef_[0]
-			clim.law_coef.loc["shape0",s,m] = gev.coef_[1]
-			pb.print()
+	pb.print()
+	coef = _constraint_C0_GEV_fit( Yo_GEV_stats.transpose("time","sample","model").values , climIn.ns_law.lparams["scale"].link , climIn.ns_law.lparams["shape"].link )
+	clim.law_coef.loc["scale0",:,:] = coef[0,:,:]
+	clim.law_coef.loc["shape0",:,:] = coef[1,:,:]
+	pb.print()
 	
 	
 	## Save
-	clim.law_coef.loc["scale1",:,:] = clim.law_coef.loc["scale1",:,:] * climIn.law_coef.loc["scale0",:,:]
+	clim.law_coef.loc["scale1",:,:] = clim.law_coef.loc["scale1",:,:] * climIn.data["law_coef"].loc["scale0",:,:]
 	
 	pb.end()
 	
@@ -547,40 +977,31 @@ def constraint_C0_GEV( climIn , Yo , verbose = False ): ##{{{
 
 def constraint_C0_GEV_exp( climIn , Yo , verbose = False ): ##{{{
 	
-	pb = ProgressBar( climIn.n_sample * climIn.n_model + 1 , "constraint_C0" , verbose )
+	pb = ProgressBar( 3 , "constraint_C0" , verbose )
 	
 	clim      = climIn.copy()
 	n_model   = clim.n_model
 	n_sample  = clim.n_sample
-	models    = clim.X.model
+	models    = clim.model
 	time      = clim.time
 	time_Yo   = Yo.index
 	n_time_Yo = Yo.size
 	samples   = clim.sample
 	
 	## Bootstrap on Yo
-	Yo_bs = xr.DataArray( np.zeros( (n_time_Yo,n_sample+1) ) , coords = [time_Yo,samples] , dims = ["time","sample"] )
-	Xo_bs = xr.DataArray( np.zeros( (n_time_Yo,n_sample+1,n_model) ) , coords = [time_Yo,samples,models] , dims = ["time","sample","model"] )
-	Yo_bs.loc[:,"BE"] = np.ravel(Yo)
-	Xo_bs.loc[:,"BE",:] = clim.X.loc[time_Yo,"BE","F",:]
-	for s in samples[1:]:
-		idx = np.random.choice( time_Yo , n_time_Yo , replace = True )
-		Yo_bs.loc[:,s] = np.ravel( Yo.loc[idx].values )
-		for m in models:
-			Xo_bs.loc[:,s,m] = clim.X.loc[idx,s,"F",m].values
+	Yo_bs,Xo_bs = _constraint_C0_bootstrap( clim , Yo )
+	pb.print()
 	
 	## Fit loc0
 	clim.law_coef.loc["loc0",:,:] = ( Yo_bs - clim.law_coef.loc["loc1",:,:] * Xo_bs ).quantile( np.exp(-1) , dim = "time" )
 	
 	## Fit scale0 and shape
 	Yo_GEV_stats = ( Yo_bs - clim.law_coef.loc["loc1",:,:] * Xo_bs - clim.law_coef.loc["loc0",:,:]) / np.exp( clim.law_coef.loc["scale1",:,:] * Xo_bs ) ## Hypothesis : follow GEV(0,scale0,shape)
-	for s in samples:
-		for m in models:
-			gev = sd.GEV()
-			gev.fit( Yo_GEV_stats.loc[:,s,m].values , f_loc = 0 , l_scale = clim.ns_law.lparams["scale"].link , l_shape = clim.ns_law.lparams["shape"].link )
-			clim.law_coef.loc["scale0",s,m] = gev.coef_[0]
-			clim.law_coef.loc["shape0",s,m] = gev.coef_[1]
-			pb.print()
+	pb.print()
+	coef = _constraint_C0_GEV_fit( Yo_GEV_stats.transpose("time","sample","model").values , clim.ns_law.lparams["scale"].link , clim.ns_law.lparams["shape"].link )
+	clim.law_coef.loc["scale0",:,:] = coef[0,:,:]
+	clim.law_coef.loc["shape0",:,:] = coef[1,:,:]
+	pb.print()
 	
 	
 	pb.end()
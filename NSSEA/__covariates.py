@@ -89,21 +89,59 @@
 ###############
 
 import os
+import tempfile
 import numpy as np
 import pandas as pd
 import xarray as xr
 import scipy.stats as sc
+import scipy.optimize as sco
 import netCDF4 as nc4
 import pygam as pg
 import statsmodels.gam.api as gamapi
 
 from .__tools import ProgressBar
+from .__tools import pool_map
 
 
 ##########################
 ## Energy Balance Model ##
 ##########################
 
+_EBM_data = {}
+
+def _EBM_data_load( ifile ):##{{{
+	"""
+	NSSEA._EBM_data_load
+	====================
+	Load the parameters and the forcing of the EBM from ifile. The file is
+	read only once by process, the arrays are shared by all NSSEA.EBM and are
+	read-only.
+	
+	Arguments
+	---------
+	ifile : [str] netcdf file of the EBM
+	
+	Return
+	------
+	data : [dict] The cached data of ifile
+	"""
+	if ifile not in _EBM_data:
+		data = {}
+		with nc4.Dataset( ifile , "r" ) as File:
+			data["sigma"]         = np.array(File.variables["ebm_sigmaforcing"][:])
+			data["sigma_names"]   = File.variables["ebm_sigmaforcing"].forcing_name.split( " " )
+			data["model_value"]   = np.array(File.variables["ebm_param"][:])
+			data["model_names"]   = File.variables["ebm_param"].model_name.split(" ")
+			data["model_param"]   = File.variables["ebm_param"].param_name.split(" ")
+			data["forcing"]       = np.array( File.variables["ebm_forcing"][:] )
+			data["forcing_names"] = File.variables["ebm_forcing"].forcing_name.split( " " )
+		for key in data:
+			if isinstance( data[key] , np.ndarray ):
+				data[key].setflags( write = False )
+		_EBM_data[ifile] = data
+	return _EBM_data[ifile]
+##}}}
+
 class EBM: ##{{{
 	"""
 	NSSEA.EBM
@@ -112,6 +150,9 @@ class EBM: ##{{{
 	An EBM model to approximate natural forcing, 13 differents parameters are possible.
 	Note that the param "0" is the mean of output of other samples
 	
+	The parameters and forcing are read once by process (see
+	NSSEA._EBM_data_load), and the 13 trajectories are computed once on all
+	the years of the forcing, draw_sample and predict only index them.
 	"""
 	def __init__( self ):
 		"""
@@ -120,15 +161,40 @@ class EBM: ##{{{
 		self.file_path = os.path.join( os.path.dirname(os.path.realpath(__file__)) , "data" )
 		self.file_EBM = "EBM_param_DA_test.nc"
 		
-		with nc4.Dataset( os.path.join( self.file_path , self.file_EBM ) , "r" ) as File:
-			self.sigma = np.array(File.variables["ebm_sigmaforcing"][:])
-			self.sigma_names = File.variables["ebm_sigmaforcing"].forcing_name.split( " " )
-			self.model_value = np.array(File.variables["ebm_param"][:])
-			self.model_names = File.variables["ebm_param"].model_name.split(" ")
-			self.model_param = File.variables["ebm_param"].param_name.split(" ")
-			self.forcing = np.array( File.variables["ebm_forcing"][:] )
-			self.forcing_names = File.variables["ebm_forcing"].forcing_name.split( " " )
-			self.year = self.forcing[:,0]
+		data = _EBM_data_load( os.path.join( self.file_path , self.file_EBM ) )
+		self.sigma = data["sigma"]
+		self.sigma_names = list(data["sigma_names"])
+		self.model_value = data["model_value"]
+		self.model_names = list(data["model_names"])
+		self.model_param = list(data["model_param"])
+		self.forcing = data["forcing"]
+		self.forcing_names = list(data["forcing_names"])
+		self.year = self.forcing[:,0]
+	
+	@property
+	def _trajectories(self):
+		"""
+		The 13 EBM (the mean and the 12 parameters) on the years of the
+		forcing, shape (year.size,13), computed once by process.
+		"""
+		data = _EBM_data_load( os.path.join( self.file_path , self.file_EBM ) )
+		if "trajectories" not in data:
+			ebm = np.zeros( (self.year.size,13) )
+			ebm[:,1:] = self._hmodel( self.forcing[:,3] , self.model_value[:,3] , self.model_value[:,4] ,  self.model_value[:,1] , self.model_value[:,2] )[:,0,:]
+			ebm[:,0] = np.mean( ebm[:,1:] , axis = 1 )
+			ebm.setflags( write = False )
+			data["trajectories"] = ebm
+		return data["trajectories"]
+	
+	def _year_index( self , t ):
+		"""
+		Index of the years t in the years of the forcing.
+		"""
+		t   = np.array([t]).ravel()
+		idx = np.searchsorted( self.year , t ).clip( 0 , self.year.size - 1 )
+		if not np.all( self.year[idx] == t ):
+			raise ValueError( "NSSEA.EBM: years of t must be years of the forcing" )
+		return idx
 	
 	def draw_sample( self , t , n_sample , fix_first = None ):
 		"""
@@ -148,9 +214,7 @@ class EBM: ##{{{
 		out      : np.array[ shape = (time.size,n_sample) ]
 			EBM computed
 		"""
-		ebm = np.zeros( (t.size,13) )
-		ebm[:,1:] = self.predict( t , range(12) )
-		ebm[:,0] = np.mean( ebm[:,1:] , axis = 1 )
+		ebm = self._trajectories[self._year_index(t),:]
 		sample = np.random.choice( 13 , n_sample , replace = True )
 		out = ebm[:,sample]
 		if fix_first is not None:
@@ -174,26 +238,30 @@ class EBM: ##{{{
 			EBM computed
 		"""
 		I = np.array([I]).ravel()
-		res = np.zeros( (t.size,I.size) )
-		for i in range(I.size):
-			res[:,i] = self._make_predict(t,I[i])
+		res = self._make_predict( t , I )
 		if I.size == 1:
 			res = np.ravel(res)
 		return res
 	
 	
-	def _make_predict( self , t , i ):
-		res = self._hmodel( self.forcing[:,3] , self.model_value[i,3] , self.model_value[i,4] ,  self.model_value[i,1] , self.model_value[i,2] )
-		output = np.zeros( (t.size) )
-		for j,dt in enumerate(t):
-			output[j] = res[np.argwhere( dt == self.year ).ravel(),0]
-		return output
+	def _make_predict( self , t , I ):
+		"""
+		EBM of the parameters I (array of integer) at the years t, indexed in
+		the trajectories. Return an array of shape (t.size,I.size).
+		"""
+		return self._trajectories[:,1:][np.ix_(self._year_index(t),I)]
 	
 	
 	def _hmodel( self , forcing , c , c0 , lamb , gamm ):
+		"""
+		Two boxes model, the parameters c, c0, lamb and gamm can be arrays
+		(of the same shape), then all the models are computed together.
+		Return an array of shape (forcing.size,3) + c.shape.
+		"""
+		c,c0,lamb,gamm = np.broadcast_arrays( c , c0 , lamb , gamm )
 		N = forcing.size
 		dt = 1.
-		res = np.zeros( (N+1,3) )
+		res = np.zeros( (N+1,3) + c.shape )
 		
 		for i in range(2,N+1):
 			res[i,0] = res[i-1,0] + (dt / c) * ( forcing[i-1] - lamb * res[i-1,0] - gamm * ( res[i-1,0] - res[i-1,1] ) )
@@ -209,6 +277,16 @@ class EBM: ##{{{
 #####################################################
 
 class GAM_FC:##{{{
+	"""
+	NSSEA.GAM_FC
+	============
+	GAM model X ~ 1 + spline(time) + XN (with pygam), the penalty lam (and if
+	necessary the number of splines) is chosen such that the effective degree
+	of freedom is dof. The penalty depends only on the design (time and XN),
+	so it can be solved once (GAM_FC.find_lam) and given to GAM_FC.fit for all
+	models sharing the same time axis, as NSSEA.covariates_FC_GAM does.
+	"""
+	
 	def __init__( self , dof ):
 		self.dof   = dof
 		self.tol   = 1e-2
@@ -230,28 +308,60 @@ class GAM_FC:##{{{
 	def cov_(self):
 		return self.model.statistics_["cov"]
 	
-	def fit( self , X , Y ):
-		lam_up    = 1e2
+	def _build_model( self , n_splines , lam ):
+		return pg.LinearGAM( pg.s( 0 , n_splines = n_splines , penalties = "auto" , lam = lam ) + pg.l( 1 , penalties = None ) )
+	
+	def _edof_eigen( self , X , Y , n_splines ):
+		"""
+		The effective degree of freedom of the model fitted with a penalty
+		lam is edof(lam) = sum( d / (1 + lam * mu) ), where mu are the
+		generalized eigenvalues of the penalty matrix (for lam = 1) relative to
+		B^T B + sqrt(eps) I (B the design matrix, sqrt(eps) I the
+		regularization of pygam). Return mu and d.
+		"""
+		model = self._build_model( n_splines , 1. )
+		model.fit( X , Y )
+		B  = model._modelmat(X).toarray()
+		A  = B.T @ B
+		P  = model._P().toarray()
+		L  = np.linalg.cholesky( A + np.sqrt(np.finfo(float).eps) * np.identity(A.shape[0]) )
+		Li = np.linalg.inv(L)
+		mu,V = np.linalg.eigh( Li @ P @ Li.T )
+		d  = np.diag( V.T @ Li @ A @ Li.T @ V )
+		return np.where( mu > 0 , mu , 0 ),d
+	
+	def find_lam( self , X , Y ):
+		"""
+		Find the number of splines and the penalty lam (between 1e-2 and 1e2)
+		such that edof = dof, the number of splines is increased while dof
+		can not be reached. Return (n_splines,lam).
+		"""
 		lam_lo    = 1e-2
-		diff      = 1. + self.tol
+		lam_up    = 1e2
 		n_splines = int(self.dof + 2)
-		nit       = 0
-		while diff > self.tol:
-			lam = ( lam_up + lam_lo ) / 2.
-			
-			self.model = pg.LinearGAM( pg.s( 0 , n_splines = n_splines , penalties = "auto" , lam = lam ) + pg.l( 1 , penalties = None ) )
-			self.model.fit( X , Y )
-			
-			if self.edof < self.dof:
-				lam_up = lam
-			else:
-				lam_lo = lam
-			diff = np.abs( self.dof - self.edof )
-			nit += 1
-			if nit % 100 == 0:
-				lam_up    = 1e2
-				lam_lo    = 1e-2
-				n_splines += 1
+		while True:
+			mu,d = self._edof_eigen( X , Y , n_splines )
+			fct_to_root = lambda loglam : np.sum( d / ( 1. + np.exp(loglam) * mu ) ) - self.dof
+			f_lo = fct_to_root(np.log(lam_lo))
+			f_up = fct_to_root(np.log(lam_up))
+			if np.abs(f_lo) < self.tol:
+				return n_splines,lam_lo
+			if np.abs(f_up) < self.tol:
+				return n_splines,lam_up
+			if f_lo > 0 and f_up < 0:
+				return n_splines,np.exp( sco.brentq( fct_to_root , np.log(lam_lo) , np.log(lam_up) ) )
+			if f_up > 0:
+				raise ValueError( "NSSEA.GAM_FC: dof = {} is too small for lam <= {}".format(self.dof,lam_up) )
+			n_splines += 1
+	
+	def fit( self , X , Y , lam = None ):
+		"""
+		Fit the model, lam is (n_splines,lam) given by GAM_FC.find_lam for
+		the design X, solved if None.
+		"""
+		n_splines,lam = self.find_lam( X , Y ) if lam is None else lam
+		self.model = self._build_model( n_splines , lam )
+		self.model.fit( X , Y )
 	
 	def predict( self , X ):
 		return self.model.predict(X)
@@ -261,7 +371,152 @@ class GAM_FC:##{{{
 
 ##}}}
 
-def covariates_FC_GAM( clim , lX , XN , dof = 7 , method = "pygam" , verbose = False ):##{{{
+class PSpline_FC:##{{{
+	"""
+	NSSEA.PSpline_FC
+	================
+	Penalized B-splines (P-splines) model X ~ spline(time) + XN, fitted by
+	penalized least squares for many models sharing the same time axis and
+	natural forcing (the columns of Y) at once. The spline term is a cubic
+	B-spline basis on equally spaced knots (the constant is in the basis)
+	with a second order difference penalty lam, the linear term XN is not
+	penalized.
+	
+	The penalty is chosen such that the effective degree of freedom is dof
+	(the same lam for all models, the number of splines is increased while
+	dof can not be reached), or by generalized cross validation for each
+	model if dof is "GCV". All lam are solved with the eigendecomposition of
+	the penalty relative to M^T M (M the design matrix), computed once.
+	
+	Attributes (after fit)
+	----------------------
+	coef_ : np.array, shape (n_models,n_splines+1), last coef is XN
+	cov_  : np.array, shape (n_models,n_splines+1,n_splines+1), the bayesian
+	        covariance scale * (M^T M + lam P)^-1
+	lam_  : np.array, shape (n_models,)
+	edof_ : np.array, shape (n_models,)
+	"""
+	
+	def __init__( self , dof , n_splines = None , degree = 3 ):
+		self.dof       = dof
+		self.n_splines = n_splines
+		self.degree    = degree
+		self.knots     = None
+		self.coef_     = None
+		self.cov_      = None
+		self.lam_      = None
+		self.edof_     = None
+	
+	def _set_knots( self , t , n_splines ):
+		n_inter    = n_splines - self.degree
+		h          = ( t.max() - t.min() ) / n_inter
+		self.knots = t.min() + h * np.arange( -self.degree , n_inter + self.degree + 1 )
+	
+	def _basis( self , t , degree ):
+		"""
+		B-spline basis of degree (Cox-de Boor recursion) at t, shape
+		(t.size,knots.size - degree - 1).
+		"""
+		t = np.asarray(t,dtype=float).reshape(-1,1)
+		k = self.knots
+		B = ( ( t >= k[:-1] ) & ( t < k[1:] ) ).astype(float)
+		for d in range(1,degree+1):
+			B = ( t - k[:-(d+1)] ) / ( k[d:-1] - k[:-(d+1)] ) * B[:,:-1] + ( k[(d+1):] - t ) / ( k[(d+1):] - k[1:-d] ) * B[:,1:]
+		return B
+	
+	def basis( self , t ):
+		"""
+		Cubic B-spline basis at t, shape (t.size,n_splines). Outside the
+		range of the time axis fitted, the basis is extrapolated linearly
+		from its value and derivative at the boundary, as pygam does.
+		"""
+		t   = np.asarray(t,dtype=float).ravel()
+		k   = self.knots
+		p   = self.degree
+		tc  = np.clip( t , k[p] , k[-(p+1)] )
+		B   = self._basis( tc , p )
+		out = t != tc
+		if np.any(out):
+			Bm = self._basis( tc[out] , p - 1 )
+			dB = p * ( Bm[:,:-1] / ( k[p:-1] - k[:-(p+1)] ) - Bm[:,1:] / ( k[(p+1):] - k[1:-p] ) )
+			B[out,:] += ( t[out] - tc[out] ).reshape(-1,1) * dB
+		return B
+	
+	def design( self , t , xn ):
+		return np.hstack( (self.basis(t),np.asarray(xn,dtype=float).reshape(-1,1)) )
+	
+	def _eigen( self , t , xn , n_splines ):
+		"""
+		Cholesky factor L of M^T M + sqrt(eps) I, and eigendecomposition
+		L^-1 P L^-T = V diag(mu) V^T. Return M, W = L^-T V, mu and d such
+		that edof(lam) = sum( d / (1 + lam * mu) ).
+		"""
+		self._set_knots( t , n_splines )
+		M  = self.design( t , xn )
+		A  = M.T @ M
+		D  = np.diff( np.identity(n_splines) , n = 2 , axis = 0 )
+		P  = np.zeros_like(A)
+		P[:n_splines,:n_splines] = D.T @ D
+		L  = np.linalg.cholesky( A + np.sqrt(np.finfo(float).eps) * np.identity(A.shape[0]) )
+		Li = np.linalg.inv(L)
+		mu,V = np.linalg.eigh( Li @ P @ Li.T )
+		mu = np.where( mu > 0 , mu , 0 )
+		W  = Li.T @ V
+		d  = np.diag( W.T @ A @ W )
+		return M,W,mu,d
+	
+	def fit( self , t , xn , Y ):
+		"""
+		Fit the models, t and xn of shape (n_time,), Y of shape
+		(n_time,n_models).
+		"""
+		t  = np.asarray(t,dtype=float).ravel()
+		xn = np.asarray(xn,dtype=float).ravel()
+		Y  = np.asarray(Y,dtype=float).reshape(t.size,-1)
+		n_time,n_models = Y.shape
+		loglam_lo,loglam_up = -15.,25.
+		
+		if self.dof == "GCV":
+			n_splines = self.n_splines if self.n_splines is not None else min( 20 , n_time // 2 )
+			M,W,mu,d = self._eigen( t , xn , n_splines )
+			MW = M @ W
+			z  = MW.T @ Y
+			l_loglam = np.linspace( loglam_lo , loglam_up , 401 )
+			gcv = np.zeros( (l_loglam.size,n_models) )
+			for i,loglam in enumerate(l_loglam):
+				shrink = 1. / ( 1. + np.exp(loglam) * mu )
+				rss    = np.sum( ( Y - MW @ ( shrink.reshape(-1,1) * z ) )**2 , axis = 0 )
+				gcv[i,:] = n_time * rss / ( n_time - np.sum( d * shrink ) )**2
+			lam = np.exp( l_loglam[np.argmin( gcv , axis = 0 )] )
+		else:
+			n_splines = self.n_splines if self.n_splines is not None else int(self.dof + 2)
+			while True:
+				M,W,mu,d = self._eigen( t , xn , n_splines )
+				fct_to_root = lambda loglam : np.sum( d / ( 1. + np.exp(loglam) * mu ) ) - self.dof
+				if fct_to_root(loglam_up) > 0:
+					raise ValueError( "NSSEA.PSpline_FC: dof = {} is lower than the degree of freedom of the unpenalized terms".format(self.dof) )
+				if fct_to_root(loglam_lo) > 0:
+					break
+				n_splines += 1
+			lam = np.zeros(n_models) + np.exp( sco.brentq( fct_to_root , loglam_lo , loglam_up ) )
+			MW = M @ W
+			z  = MW.T @ Y
+		
+		## Coefficients and covariance
+		shrink     = 1. / ( 1. + lam.reshape(1,-1) * mu.reshape(-1,1) )
+		self.coef_ = ( W @ ( shrink * z ) ).T
+		self.lam_  = lam
+		self.edof_ = np.sum( d.reshape(-1,1) * shrink , axis = 0 )
+		rss        = np.sum( ( Y - M @ self.coef_.T )**2 , axis = 0 )
+		scale      = rss / ( n_time - self.edof_ )
+		self.cov_  = np.einsum( "ik,km,jk->mij" , W , shrink * scale.reshape(1,-1) , W )
+	
+	def predict( self , t , xn ):
+		return self.design( t , xn ) @ self.coef_.T
+
+##}}}
+
+def covariates_FC_GAM( clim , lX , XN , dof = 7 , method = "pygam" , n_jobs = 1 , executor = None , seed = None , verbose = False ):##{{{
 	"""
 	NSSEA.covariates_FC_GAM
 	=======================
@@ -286,23 +541,27 @@ def covariates_FC_GAM( clim , lX , XN , dof = 7 , method = "pygam" , verbose = F
 	XN   : [pandas.DataFrame] Natural forcing.
 	dof  : [integer] Degree of freedom
 	method : [str] "statsmodels" or "pygam", select the package used to solve
-	         GAM model
+	         GAM model, or "native" (NSSEA.PSpline_FC, penalized B-splines,
+	         all models sharing the same time axis are fitted together). With
+	         the native method, dof can be "GCV": the penalty of each model
+	         is then chosen by generalized cross validation
+	n_jobs : [integer] Number of process used, the models are decomposed in a
+	         pool of n_jobs process. Default is 1 (serial). The process write
+	         their decomposition in an array shared through a temporary file
+	         (np.memmap), so it is not sent back to the main process.
+	executor : [concurrent.futures.Executor or None] An executor used instead
+	           of a new pool of n_jobs process, it must run on this machine
+	           (the temporary file is shared)
+	seed : [integer or None] Seed of the GAM coefficients drawn. Each model has
+	       its own random generator derived from (seed,model), so results are
+	       reproducible whatever n_jobs. If None, the seed is drawn from
+	       np.random. If clim.checkpoint is set and the seed is given, the
+	       decomposition of each model is saved, and the models already
+	       decomposed with the same inputs and seed are not decomposed again.
+	       If clim.cache is set and the seed is given, the covariates are read
+	       in the cache if they have already been computed.
 	verbose : [bool] If we print the progress of the fit or not.
 	
-	"""
-	if method == "pygam":
-		return _covariates_FC_GAM_pygam( clim , lX , XN , dof , verbose )
-	else:
-		return _covariates_FC_GAM_statsmodels( clim , lX , XN , dof , verbose )
-##}}}
-
-def _covariates_FC_GAM_pygam( clim , lX , XN , dof = 7 , verbose = False ):##{{{
-	"""
-	NSSEA.covariates_FC_GAM_pygam
-	=============================
-	
-	Same parameters that NSSEA.covariates_FC_GAM, use pygam package.
-	
 	"""
 	## Parameters
 	models   = clim.model
@@ -312,110 +571,227 @@ def _covariates_FC_GAM_pygam( clim , lX , XN , dof = 7 , verbose = False ):##{{{
 	samples  = clim.sample
 	n_sample = clim.n_sample
 	
-	## verbose
-	pb = ProgressBar( n_model * n_sample , "covariates_FC_GAM" , verbose )
-	
-	## Define output
-	dX = xr.DataArray( np.zeros( (n_time,n_sample + 1,2,n_model) ) , coords = [time , samples , ["F","C"] , models ] , dims = ["time","sample","forcing","model"] )
-	
-	## Define others prediction variables
-	time_C   = np.repeat( time[0] , n_time )
+	ckpt   = None
+	inputs = None
+	if seed is None:
+		seed = np.random.randint( 2**31 )
+	else:
+		inputs = [ lX , XN , time , models , n_sample , dof , method , int(seed) ]
+		ckpt   = clim._checkpoint( "covariates_FC_GAM" , *inputs )
+	
+	## Already computed
+	cached = clim._cache_get( "covariates_FC_GAM" , inputs )
+	if cached is not None:
+		clim.X = xr.DataArray( cached["X"] , coords = [time , samples , ["F","C"] , models ] , dims = ["time","sample","forcing","model"] )
+		clim._set_inputs( "X" , "covariates_FC_GAM" , inputs )
+		return clim
+	
+	## Models already decomposed
+	dX   = np.zeros( (n_time,n_sample + 1,2,n_model) )
+	done = np.zeros( n_model , dtype = bool )
+	if ckpt is not None:
+		for name in ckpt.names():
+			block = ckpt.load(name)
+			dX[:,:,:,block["index"]] = block["dX"]
+			done[block["index"]] = True
+	
+	## One decomposition by model (or by group of models sharing the same time
+	## axis for the native method), written in a preallocated array
+	i_model = [ list(models).index(X.columns[0]) for X in lX ]
+	if method == "native":
+		groups = {}
+		for X,i in zip(lX,i_model):
+			groups.setdefault( tuple(X.index) , [] ).append( (X,i) )
+		fct     = _covariates_FC_GAM_native
+		l_index = [ [ i for _,i in g ] for g in groups.values() ]
+		l_args  = [ ([ X for X,_ in g ],XN,time,n_sample,dof,[ [int(seed),i] for _,i in g ]) for g in groups.values() ]
+	else:
+		fct     = _covariates_FC_GAM_pygam if method == "pygam" else _covariates_FC_GAM_statsmodels
+		l_index = [ [i] for i in i_model ]
+		l_args  = [ (X,XN,time,n_sample,dof,[int(seed),i]) for X,i in zip(lX,i_model) ]
+	l_todo  = [ k for k,index in enumerate(l_index) if not done[index].all() ]
+	l_index = [ l_index[k] for k in l_todo ]
+	l_args  = [ l_args[k]  for k in l_todo ]
+	
+	## With pygam, the penalty is solved here once by time axis, and given to
+	## the decomposition of each model
+	if method == "pygam":
+		l_lam = {}
+		for k,args in enumerate(l_args):
+			X = args[0]
+			if tuple(X.index) not in l_lam:
+				l_lam[tuple(X.index)] = GAM_FC( dof ).find_lam( np.stack( (X.index,XN.loc[X.index,0].values) , -1 ) , X.values )
+			l_args[k] = args + (l_lam[tuple(X.index)],)
 	
-	## Main loop
-	for X in lX:
-		model = X.columns[0]
-		
-		xn = XN.values[:,0]
-		XF = np.stack( (time  ,xn) , -1 )
-		XC = np.stack( (time_C,xn) , -1 )
-		
-		## GAM decomposition
-		gam_model = GAM_FC( dof )
-		gam_model.fit( np.stack( (X.index,XN.loc[X.index,0].values) , -1 ) , X.values )
-		
-		## prediction
-		dX.loc[:,"BE","F",model] = gam_model.predict( XF )
-		dX.loc[:,"BE","C",model] = gam_model.predict( XC )
-		
-		## Distribution of GAM coefficients
-		gam_law = gam_model.error_distribution()
-		coefs_  = gam_law.rvs(n_sample)
-		
-		for i,s in enumerate(samples[1:]):
-			pb.print()
-			
-			xn = XN.values[:,i+1]
-			XF = np.stack( (time  ,xn) , -1 )
-			XC = np.stack( (time_C,xn) , -1 )
-			
-			## Perturbation
-			gam_model.coef_ = coefs_[i,:]
-			
-			## Final decomposition
-			dX.loc[:,s,"F",model] = gam_model.predict( XF )
-			dX.loc[:,s,"C",model] = gam_model.predict( XC )
-	
-	clim.X = dX
+	## verbose
+	pb = ProgressBar( sum( len(index) for index in l_index ) , "covariates_FC_GAM" , verbose )
+	
+	## With a pool, the workers write their decomposition in an array shared
+	## through a temporary file (np.memmap), instead of sending it back
+	with tempfile.TemporaryDirectory() as tmp:
+		if executor is not None or ( n_jobs is not None and ( n_jobs > 1 or n_jobs < 0 ) ):
+			path    = os.path.join( tmp , "dX.dat" )
+			dXs     = np.memmap( path , dtype = float , mode = "w+" , shape = dX.shape )
+			l_args  = [ (fct,args,path,dX.shape,index) for args,index in zip(l_args,l_index) ]
+			results = ( (index,dXs[:,:,:,index]) for index in pool_map( _covariates_FC_GAM_shared , l_args , n_jobs , executor ) )
+		else:
+			results = zip( l_index , map( fct , l_args ) )
+		for index,dXm in results:
+			dX[:,:,:,index] = dXm.reshape( n_time , n_sample + 1 , 2 , len(index) )
+			if ckpt is not None:
+				ckpt.save( index = np.array(index) , dX = dX[:,:,:,index] )
+			for _ in index:
+				pb.print()
+		dXs = results = None
+	
+	clim.X = xr.DataArray( dX , coords = [time , samples , ["F","C"] , models ] , dims = ["time","sample","forcing","model"] )
+	clim._cache_put( "covariates_FC_GAM" , inputs , X = dX )
+	clim._set_inputs( "X" , "covariates_FC_GAM" , inputs )
 	pb.end()
 	return clim
 ##}}}
 
-def _covariates_FC_GAM_statsmodels( clim , lX , XN , dof = 7 , verbose = False ):##{{{
+def _covariates_FC_GAM_shared( args ):##{{{
 	"""
-	NSSEA.covariates_FC_GAM_statsmodels
-	===================================
+	NSSEA._covariates_FC_GAM_shared
+	===============================
 	
-	Same parameters that NSSEA.covariates_FC_GAM, use statsmodels package.
+	Worker of NSSEA.covariates_FC_GAM in a pool. args is
+	(fct,fct_args,path,shape,index): the decomposition fct(fct_args) of the
+	models index is written in the array of shape shape shared through the
+	file path (np.memmap), and only index is returned.
 	
 	"""
-	## Parameters
-	models   = clim.model
-	time     = clim.time
-	n_model  = clim.n_model
-	n_time   = clim.n_time
-	samples  = clim.sample
-	n_sample = clim.n_sample
+	fct,fct_args,path,shape,index = args
+	dXm = fct(fct_args)
+	dX  = np.memmap( path , dtype = float , mode = "r+" , shape = shape )
+	dX[:,:,:,index] = dXm.reshape( shape[:3] + (len(index),) )
+	dX.flush()
+	del dX
+	return index
+##}}}
+
+def _covariates_FC_GAM_pygam( args ):##{{{
+	"""
+	NSSEA._covariates_FC_GAM_pygam
+	==============================
 	
-	## verbose
-	pb = ProgressBar( n_model , "covariates_FC_GAM" , verbose )
+	Decomposition of one model for NSSEA.covariates_FC_GAM, use pygam package.
+	args is (X,XN,time,n_sample,dof,seed,lam), lam the penalty of the time
+	axis of X (see GAM_FC.find_lam), return an array of shape
+	(time.size,n_sample+1,2) (factual and counter factual).
 	
-	## Define output
-	dX = xr.DataArray( np.zeros( (n_time,n_sample + 1,2,n_model) ) , coords = [time , samples , ["F","C"] , models ] , dims = ["time","sample","forcing","model"] )
+	"""
+	X,XN,time,n_sample,dof,seed,lam = args
+	rng    = np.random.default_rng(seed)
+	n_time = time.size
 	
-	## Main loop
-	for X in lX:
-		pb.print()
-		
-		## All data in a dataframe
-		model = X.columns[0]
-		Xg    = X.groupby(np.int).aggregate(np.mean)
-		dataf = pd.DataFrame( np.array([Xg.index,np.repeat(Xg.index[0],Xg.size),XN.loc[Xg.index,0].values.squeeze(),Xg.values.squeeze()]).T , columns = ["timeF","timeC","XN","X"] )
-		
-		## Define GAM model and fit
-		bs      = gamapi.BSplines( dataf["timeF"] , df = dof - 1 , degree = 3 )
-		gam_bs  = gamapi.GLMGam.from_formula( "X ~ 1 + XN" , data = dataf , smoother = bs )
-		
-		res_fit = gam_bs.fit()
-		alpha,_,_ = gam_bs.select_penweight()
-		gam_bs  = gamapi.GLMGam.from_formula( 'X ~ 1 + ebm' , data = dataf , smoother = bs , alpha = alpha )
-		res_fit = gam_bs.fit()
-		
-		## Build design matrices and coefs
-		timeF   = np.unique(dataf.timeF.values)
-		timeC   = np.repeat( timeF[0] , timeF.size )
-		designF = np.hstack( (np.ones((timeF.size,1)),dataf["XN"].values.reshape(-1,1),gam_bs.smoother.transform(timeF)) )
-		designC = np.hstack( (np.ones((timeF.size,1)),dataf["XN"].values.reshape(-1,1),gam_bs.smoother.transform(timeC)) )
-		coef_   = res_fit.params.values
-		cov_    = res_fit.cov_params().values
-		coefs   = np.vstack( ( coef_ , np.random.multivariate_normal( mean = coef_ , cov = cov_ , size = n_sample ) ) )
-		
-		dX.loc[:,:,"F",model] = designF @ coefs.T
-		dX.loc[:,:,"C",model] = designC @ coefs.T
-		
+	## Define others prediction variables, the natural forcing is only in the
+	## linear term, so the design matrices are built with XN = 0 and XN = 1,
+	## and the predictions are D0 @ coefs.T + XN * ( (D1 - D0) @ coefs.T )
+	time_C   = np.repeat( time[0] , n_time )
+	xn0      = np.zeros(n_time)
+	xn1      = np.ones(n_time)
+	XN_      = XN.values[:,:(n_sample+1)]
+	
+	## GAM decomposition
+	gam_model = GAM_FC( dof )
+	gam_model.fit( np.stack( (X.index,XN.loc[X.index,0].values) , -1 ) , X.values , lam = lam )
+	
+	## Distribution of GAM coefficients, the first is the best estimate
+	gam_law = gam_model.error_distribution()
+	coefs   = np.vstack( (gam_model.coef_,gam_law.rvs( n_sample , random_state = rng ).reshape(n_sample,-1)) )
+	
+	## Design matrices
+	DF0 = gam_model.model._modelmat( np.stack( (time  ,xn0) , -1 ) ).toarray()
+	DF1 = gam_model.model._modelmat( np.stack( (time  ,xn1) , -1 ) ).toarray()
+	DC0 = gam_model.model._modelmat( np.stack( (time_C,xn0) , -1 ) ).toarray()
+	DC1 = gam_model.model._modelmat( np.stack( (time_C,xn1) , -1 ) ).toarray()
+	
+	## Final decomposition
+	dX = np.zeros( (n_time,n_sample + 1,2) )
+	dX[:,:,0] = DF0 @ coefs.T + XN_ * ( (DF1 - DF0) @ coefs.T )
+	dX[:,:,1] = DC0 @ coefs.T + XN_ * ( (DC1 - DC0) @ coefs.T )
+	
+	return dX
+##}}}
+
+def _covariates_FC_GAM_statsmodels( args ):##{{{
+	"""
+	NSSEA._covariates_FC_GAM_statsmodels
+	====================================
 	
-	clim.X = dX
-	pb.end()
-	return clim
+	Decomposition of one model for NSSEA.covariates_FC_GAM, use statsmodels
+	package. args is (X,XN,time,n_sample,dof,seed), return an array of shape
+	(time.size,n_sample+1,2) (factual and counter factual).
+	
+	"""
+	X,XN,time,n_sample,dof,seed = args
+	rng = np.random.default_rng(seed)
+	
+	## All data in a dataframe
+	Xg    = X.groupby(int).aggregate(np.mean)
+	dataf = pd.DataFrame( np.array([Xg.index,np.repeat(Xg.index[0],Xg.size),XN.loc[Xg.index,0].values.squeeze(),Xg.values.squeeze()]).T , columns = ["timeF","timeC","XN","X"] )
+	
+	## Define GAM model and fit
+	bs      = gamapi.BSplines( dataf["timeF"] , df = dof - 1 , degree = 3 )
+	gam_bs  = gamapi.GLMGam.from_formula( "X ~ 1 + XN" , data = dataf , smoother = bs )
+	
+	res_fit = gam_bs.fit()
+	alpha,_,_ = gam_bs.select_penweight()
+	gam_bs  = gamapi.GLMGam.from_formula( "X ~ 1 + XN" , data = dataf , smoother = bs , alpha = alpha )
+	res_fit = gam_bs.fit()
+	
+	## Build design matrices and coefs
+	timeF   = np.unique(dataf.timeF.values)
+	timeC   = np.repeat( timeF[0] , timeF.size )
+	designF = np.hstack( (np.ones((timeF.size,1)),dataf["XN"].values.reshape(-1,1),gam_bs.smoother.transform(timeF)) )
+	designC = np.hstack( (np.ones((timeF.size,1)),dataf["XN"].values.reshape(-1,1),gam_bs.smoother.transform(timeC)) )
+	coef_   = res_fit.params.values
+	cov_    = res_fit.cov_params().values
+	coefs   = np.vstack( ( coef_ , rng.multivariate_normal( mean = coef_ , cov = cov_ , size = n_sample ) ) )
+	
+	dX = np.zeros( (timeF.size,n_sample + 1,2) )
+	dX[:,:,0] = designF @ coefs.T
+	dX[:,:,1] = designC @ coefs.T
+	
+	return dX
 ##}}}
 
+def _covariates_FC_GAM_native( args ):##{{{
+	"""
+	NSSEA._covariates_FC_GAM_native
+	===============================
+	
+	Decomposition of a group of models sharing the same time axis for
+	NSSEA.covariates_FC_GAM, use NSSEA.PSpline_FC. args is
+	(lX,XN,time,n_sample,dof,l_seed), return an array of shape
+	(time.size,n_sample+1,2,len(lX)) (factual and counter factual).
+	
+	"""
+	lX,XN,time,n_sample,dof,l_seed = args
+	n_time   = time.size
+	n_models = len(lX)
+	tX       = lX[0].index.values
+	
+	## Fit of all models
+	gam_model = PSpline_FC( dof )
+	gam_model.fit( tX , XN.loc[tX,0].values , np.hstack( [ X.values.reshape(-1,1) for X in lX ] ) )
+	
+	## Coefficients, the first is the best estimate, the others are drawn
+	## with a generator by model
+	Z     = np.array( [ np.random.default_rng(seed).normal( size = (n_sample,gam_model.coef_.shape[1]) ) for seed in l_seed ] )
+	coefs = np.concatenate( ( gam_model.coef_.reshape(n_models,1,-1) , gam_model.coef_.reshape(n_models,1,-1) + np.einsum( "mij,msj->msi" , np.linalg.cholesky(gam_model.cov_) , Z ) ) , axis = 1 )
+	
+	## Predictions, the natural forcing is the last coefficient
+	BF  = gam_model.basis( time )
+	BC  = gam_model.basis( np.repeat( time[0] , n_time ) )
+	XNc = XN.values[:,:(n_sample+1)].reshape(n_time,-1,1) * coefs[:,:,-1].T.reshape(1,-1,n_models)
+	
+	dX = np.zeros( (n_time,n_sample + 1,2,n_models) )
+	dX[:,:,0,:] = np.einsum( "ti,msi->tsm" , BF , coefs[:,:,:-1] ) + XNc
+	dX[:,:,1,:] = np.einsum( "ti,msi->tsm" , BC , coefs[:,:,:-1] ) + XNc
+	
+	return dX
+##}}}
 
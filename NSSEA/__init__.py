@@ -94,6 +94,8 @@ __version__ = "0.4.0a11"
 
 ## Tools
 from .__tools import ProgressBar
+from .__checkpoint import Checkpoint
+from .__checkpoint import StageCache
 
 
 ## Variables
@@ -123,6 +125,8 @@ from .__nsstats     import add_bias
 ## Constraints
 from .__constraints import constrain_covariate
 from .__constraints import constrain_law
+from .__mcmc        import ensemble_mcmc
+from .__mcmc        import adaptive_mcmc
 from .__constraints import constraint_C0
 
 
@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+
+##################################################################################
+##################################################################################
+##                                                                              ##
+## Copyright Yoann Robin, 2020                                                  ##
+##                                                                              ##
+## yoann.robin.k@gmail.com                                                      ##
+##                                                                              ##
+## This software is a computer program that is part of the NSSEA                ##
+## (Non-Stationary Statistics for Extreme Attribution) This library makes it    ##
+## possible to infer the probability of an (extreme) event in the factual /     ##
+## counter-factual world (without anthropic forcing) to attribute it to climate ##
+## change.                                                                      ##
+##                                                                              ##
+## This software is governed by the CeCILL-C license under French law and       ##
+## abiding by the rules of distribution of free software.  You can  use,        ##
+## modify and/ or redistribute the software under the terms of the CeCILL-C     ##
+## license as circulated by CEA, CNRS and INRIA at the following URL            ##
+## "http://www.cecill.info".                                                    ##
+##                                                                              ##
+## As a counterpart to the access to the source code and  rights to copy,       ##
+## modify and redistribute granted by the license, users are provided only      ##
+## with a limited warranty  and the software's author,  the holder of the       ##
+## economic rights,  and the successive licensors  have only  limited           ##
+## liability.                                                                   ##
+##                                                                              ##
+## In this respect, the user's attention is drawn to the risks associated       ##
+## with loading,  using,  modifying and/or developing or reproducing the        ##
+## software by the user in light of its specific status of free software,       ##
+## that may mean  that it is complicated to manipulate,  and  that  also        ##
+## therefore means  that it is reserved for developers  and  experienced        ##
+## professionals having in-depth computer knowledge. Users are therefore        ##
+## encouraged to load and test the software's suitability as regards their      ##
+## requirements in conditions enabling the security of their systems and/or     ##
+## data to be ensured and,  more generally, to use and operate it in the        ##
+## same conditions as regards security.                                         ##
+##                                                                              ##
+## The fact that you are presently reading this means that you have had         ##
+## knowledge of the CeCILL-C license and that you accept its terms.             ##
+##                                                                              ##
+##################################################################################
+##################################################################################
+
+##################################################################################
+##################################################################################
+##                                                                              ##
+## Copyright Yoann Robin, 2020                                                  ##
+##                                                                              ##
+## yoann.robin.k@gmail.com                                                      ##
+##                                                                              ##
+## Ce logiciel est un programme informatique faisant partie de la librairie     ##
+## NSSEA (Non-Stationary Statistics for Extreme Attribution). Cette librairie   ##
+## permet d'estimer la probabilité d'un evenement (extreme) dans le monde       ##
+## factuel / contre factuel (sans forcage anthropogenique) et de l'attribuer au ##
+## changement climatique.                                                       ##
+##                                                                              ##
+## Ce logiciel est régi par la licence CeCILL-C soumise au droit français et    ##
+## respectant les principes de diffusion des logiciels libres. Vous pouvez      ##
+## utiliser, modifier et/ou redistribuer ce programme sous les conditions       ##
+## de la licence CeCILL-C telle que diffusée par le CEA, le CNRS et l'INRIA     ##
+## sur le site "http://www.cecill.info".                                        ##
+##                                                                              ##
+## En contrepartie de l'accessibilité au code source et des droits de copie,    ##
+## de modification et de redistribution accordés par cette licence, il n'est    ##
+## offert aux utilisateurs qu'une garantie limitée.  Pour les mêmes raisons,    ##
+## seule une responsabilité restreinte pèse sur l'auteur du programme, le       ##
+## titulaire des droits patrimoniaux et les concédants successifs.              ##
+##                                                                              ##
+## A cet égard  l'attention de l'utilisateur est attirée sur les risques        ##
+## associés au chargement,  à l'utilisation,  à la modification et/ou au        ##
+## développement et à la reproduction du logiciel par l'utilisateur étant       ##
+## donné sa spécificité de logiciel libre, qui peut le rendre complexe à        ##
+## manipuler et qui le réserve donc à des développeurs et des professionnels    ##
+## avertis possédant  des  connaissances  informatiques approfondies.  Les      ##
+## utilisateurs sont donc invités à charger  et  tester  l'adéquation  du       ##
+## logiciel à leurs besoins dans des conditions permettant d'assurer la         ##
+## sécurité de leurs systèmes et ou de leurs données et, plus généralement,     ##
+## à l'utiliser et l'exploiter dans les mêmes conditions de sécurité.           ##
+##                                                                              ##
+## Le fait que vous puissiez accéder à cet en-tête signifie que vous avez       ##
+## pris connaissance de la licence CeCILL-C, et que vous en avez accepté les    ##
+## termes.                                                                      ##
+##                                                                              ##
+##################################################################################
+###############
+## Libraries ##
+###############
+
+import numpy as np
+
+from .__tools import SymmetricEigen
+
+
+###############
+## Functions ##
+###############
+
+def _ensemble_log_posterior( ns_law , Y , X , t , prior , coef ):##{{{
+	"""
+	NSSEA._ensemble_log_posterior
+	=============================
+	Log of the posterior (up to a constant) of each chain, coef is of shape
+	(n_chains,n_coef) and X of shape (n_time,n_chains). Not finite values are
+	replaced by -inf.
+	"""
+	ns_law.set_params( coef.T )
+	ns_law.set_covariable( X , t )
+	with np.errstate( divide = "ignore" , invalid = "ignore" , over = "ignore" ):
+		lp = np.sum( ns_law.logpdf( Y.reshape(-1,1) , t ) , axis = 0 )
+		lp = lp + np.atleast_1d( prior.logpdf(coef) )
+	lp[~np.isfinite(lp)] = -np.inf
+	return lp
+##}}}
+
+def ensemble_mcmc( ns_law , Y , X , prior , n_mcmc_drawn , init , l_keep = None , transition_scale = 0.1 , seed = None ):##{{{
+	"""
+	NSSEA.ensemble_mcmc
+	===================
+	Draw n_chains Markov chains (random walk Metropolis) of the coefficients
+	of ns_law. All chains are advanced together: at each iteration the
+	log-likelihood of all chains is computed in one call of ns_law.logpdf, and
+	the proposals are accepted or rejected element-wise.
+	
+	Arguments
+	---------
+	ns_law : NSSEA.models.*
+		The non-stationary law, a copy is not required but its parameters are
+		modified.
+	Y      : np.array
+		Observations, shape (n_time,)
+	X      : np.array
+		Covariate of each chain, shape (n_time,n_chains)
+	prior  : scipy.stats.multivariate_normal like
+		Prior of the coefficients, must have a vectorized logpdf method
+	n_mcmc_drawn : integer or np.array
+		Length of the chains, or of each chain (shape (n_chains,))
+	init   : np.array
+		Initial state of the chains, shape (n_chains,n_coef)
+	l_keep : None or list of np.array
+		If None, the last state of each chain is kept, else l_keep[i] is the
+		iterations of the chain i to keep.
+	transition_scale : float or np.array
+		Standard deviation of the gaussian random walk, a float or an array of
+		shape (n_coef,), or a factor L of its covariance L @ L.T, of shape
+		(n_coef,n_coef) or (n_chains,n_coef,n_coef) (one by chain, see
+		NSSEA._prior_proposal_factor)
+	seed   : None or integer or list of integer
+		Seed of the random generator
+	
+	Return
+	------
+	draw : list of np.array
+		draw[i] is the coefficients kept of the chain i, shape (n_coef,n_keep)
+	rate_accept : np.array
+		Rate of acceptance of each chain
+	"""
+	rng      = np.random.default_rng(seed)
+	Y        = np.asarray(Y).ravel()
+	X        = np.asarray(X).reshape(Y.size,-1)
+	t        = np.arange(Y.size)
+	n_chains = X.shape[1]
+	n_drawn  = np.zeros(n_chains,dtype=int) + np.asarray(n_mcmc_drawn,dtype=int)
+	
+	## Iterations to keep
+	if l_keep is None:
+		l_keep = [ [n-1] for n in n_drawn ]
+	l_keep   = [ np.sort(np.asarray(keep,dtype=int)) for keep in l_keep ]
+	draw     = [ np.zeros( (ns_law.n_ns_params,keep.size) ) for keep in l_keep ]
+	keep_at  = {}
+	for i,keep in enumerate(l_keep):
+		for j,it in enumerate(keep):
+			keep_at.setdefault( it , [] ).append( (i,j) )
+	
+	## Initial state
+	coef     = np.array(init,dtype=float).reshape(n_chains,-1)
+	lp       = _ensemble_log_posterior( ns_law , Y , X , t , prior , coef )
+	n_accept = np.zeros(n_chains)
+	
+	## Random walk
+	scale = np.asarray(transition_scale,dtype=float)
+	if scale.ndim > 1:
+		L = np.broadcast_to( scale , (n_chains,) + scale.shape[-2:] )
+	
+	## MCMC loop
+	for it in range(n_drawn.max()):
+		if it > 0:
+			active   = it < n_drawn
+			if scale.ndim > 1:
+				coef_new = coef + np.einsum( "nij,nj->ni" , L , rng.normal( size = coef.shape ) )
+			else:
+				coef_new = coef + rng.normal( size = coef.shape , scale = scale )
+			lp_new   = _ensemble_log_posterior( ns_law , Y , X , t , prior , coef_new )
+			with np.errstate( invalid = "ignore" ):
+				accept = ( np.log(rng.uniform(size=n_chains)) < lp_new - lp ) & active
+			coef[accept,:] = coef_new[accept,:]
+			lp[accept]     = lp_new[accept]
+			n_accept      += accept
+		for i,j in keep_at.get( it , [] ):
+			draw[i][:,j] = coef[i,:]
+	
+	rate_accept = n_accept / n_drawn
+	
+	return draw,rate_accept
+##}}}
+
+def _split_rhat( draw ):##{{{
+	"""
+	NSSEA._split_rhat
+	=================
+	Split R-hat of a chain (shape (n_drawn,n_coef)): the chain is cut in two
+	halves, compared with the Gelman-Rubin statistic. Return an array of
+	shape (n_coef,), nan if a half is constant.
+	"""
+	n    = draw.shape[0] // 2
+	half = np.stack( (draw[:n,:],draw[n:(2*n),:]) )
+	W    = half.var( axis = 1 , ddof = 1 ).mean( axis = 0 )
+	B    = n * half.mean( axis = 1 ).var( axis = 0 , ddof = 1 )
+	with np.errstate( divide = "ignore" , invalid = "ignore" ):
+		rhat = np.sqrt( ( (n - 1) / n * W + B / n ) / W )
+	return rhat
+##}}}
+
+def _ess( draw ):##{{{
+	"""
+	NSSEA._ess
+	==========
+	Effective sample size of a chain (shape (n_drawn,n_coef)), the
+	autocorrelation is computed by FFT and summed with the initial positive
+	sequence estimator of Geyer. Return an array of shape (n_coef,), 0 if the
+	chain is constant.
+	"""
+	n    = draw.shape[0]
+	dc   = draw - draw.mean( axis = 0 )
+	f    = np.fft.rfft( dc , n = 2 * n , axis = 0 )
+	acov = np.fft.irfft( f * np.conj(f) , axis = 0 )[:n,:] / n
+	with np.errstate( divide = "ignore" , invalid = "ignore" ):
+		rho = acov / acov[0,:]
+	m    = n // 2
+	G    = rho[:(2*m):2,:] + rho[1:(2*m):2,:]
+	pos  = np.cumprod( G > 0 , axis = 0 ).astype(bool)
+	tau  = -1 + 2 * np.sum( np.where( pos , G , 0 ) , axis = 0 )
+	ess  = n / np.maximum( tau , 1 )
+	ess[~(acov[0,:] > 0)] = 0
+	return ess
+##}}}
+
+def _prior_proposal_factor( prior ):##{{{
+	"""
+	NSSEA._prior_proposal_factor
+	============================
+	Factor L (L @ L.T is the covariance) of a random walk scaled on the
+	coefficients: the Cholesky factor of the covariance of the prior, scaled
+	by 2.38 / sqrt(n_coef). If the covariance of the prior is singular, the
+	factor is built from its eigen decomposition.
+	"""
+	cov    = np.atleast_2d( prior.cov )
+	n_coef = cov.shape[0]
+	try:
+		L = np.linalg.cholesky(cov)
+	except np.linalg.LinAlgError:
+		L = SymmetricEigen(cov).factor()
+	return 2.38 / np.sqrt(n_coef) * L
+##}}}
+
+def _proposal_factor( draw , L ):##{{{
+	"""
+	NSSEA._proposal_factor
+	======================
+	Cholesky factor of the covariance of the random walk estimated from the
+	draws (shape (n_drawn,n_chains,n_coef)) of each chain, scaled by
+	2.38 / sqrt(n_coef). L is kept for the chains where the covariance is
+	singular (e.g. a chain without accepted proposals).
+	"""
+	n_coef = draw.shape[2]
+	dc     = draw - draw.mean( axis = 0 )
+	cov    = np.einsum( "tni,tnj->nij" , dc , dc ) / ( draw.shape[0] - 1 ) * 2.38**2 / n_coef
+	L      = L.copy()
+	for i in range(draw.shape[1]):
+		try:
+			L[i,:,:] = np.linalg.cholesky( cov[i,:,:] )
+		except np.linalg.LinAlgError:
+			pass
+	return L
+##}}}
+
+def _adaptive_mcmc_kwargs( kwargs ):##{{{
+	"""
+	NSSEA._adaptive_mcmc_kwargs
+	===========================
+	Keywords of kwargs used by NSSEA.adaptive_mcmc
+	"""
+	return { k : kwargs[k] for k in ["n_burn","transition_scale","target_rate","rhat_max","ess_min","check_every","n_mcmc_drawn_min"] if k in kwargs }
+##}}}
+
+def adaptive_mcmc( ns_law , Y , X , prior , init , n_mcmc_drawn_max , n_burn = 1000 , transition_scale = 0.1 , target_rate = 0.234 , rhat_max = 1.05 , ess_min = 200 , check_every = 250 , n_mcmc_drawn_min = 0 , seed = None ):##{{{
+	"""
+	NSSEA.adaptive_mcmc
+	===================
+	Draw n_chains Markov chains (random walk Metropolis) of the coefficients
+	of ns_law, all advanced together as in NSSEA.ensemble_mcmc, but with an
+	adaptive length:
+	- During the n_burn first iterations (burn-in), the proposal is adapted
+	  for each chain: its scale is updated every 50 iterations to reach the
+	  target rate of acceptance, and at the middle of the burn-in the
+	  covariance of the proposal is estimated from the chain.
+	- After the burn-in the proposal is fixed, and every check_every
+	  iterations the split R-hat and the effective sample size of each chain
+	  are computed. A chain stops as soon as its R-hat is lower than rhat_max
+	  and its effective sample size greater than ess_min (for all
+	  coefficients) and its length is at least n_mcmc_drawn_min, or after
+	  n_mcmc_drawn_max iterations.
+	
+	Arguments
+	---------
+	ns_law : NSSEA.models.*
+		The non-stationary law, its parameters are modified.
+	Y      : np.array
+		Observations, shape (n_time,)
+	X      : np.array
+		Covariate of each chain, shape (n_time,n_chains)
+	prior  : scipy.stats.multivariate_normal like
+		Prior of the coefficients, must have a vectorized logpdf method
+	init   : np.array
+		Initial state of the chains, shape (n_chains,n_coef)
+	n_mcmc_drawn_max : integer
+		Maximal length of the chains (burn-in included), at least
+		n_burn + 2 * check_every (two tests of convergence), else a
+		ValueError is raised
+	n_burn : integer
+		Length of the burn-in
+	transition_scale : float or np.array
+		Initial standard deviation of the gaussian random walk
+	target_rate : float
+		Rate of acceptance targeted during the burn-in
+	rhat_max , ess_min : float
+		Convergence criterion
+	check_every : integer
+		Number of iterations between two tests of convergence
+	n_mcmc_drawn_min : integer
+		Minimal length of the chains (burn-in included), a chain converged
+		before is continued. Must be lower than n_mcmc_drawn_max.
+	seed   : None or integer or list of integer
+		Seed of the random generator
+	
+	Return
+	------
+	draw : list of np.array
+		draw[i] is the chain i after the burn-in, shape (n_drawn_i,n_coef)
+	info : dict
+		"rate_accept" (after the burn-in), "n_mcmc_drawn" (burn-in included),
+		"rhat" (max over coefficients), "ess" (min over coefficients) and
+		"converged", arrays of shape (n_chains,)
+	"""
+	rng      = np.random.default_rng(seed)
+	Y        = np.asarray(Y).ravel()
+	X        = np.asarray(X).reshape(Y.size,-1)
+	t        = np.arange(Y.size)
+	n_chains = X.shape[1]
+	n_mcmc_drawn_max = int(n_mcmc_drawn_max)
+	if n_mcmc_drawn_max < n_burn + 2 * check_every:
+		raise ValueError( "n_mcmc_drawn_max ({}) must be at least n_burn + 2 * check_every ({})".format( n_mcmc_drawn_max , n_burn + 2 * check_every ) )
+	if n_mcmc_drawn_min > n_mcmc_drawn_max:
+		raise ValueError( "n_mcmc_drawn_min ({}) must be lower than n_mcmc_drawn_max ({})".format( n_mcmc_drawn_min , n_mcmc_drawn_max ) )
+	
+	coef      = np.array(init,dtype=float).reshape(n_chains,-1)
+	n_coef    = coef.shape[1]
+	lp        = _ensemble_log_posterior( ns_law , Y , X , t , prior , coef )
+	L         = np.zeros( (n_chains,n_coef,n_coef) ) + np.diag( np.zeros(n_coef) + transition_scale )
+	log_scale = np.zeros(n_chains)
+	n_accept  = np.zeros(n_chains)
+	
+	## Traces after the burn-in, stored by blocks of check_every iterations
+	burn      = np.zeros( (n_burn,n_chains,n_coef) )
+	blocks    = []
+	active    = np.ones( n_chains , dtype = bool )
+	n_drawn   = np.zeros( n_chains , dtype = int ) + n_mcmc_drawn_max
+	rhat      = np.zeros(n_chains) + np.nan
+	ess       = np.zeros(n_chains)
+	converged = np.zeros( n_chains , dtype = bool )
+	
+	for it in range(n_mcmc_drawn_max):
+		
+		## One step of active chains
+		idx      = np.flatnonzero(active)
+		coef_new = coef[idx,:] + np.exp(log_scale[idx]).reshape(-1,1) * np.einsum( "nij,nj->ni" , L[idx,:,:] , rng.normal( size = (idx.size,n_coef) ) )
+		lp_new   = _ensemble_log_posterior( ns_law , Y , X[:,idx] , t , prior , coef_new )
+		with np.errstate( invalid = "ignore" ):
+			accept = np.log(rng.uniform(size=idx.size)) < lp_new - lp[idx]
+		coef[idx[accept],:] = coef_new[accept,:]
+		lp[idx[accept]]     = lp_new[accept]
+		n_accept[idx]      += accept
+		
+		## Burn-in: adaptation of the proposal
+		if it < n_burn:
+			burn[it,:,:] = coef
+			if (it + 1) % 50 == 0:
+				log_scale += 2 * ( n_accept / 50 - target_rate )
+				n_accept[:] = 0
+			if it + 1 == n_burn // 2:
+				L = _proposal_factor( burn[(n_burn//4):(it+1),:,:] , L )
+				log_scale[:] = 0
+			if it + 1 == n_burn:
+				n_accept[:] = 0
+			continue
+		
+		## After the burn-in: store and test the convergence
+		it_post = it + 1 - n_burn
+		if (it_post - 1) % check_every == 0:
+			blocks.append( np.zeros( (check_every,n_chains,n_coef) ) + np.nan )
+		blocks[-1][(it_post - 1) % check_every,:,:] = coef
+		
+		if it_post % check_every == 0 and it_post >= 2 * check_every:
+			trace = np.concatenate( blocks , axis = 0 )
+			for i in idx:
+				rhat[i] = np.max( _split_rhat(trace[:,i,:]) )
+				ess[i]  = np.min( _ess(trace[:,i,:]) )
+				if rhat[i] < rhat_max and ess[i] > ess_min and it + 1 >= n_mcmc_drawn_min:
+					converged[i] = True
+					active[i]    = False
+					n_drawn[i]   = it + 1
+			if not active.any():
+				break
+	
+	## Final traces, and convergence of chains stopped by n_mcmc_drawn_max
+	trace = np.concatenate( blocks , axis = 0 )
+	draw  = [ trace[:(n_drawn[i] - n_burn),i,:] for i in range(n_chains) ]
+	for i in np.flatnonzero(active):
+		rhat[i] = np.max( _split_rhat(draw[i]) )
+		ess[i]  = np.min( _ess(draw[i]) )
+	
+	info = { "rate_accept" : n_accept / ( n_drawn - n_burn ) , "n_mcmc_drawn" : n_drawn , "rhat" : rhat , "ess" : ess , "converged" : converged }
+	
+	return draw,info
+##}}}
+
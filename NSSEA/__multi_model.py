@@ -92,7 +92,7 @@ import numpy        as np
 import xarray       as xr
 
 from .__tools import matrix_positive_part
-from .__tools import matrix_squareroot
+from .__tools import SymmetricEigen
 from .__tools import ProgressBar
 
 
@@ -106,6 +106,10 @@ class MultiModel:##{{{
 	================
 	Class infering multimodel parameters. Use NSSEA.infer_multi_model to build it
 	
+	The covariance matrix is either dense (cov), or, with low_rank = True, in
+	a factored form cov = U @ diag(s) @ U.T + diag(d), where U has
+	orthonormal columns. The rank of U is bounded by the number of models and
+	samples, so the dense matrix is never built, except if cov is read.
 	
 	Attributes
 	----------
@@ -115,26 +119,82 @@ class MultiModel:##{{{
 		Multi model covariance matrix
 	std    : array
 		Square root of multimodel covariance matrix
+	U,s,d  : array
+		Factored form of cov (low_rank = True), d is None if there is no
+		diagonal term
 	"""
 	
-	def __init__( self ):##{{{
-		self.mean = None
-		self._cov  = None
-		self.std  = None
+	def __init__( self , low_rank = False , rank = None ):##{{{
+		"""
+		Constructor
+		
+		Arguments
+		---------
+		low_rank : bool
+			If True, the covariance matrix is kept in factored form
+		rank     : int or None
+			With low_rank, maximal rank of U. The variance of the eigen
+			vectors removed is kept in the diagonal term d. If None, all non
+			zero eigen values are kept and there is no diagonal term.
+		"""
+		self.mean    = None
+		self.low_rank = low_rank
+		self.rank    = rank
+		self.U       = None
+		self.s       = None
+		self.d       = None
+		self._cov    = None
+		self._eigen  = None
+		self._std    = None
+		self._factor = None
 	##}}}
 	
-	def _fit( self , mm_matrix ):##{{{
-		n_params,n_sample,n_models = mm_matrix.shape
-		
-		cov_S = np.zeros( (n_params,n_params) )
-		for i in range(n_models):
-			cov_S += np.cov( mm_matrix[:,1:,i] )
-		
-		SSM     = np.cov( mm_matrix[:,0,:] ) * ( n_models - 1 )
+	def _fit( self , BE , cov_S ):##{{{
+		n_models = BE.shape[1]
+		SSM     = np.cov( BE ) * ( n_models - 1 )
 		cov_CMU = matrix_positive_part( SSM / ( n_models - 1 ) - cov_S / n_models )
 		self.cov  = ( n_models + 1 ) / n_models * cov_CMU + cov_S / n_models**2
 	##}}}
 	
+	def _fit_low_rank( self , BE , ZS ):##{{{
+		"""
+		Same covariance as _fit, computed in the space spanned by the
+		centered samples ZS (cov_S = ZS @ ZS.T), of dimension lower than
+		n_models * n_sample.
+		"""
+		n_models = BE.shape[1]
+		
+		## SSM / (n_models - 1) = ZM @ ZM.T
+		ZM = ( BE - BE.mean( axis = 1 , keepdims = True ) ) / np.sqrt( n_models - 1 )
+		Q,_ = np.linalg.qr( np.hstack( (ZM,ZS) ) )
+		
+		cov_S   = ( Q.T @ ZS ) @ ( Q.T @ ZS ).T
+		cov_CMU = matrix_positive_part( ( Q.T @ ZM ) @ ( Q.T @ ZM ).T - cov_S / n_models )
+		self._set_factors( Q , ( n_models + 1 ) / n_models * cov_CMU + cov_S / n_models**2 )
+	##}}}
+	
+	def _set_factors( self , Q , C , d = None ):##{{{
+		"""
+		Set the factored form from the covariance Q @ C @ Q.T + diag(d), Q
+		with orthonormal columns. Eigen values lower than n * machine
+		precision are removed, and, if rank is set, only the rank largest are
+		kept, the variance of the others is added to d.
+		"""
+		eig = SymmetricEigen(C)
+		idx = np.argsort(eig.lbda)[::-1]
+		s,V = eig.lbda[idx],eig.v[:,idx]
+		n   = np.sum( s > s.size * np.finfo(float).eps * np.max( np.abs(s) , initial = 0 ) )
+		if self.rank is not None and self.rank < n:
+			Ur = Q @ V[:,self.rank:n]
+			dr = np.sum( Ur**2 * s[self.rank:n] , axis = 1 )
+			d  = dr if d is None else d + dr
+			n  = self.rank
+		self.cov = None
+		self.U   = Q @ V[:,:n]
+		self.s   = s[:n]
+		self.d   = d
+	##}}}
+	
 	def fit( self , mm_matrix ):##{{{
 		"""
 		Fit Multi model parameters
@@ -142,21 +202,172 @@ class MultiModel:##{{{
 		Parameters
 		----------
 		mm_matrix: array
-			Big matrix containing sample to infer multi model parameters
-		method   : str
-			Method used, "classic" or "optimal"
-		verbose  : bool
-			Print (or not) state of execution
+			Big matrix containing sample to infer multi model parameters, of
+			shape (n_params,n_sample+1,n_models), the sample 0 is the best
+			estimate
+		"""
+		self.fit_blocks( [ ( mm_matrix , { "sample" : slice( 0 , mm_matrix.shape[1] ) , "model" : slice( 0 , mm_matrix.shape[2] ) } ) ] , mm_matrix.shape[2] )
+	##}}}
+	
+	def fit_blocks( self , blocks , n_models ):##{{{
+		"""
+		Fit Multi model parameters from the blocks of the big matrix (see
+		fit), which is never built.
+		
+		Parameters
+		----------
+		blocks  : iterable
+			Pairs (mm_block,block), mm_block the values of the big matrix
+			in the block { "sample" : slice , "model" : slice } (see
+			NSSEA.Climatology.blocks). The block of the best estimate (sample
+			0) of a model must come before the other blocks of this model.
+		n_models: int
+			Number of models
+		
+		Only sums over the samples are kept: the sum of the cross products
+		of the samples (n_params x n_params) for the dense covariance, and,
+		with low_rank, the centered samples, which span U.
+		"""
+		BE    = None
+		sums  = None
+		n     = np.zeros( n_models , dtype = int )
+		S_xx  = 0
+		Y     = [ [] for _ in range(n_models) ]
+		for mm_block,block in blocks:
+			if BE is None:
+				BE   = np.zeros( (mm_block.shape[0],n_models) )
+				sums = np.zeros( (mm_block.shape[0],n_models) )
+			for j,m in enumerate(range(n_models)[block["model"]]):
+				Ym = mm_block[:,:,j]
+				if block["sample"].start == 0:
+					BE[:,m] = Ym[:,0]
+					Ym      = Ym[:,1:]
+				## Samples are shifted by the best estimate of their model, to
+				## avoid the cancellation in the cross products
+				Ym = Ym - BE[:,m].reshape(-1,1)
+				sums[:,m] += Ym.sum( axis = 1 )
+				n[m]      += Ym.shape[1]
+				if self.low_rank:
+					Y[m].append(Ym)
+				else:
+					S_xx = S_xx + Ym @ Ym.T
+		
+		self.mean = np.mean( BE , axis = 1 )
+		if self.low_rank:
+			ZS = np.hstack( [ ( np.hstack(Y[m]) - sums[:,m].reshape(-1,1) / n[m] ) / np.sqrt( n[m] - 1 ) for m in range(n_models) ] )
+			self._fit_low_rank( BE , ZS )
+		else:
+			## cov_S = sum of the covariance of the samples of each model, the
+			## models have the same number of samples
+			cov_S = S_xx - sum( np.outer( sums[:,m] , sums[:,m] ) / n[m] for m in range(n_models) )
+			self._fit( BE , cov_S / ( n[0] - 1 ) )
+	##}}}
+	
+	def rvs( self , n = None ):##{{{
+		"""
+		Return random samples from multi model
+		
+		Parameters
+		----------
+		n : integer or None
+			Number of samples. If None, only one sample is drawn.
+		
+		Returns
+		-------
+		draw : array
+			Shape (n_mm_coef,) if n is None, else (n_mm_coef,n). All samples
+			are drawn with one matrix product.
+		"""
+		if self.is_factored:
+			size  = () if n is None else (n,)
+			shape = (-1,) + (1,) * len(size)
+			Z     = np.random.normal( size = (self.mean.size,) + size ).reshape(self.mean.size,-1)
+			if self.std_factors is not None:
+				draw = self.std_dot(Z)
+			else:
+				## No factored symmetric square root, U diag(sqrt(s)) and
+				## diag(sqrt(d)) are applied to independent parts of Z
+				r    = self.s.size
+				Z    = np.vstack( (Z,np.random.normal( size = (r,Z.shape[1]) )) )
+				draw = self.U @ ( np.sqrt(self.s).reshape(-1,1) * Z[-r:,:] ) + np.sqrt(self.d).reshape(-1,1) * Z[:-r,:]
+			return self.mean.reshape(shape) + draw.reshape( (self.mean.size,) + size )
+		if n is None:
+			return self.mean + self.factor @ np.random.normal( size = self.mean.size )
+		return self.mean.reshape(-1,1) + self.factor @ np.random.normal( size = (self.mean.size,n) )
+	##}}}
+	
+	def cov_dot( self , A ):##{{{
+		"""
+		Product cov @ A, computed from the factored form if cov is factored.
+		"""
+		if not self.is_factored:
+			return self.cov @ A
+		out = self.U @ ( self.s.reshape(-1,1) * ( self.U.T @ A ) )
+		if self.d is not None:
+			out = out + self.d.reshape(-1,1) * A
+		return out
+	##}}}
+	
+	def std_dot( self , A ):##{{{
+		"""
+		Product std @ A, with std the symmetric square root of cov, computed
+		from std_factors if cov is factored (so std is never built).
+		"""
+		if not self.is_factored:
+			return self.std @ A
+		if self.std_factors is None:
+			raise ValueError( "NSSEA.MultiModel: no factored square root with a non constant diagonal term" )
+		U,a,c = self.std_factors
+		return U @ ( a.reshape(-1,1) * ( U.T @ A ) ) + c * A
+	##}}}
+	
+	def sub_cov( self , index ):##{{{
+		"""
+		Covariance matrix of the coordinates index (a slice or an array)
 		"""
-		self.mean = np.mean( mm_matrix[:,0,:] , axis = 1 )
-		self._fit(mm_matrix)
+		if not self.is_factored:
+			return self.cov[index,:][:,index]
+		U   = self.U[index,:]
+		out = ( U * self.s ) @ U.T
+		if self.d is not None:
+			out = out + np.diag(self.d[index])
+		return out
 	##}}}
 	
-	def rvs(self):##{{{
+	def downdate( self , R , observed = None ):##{{{
 		"""
-		Return a random sample from multi model
+		Replace cov by cov - R @ R.T, the update of the covariance by a
+		Kalman filter, with R @ R.T = cov H.T (H cov H.T + SY)^-1 H cov.
+		
+		In factored form, observed are the coordinates used by H (its non zero
+		columns), required if there is a diagonal term d. The diagonal term
+		of the observed coordinates is moved in the low rank part, which is
+		updated in the space spanned by U, these coordinates and R, so the
+		update is exact. The diagonal term of the other coordinates is not
+		modified by the filter.
 		"""
-		return self.mean + self.std @ np.random.normal(size = self.mean.size)
+		if not self.is_factored:
+			self.cov = self.cov - R @ R.T
+			return
+		d = self.d
+		E = np.zeros( (self.U.shape[0],0) )
+		if d is not None:
+			if observed is None:
+				raise ValueError( "NSSEA.MultiModel.downdate: the observed coordinates are required with a diagonal term" )
+			observed = np.asarray(observed,dtype=int)
+			dJ = d[observed]
+			d  = d.copy()
+			d[observed] = 0
+			E  = np.zeros( (d.size,observed.size) )
+			E[observed,np.arange(observed.size)] = 1
+		Q,_ = np.linalg.qr( np.hstack( (self.U,E,R) ) )
+		QU  = Q.T @ self.U
+		QR  = Q.T @ R
+		C   = ( QU * self.s ) @ QU.T - QR @ QR.T
+		if d is not None:
+			QE = Q[observed,:].T
+			C  = C + ( QE * dJ ) @ QE.T
+		self._set_factors( Q , C , d )
 	##}}}
 	
 	## Properties {{{
@@ -165,14 +376,80 @@ class MultiModel:##{{{
 	def n_mm_coef(self):
 		return None if self.mean is None else self.mean.size
 	
+	@property
+	def is_factored(self):
+		return self.U is not None
+	
 	@property
 	def cov(self):
+		"""
+		Dense covariance matrix, built from the factored form if cov is
+		factored.
+		"""
+		if self._cov is None and self.is_factored:
+			return self.sub_cov( slice(None) )
 		return self._cov
 	
 	@cov.setter
 	def cov( self , _cov ):
-		self._cov = _cov
-		self.std = matrix_squareroot(self._cov)
+		self._cov    = _cov
+		self._eigen  = None
+		self._std    = None
+		self._factor = None
+		if _cov is not None:
+			self.U = None
+			self.s = None
+			self.d = None
+	
+	@property
+	def eigen(self):
+		"""
+		NSSEA.SymmetricEigen of cov, computed only once for a given cov.
+		"""
+		if self._eigen is None and self.cov is not None:
+			self._eigen = SymmetricEigen(self.cov)
+		return self._eigen
+	
+	@property
+	def std_factors(self):
+		"""
+		Factored form (U,a,c) of the symmetric square root of a factored cov
+		without diagonal term (or with a constant diagonal term d = c**2):
+		std = U @ diag(a) @ U.T + c I, a = sqrt(s + c**2) - c. None if cov is
+		not factored or if its diagonal term is not constant.
+		"""
+		if not self.is_factored or not ( self.d is None or np.allclose( self.d , self.d[0] ) ):
+			return None
+		c = 0. if self.d is None else np.sqrt(self.d[0])
+		return self.U,np.sqrt( self.s + c**2 ) - c,c
+	
+	@property
+	def std(self):
+		"""
+		Symmetric square root of cov, a dense matrix. If cov is factored, use
+		std_dot or std_factors, which do not build it.
+		"""
+		if self._std is None and self.cov is not None:
+			self._std = self.eigen.squareroot()
+		return self._std
+	
+	@property
+	def factor(self):
+		"""
+		Matrix L such that L @ L.T = cov, used to draw samples. This is the
+		Cholesky factor if cov is positive definite, else it is built from the
+		eigen decomposition of cov, with negative eigen values set to 0.
+		If cov is factored without diagonal term, L = U @ diag(sqrt(s)).
+		Computed only once for a given cov.
+		"""
+		if self._factor is None and self.is_factored and self.d is None:
+			self._factor = self.U * np.sqrt(self.s)
+		if self._factor is None and self.cov is not None:
+			try:
+				self._factor = np.linalg.cholesky(self.cov)
+			except np.linalg.LinAlgError:
+				self._factor = self.eigen.factor()
+		return self._factor
 	
 	##}}}
 	
@@ -183,7 +460,52 @@ class MultiModel:##{{{
 ## Functions ##
 ###############
 
-def infer_multi_model( clim , verbose = False ):
+def _mm_from_clim( clim ):##{{{
+	"""
+	NSSEA.MultiModel of the multi-model synthesis of clim, from mm_mean and
+	mm_cov, or from the factored form mm_cov_U, mm_cov_s and mm_cov_d.
+	"""
+	if "mm_cov" in clim.data.variables:
+		mmodel = MultiModel()
+		mmodel.mean = clim.data["mm_mean"].values
+		mmodel.cov  = clim.data["mm_cov"].values
+		return mmodel
+	mmodel = MultiModel( low_rank = True )
+	mmodel.mean = clim.data["mm_mean"].values
+	mmodel.U    = clim.data["mm_cov_U"].values
+	mmodel.s    = clim.data["mm_cov_s"].values
+	mmodel.d    = clim.data["mm_cov_d"].values if "mm_cov_d" in clim.data.variables else None
+	return mmodel
+##}}}
+
+def _mm_to_clim( clim , mmodel ):##{{{
+	"""
+	Write mm_mean and mm_cov (or its factored form mm_cov_U, mm_cov_s and
+	mm_cov_d) of the NSSEA.MultiModel mmodel in clim.
+	"""
+	index = [ "{}F".format(t) for t in clim.time ] + [ "{}C".format(t) for t in clim.time ] + clim.data.coef.values.tolist()
+	mm    = { "mm_mean" : xr.DataArray( mmodel.mean , dims = ["mm_coef"] , coords = [index] ) }
+	if mmodel.is_factored:
+		rank = np.arange( mmodel.s.size , dtype = int )
+		mm["mm_cov_U"] = xr.DataArray( mmodel.U , dims = ["mm_coef","mm_rank"] , coords = [index,rank] )
+		mm["mm_cov_s"] = xr.DataArray( mmodel.s , dims = ["mm_rank"] , coords = [rank] )
+		if mmodel.d is not None:
+			mm["mm_cov_d"] = xr.DataArray( mmodel.d , dims = ["mm_coef"] , coords = [index] )
+	else:
+		mm["mm_cov"] = xr.DataArray( mmodel.cov , dims = ["mm_coef","mm_coef"] , coords = [index,index] )
+	
+	## Variables of the previous synthesis not re-used in place are removed
+	old  = [ v for v in ["mm_mean","mm_cov","mm_cov_U","mm_cov_s","mm_cov_d"] if v in clim.data.variables ]
+	drop = [ v for v in old if clim.store is None or v not in mm or clim.data[v].shape != mm[v].shape ]
+	if any( v in drop for v in ["mm_cov_U","mm_cov_s"] ) and "mm_rank" in clim.data.variables:
+		drop.append("mm_rank")
+	if len(drop) > 0:
+		clim.data = clim.data.drop_vars(drop)
+	for name in mm:
+		clim._add_variable( name , mm[name] )
+##}}}
+
+def infer_multi_model( clim , low_rank = False , rank = None , verbose = False ):
 	"""
 	NSSEA.infer_multi_model
 	=======================
@@ -194,6 +516,11 @@ def infer_multi_model( clim , verbose = False ):
 	Arguments
 	---------
 	clim : [NSSEA.Climatology] Clim variable
+	low_rank : [bool] If True, the covariance matrix is stored in factored
+	           form U @ diag(s) @ U.T + diag(d) (variables mm_cov_U,
+	           mm_cov_s and mm_cov_d) instead of the dense mm_cov
+	rank     : [int or None] Maximal rank of U with low_rank, see
+	           NSSEA.MultiModel
 	verbose  : [bool] Print (or not) state of execution
 	
 	Return
@@ -201,6 +528,11 @@ def infer_multi_model( clim , verbose = False ):
 	clim: [NSSEA.Climatology] The clim with the multi model synthesis with
 	      name "Multi_Synthesis"
 	
+	If clim.cache is set, the synthesis (mm_mean, mm_cov and the samples
+	drawn) is read in the cache if it has already been inferred from the same
+	covariates and coefficients, i.e. from X and law_coef computed by
+	covariates_FC_GAM and nslaw_fit with the same inputs and seeds, and not
+	modified since.
 	"""
 	
 	pb = ProgressBar( 3 , "infer_multi_model" , verbose )
@@ -208,58 +540,65 @@ def infer_multi_model( clim , verbose = False ):
 	## Parameters
 	##===========
 	n_time    = clim.n_time
-	n_coef    = clim.n_coef
-	n_sample  = clim.n_sample
 	n_model   = clim.n_model
-	sample    = clim.sample
-	n_mm_coef = 2 * n_time + n_coef
+	n_sample  = clim.n_sample
+	forcing   = clim.data.forcing.values.tolist()
 	
-	## Big matrix
-	##===========
-	mm_data                        = np.zeros( (n_mm_coef,n_sample + 1,n_model) )
-	mm_data[:n_time,:,:]           = clim.X.loc[:,:,"F",:].values
-	mm_data[n_time:(2*n_time),:,:] = clim.X.loc[:,:,"C",:].values
-	mm_data[(2*n_time):,:,:]       = clim.law_coef.values
-	pb.print()
-	
-	## Multi model parameters inference
-	##=================================
-	mmodel = MultiModel()
-	mmodel.fit( mm_data )
-	pb.print()
-	
-	## Generate sample
-	##================
-	name = "Multi_Synthesis"
-	mm_sample = xr.DataArray( np.zeros( (n_time,n_sample + 1,2,1) ) , coords = [ clim.time , sample , clim.data.forcing , [name] ] , dims = ["time","sample","forcing","model"] )
-	mm_params = xr.DataArray( np.zeros( (n_coef,n_sample + 1,1) )   , coords = [ clim.law_coef.coef.values , sample , [name] ]     , dims = ["coef","sample","model"] )
-	
-	mm_sample.loc[:,"BE","F",name] = mmodel.mean[:n_time]
-	mm_sample.loc[:,"BE","C",name] = mmodel.mean[n_time:(2*n_time)]
-	mm_params.loc[:,"BE",name]     = mmodel.mean[(2*n_time):]
-	
-	for s in sample[1:]:
-		draw = mmodel.rvs()
-		mm_sample.loc[:,s,"F",name] = draw[:n_time]
-		mm_sample.loc[:,s,"C",name] = draw[n_time:(2*n_time)]
-		mm_params.loc[:,s,name]     = draw[(2*n_time):]
-	pb.print()
-	
-	
-	## Add multimodel to clim
-	##=======================
-	data = xr.Dataset( { "X" : mm_sample , "law_coef" : mm_params } )
-	clim.data = xr.concat( [clim.data,data] , dim = "model" , data_vars = "minimal" )
-#	X        = xr.concat( [clim.X , mm_sample] , "model" )
-#	law_coef = xr.concat( [clim.law_coef,mm_params] , "model" )
-#	clim.data = xr.Dataset( { "X" : X , "law_coef" : law_coef } )
+	## The covariates and the coefficients are known by the inputs of the
+	## stages covariates_FC_GAM and nslaw_fit, not cached if they are unknown
+	inputs = [ clim._get_inputs("X") , clim._get_inputs("law_coef") ]
+	inputs = None if None in inputs else inputs + ( [ low_rank , rank ] if low_rank else [] )
+	cached = clim._cache_get( "infer_multi_model" , inputs )
+	mmodel = MultiModel( low_rank = low_rank , rank = rank )
+	if cached is not None:
+		mmodel.mean = cached["mm_mean"]
+		if low_rank:
+			mmodel.U = cached["mm_cov_U"]
+			mmodel.s = cached["mm_cov_s"]
+			mmodel.d = cached["mm_cov_d"] if "mm_cov_d" in cached else None
+		else:
+			mmodel.cov = cached["mm_cov"]
+		draw        = cached["draw"]
+		for _ in range(3):
+			pb.print()
+	else:
+		## Blocks of the big matrix (F, C and law_coef), read block by block
+		##==================================================================
+		def mm_blocks():
+			for block in clim.blocks():
+				XF = clim._read_block( "X" , { **block , "forcing" : forcing.index("F") } )
+				XC = clim._read_block( "X" , { **block , "forcing" : forcing.index("C") } )
+				yield np.concatenate( (XF,XC,clim._read_block( "law_coef" , block )) , axis = 0 ),block
+		pb.print()
+		
+		## Multi model parameters inference
+		##=================================
+		with clim._stage():
+			mmodel.fit_blocks( mm_blocks() , n_model )
+		pb.print()
+		
+		## Generate sample
+		##================
+		draw = np.hstack( (mmodel.mean.reshape(-1,1),mmodel.rvs(n_sample)) )
+		if low_rank:
+			cov = { "mm_cov_U" : mmodel.U , "mm_cov_s" : mmodel.s , **( {} if mmodel.d is None else { "mm_cov_d" : mmodel.d } ) }
+		else:
+			cov = { "mm_cov" : mmodel.cov }
+		clim._cache_put( "infer_multi_model" , inputs , mm_mean = mmodel.mean , draw = draw , **cov )
+		pb.print()
+	
+	## Add multimodel to clim, in place in a store (see Climatology._extend)
+	##=====================================================================
+	clim._extend( "model" , ["Multi_Synthesis"] )
+	block = { "model" : n_model }
+	with clim._stage():
+		clim._write_block( "X" , draw[:n_time,:] , { **block , "forcing" : forcing.index("F") } )
+		clim._write_block( "X" , draw[n_time:(2*n_time),:] , { **block , "forcing" : forcing.index("C") } )
+		clim._write_block( "law_coef" , draw[(2*n_time):,:] , block )
 	
 	## Add multimodel to xarray, and add to clim
 	##==========================================
-	index = [ "{}F".format(t) for t in clim.time ] + [ "{}C".format(t) for t in clim.time ] + clim.data.coef.values.tolist()
-	dmm_mean  = xr.DataArray( mmodel.mean , dims = ["mm_coef"] , coords = [index] )
-	dmm_cov   = xr.DataArray( mmodel.cov  , dims = ["mm_coef","mm_coef"] , coords = [index,index] )
-	clim.data = clim.data.assign( { "mm_mean" : dmm_mean , "mm_cov" : dmm_cov } )
+	_mm_to_clim( clim , mmodel )
 	
 	pb.end()
 	
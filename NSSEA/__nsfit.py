@@ -88,17 +88,60 @@
 ## Libraries ##
 ###############
 
+import os
 import numpy  as np
 import xarray as xr
 
 from .__tools import ProgressBar
+from .__tools import pool_map
 
 
 ###############
 ## Functions ##
 ###############
 
-def nslaw_fit( lY , clim , verbose = False ):
+def _nslaw_fit_block( args ):##{{{
+	"""
+	NSSEA._nslaw_fit_block
+	======================
+	Fit the ns_law for a block of samples of one model. Each sample uses its
+	own random generator, seeded by (seed,model,sample), so the result does not
+	depend of the number of blocks / process.
+	
+	Arguments
+	---------
+	args : tuple
+		(ns_law,Y,X,idx_sample,seed), where Y is an array (n_time_Y,1), X an
+		array (n_time_Y,n_sample+1) of the covariate at time of Y, idx_sample
+		the index of samples to fit (0 is the best estimate) and seed a list of
+		integers
+	
+	Return
+	------
+	coef : np.array
+		Coefficients fitted, shape (n_ns_params,idx_sample.size)
+	"""
+	ns_law,Y,X,idx_sample,seed = args
+	n_time = Y.shape[0]
+	t_BE   = np.arange( 0 , n_time , 1 )
+	coef   = np.zeros( (ns_law.n_ns_params,idx_sample.size) )
+	
+	for i,s in enumerate(idx_sample):
+		if s == 0:
+			ns_law.fit( Y , X[:,0] )
+		else:
+			rng = np.random.default_rng( seed + [s] )
+			fit_is_valid = False
+			while not fit_is_valid:
+				idx = rng.choice( n_time , n_time , replace = True )
+				ns_law.fit( Y[idx,:] , X[idx,s] )
+				fit_is_valid = ns_law.check( Y.squeeze() , X[:,0].squeeze() , t_BE )
+		coef[:,i] = ns_law.get_params()
+	
+	return coef
+##}}}
+
+def nslaw_fit( lY , clim , n_jobs = 1 , executor = None , seed = None , verbose = False ):##{{{
 	"""
 	NSSEA.nslaw_fit
 	===============
@@ -110,6 +153,19 @@ def nslaw_fit( lY , clim , verbose = False ):
 		List of models
 	clim : NSSEA.Climatology
 		Climatology variable
+	n_jobs : integer
+		Number of process used. The samples of each model are split in n_jobs
+		blocks, fitted in a pool of process. Default is 1 (serial)
+	executor: concurrent.futures.Executor or None
+		An executor used instead of a new pool of n_jobs process
+	seed   : integer or None
+		Seed of the bootstrap. Each (model,sample) has its own random generator
+		derived from the seed, so results are reproducible whatever n_jobs. If
+		None, the seed is drawn from np.random. If clim.checkpoint is set and
+		the seed is given, each block of samples fitted is saved, and the
+		samples already fitted with the same lY, covariates, ns_law and seed
+		are not fitted again. If clim.cache is set and the seed is given, the
+		coefficients are read in the cache if they have already been fitted.
 	verbose: bool
 		Print or not state of execution
 	
@@ -127,36 +183,65 @@ def nslaw_fit( lY , clim , verbose = False ):
 	n_ns_params = clim.ns_law.n_ns_params
 	ns_params_names = clim.ns_law.get_params_names()
 	
+	ckpt   = None
+	inputs = None
+	if seed is None:
+		seed = np.random.randint( 2**31 )
+	else:
+		## The covariates are known by the inputs of covariates_FC_GAM if
+		## possible, else they are read
+		XF     = clim._get_inputs("X")
+		XF     = clim.data["X"].loc[:,:,"F",:] if XF is None else XF
+		inputs = [ clim.ns_law , lY , XF , int(seed) ]
+		ckpt   = clim._checkpoint( "nslaw_fit" , *inputs )
+	
+	## Already fitted
+	cached = clim._cache_get( "nslaw_fit" , inputs )
+	if cached is not None:
+		clim.law_coef = xr.DataArray( cached["law_coef"] , coords = [ ns_params_names , sample , models ] , dims = ["coef","sample","model"] )
+		clim._set_inputs( "law_coef" , "nslaw_fit" , inputs )
+		return clim
 	
 	law_coef   = xr.DataArray( np.zeros( (n_ns_params,n_sample + 1,n_models) ) , coords = [ ns_params_names , sample , models ] , dims = ["coef","sample","model"] )
 	
-	pb = ProgressBar( n_models * (n_sample+1) , "nslaw_fit" , verbose )
+	## Blocks already fitted
+	done = np.zeros( (n_sample + 1,n_models) , dtype = bool )
+	if ckpt is not None:
+		for name in ckpt.names():
+			block = ckpt.load(name)
+			law_coef.values[:,block["sample"],block["model"]] = block["coef"]
+			done[block["sample"],block["model"]] = True
+	
+	## Blocks of (model,samples)
+	if n_jobs is not None and n_jobs < 0:
+		n_jobs = os.cpu_count()
+	n_block  = max( 1 , n_jobs if n_jobs is not None and n_jobs > 0 else 1 )
+	l_block  = []
+	l_args   = []
 	for Y in lY:
 		model = Y.columns[0]
 		tY    = Y.index
-		X     = clim.X.loc[tY,"BE","F",model]
-		
-		law = clim.ns_law
-		law.fit(Y.values,X.values)
-		law_coef.loc[:,"BE",model] = law.get_params()
-		
-		for s in sample:
+		X     = clim.data["X"].loc[tY,:,"F",model].values
+		i_model = list(models).index(model)
+		todo    = np.flatnonzero( ~done[:,i_model] )
+		if todo.size == 0:
+			continue
+		for idx_sample in np.array_split( todo , min( n_block , todo.size ) ):
+			l_block.append( (i_model,idx_sample) )
+			l_args.append( (clim.ns_law,Y.values,X,idx_sample,[int(seed),i_model]) )
+	
+	pb = ProgressBar( sum( idx_sample.size for _,idx_sample in l_block ) , "nslaw_fit" , verbose )
+	for (i_model,idx_sample),coef in zip( l_block , pool_map( _nslaw_fit_block , l_args , n_jobs , executor ) ):
+		law_coef.values[:,idx_sample,i_model] = coef
+		if ckpt is not None:
+			ckpt.save( model = i_model , sample = idx_sample , coef = coef )
+		for _ in idx_sample:
 			pb.print()
-			
-			fit_is_valid = False
-			while not fit_is_valid:
-			
-				idx = np.random.choice( tY.size , tY.size , replace = True )
-				
-				tYs = tY.values[idx]
-				Ys = Y.iloc[idx].values
-				Xs = clim.X.loc[tYs,s,"F",model].values
-				law.fit(Ys,Xs)
-				fit_is_valid = law.check( Y.values.squeeze() , X.values.squeeze() , np.arange( 0 , tY.size , 1 ) )
-			law_coef.loc[:,s,model] = law.get_params()
 	
 	clim.law_coef = law_coef
+	clim._cache_put( "nslaw_fit" , inputs , law_coef = law_coef.values )
+	clim._set_inputs( "law_coef" , "nslaw_fit" , inputs )
 	pb.end()
 	return clim
-
+##}}}
 
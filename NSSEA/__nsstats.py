@@ -93,7 +93,8 @@ import numpy as np
 import xarray as xr
 import scipy.stats as sc
 
-from .__tools import ProgressBar
+from .__tools     import ProgressBar
+from .__variables import Event
 
 
 ###############
@@ -146,6 +147,167 @@ def KStest_model( clim , lY , verbose = False ):##{{{
 	return KS
 ##}}}
 
+def _statistics_run( clim , fct_block , event , name , verbose ):##{{{
+	"""
+	NSSEA._statistics_run
+	=====================
+	Compute the statistics block by block (see NSSEA.Climatology.blocks), the
+	statistics pC,pF,IC,IF of a block are computed by fct_block, and PR, dI
+	are deduced. Each block is written in clim.statistics (in memory or in
+	the store of clim), so only one block is in memory. If clim.checkpoint
+	is set, each block is saved, and the blocks already computed with the
+	same covariates, coefficients and event are not computed again.
+	
+	Arguments
+	---------
+	clim : NSSEA.Climatology
+		A clim variable
+	fct_block : function
+		fct_block( law , coef , XF , XC , time , events ) -> pC,pF,IC,IF, with
+		coef of shape (n_coef,n_sample_block,n_model_block), XF, XC of shape
+		(n_time,n_sample_block,n_model_block), events a list of events of the
+		same side, and the statistics of shape
+		(n_time,n_sample_block,n_model_block,n_event)
+	event : NSSEA.Event or list of NSSEA.Event
+		If None, clim.event is used. If a list, the statistics have a last
+		dimension "event" (coordinates are the names of the events if they
+		are unique, else their index), and all the events are computed
+		together on each block (one pass by side of events).
+	name : str
+		Name printed by the progress bar
+	verbose: bool
+		Print state of execution or not
+	
+	Return
+	------
+	clim : NSSEA.Climatology
+		A clim variable with clim.statistics set
+	"""
+	if event is None:
+		event = clim.event
+	single = isinstance( event , Event )
+	events = [event] if single else list(event)
+	sides  = [ [ i for i,e in enumerate(events) if e.side == side ] for side in ["upper","lower"] ]
+	
+	## The statistics of an event are read at event.time
+	in_time = np.isin( [ e.time for e in events ] , clim.time )
+	if not np.all(in_time):
+		raise ValueError( "Time of event(s) {} not in clim.time".format( ", ".join( "{} ({})".format( e.name , e.time ) for e,ok in zip(events,in_time) if not ok ) ) )
+	
+	pb = ProgressBar( clim.n_blocks , name , verbose = verbose )
+	
+	ckpt = clim._checkpoint( "statistics" , fct_block , clim.ns_law , clim.data["X"] , clim.data["law_coef"] , event , clim.chunks )
+	done = set() if ckpt is None else ckpt.names()
+	
+	coords = [clim.time , clim.sample , ["pC","pF","IC","IF","PR","dI"] , clim.model]
+	dims   = ["time","sample","stats","model"]
+	if not single:
+		names   = [ e.name for e in events ]
+		coords += [ names if len(set(names)) == len(names) else np.arange( len(events) , dtype = int ) ]
+		dims   += ["event"]
+	clim._new_variable( "statistics" , coords , dims )
+	forcing = clim.data.forcing.values.tolist()
+	with clim._stage():
+		for block in clim.blocks():
+			block_name = "s{}_m{}".format( block["sample"].start , block["model"].start )
+			if block_name in done:
+				stats = ckpt.load(block_name)["statistics"]
+			else:
+				coef = clim._read_block( "law_coef" , block )
+				XF   = clim._read_block( "X" , { **block , "forcing" : forcing.index("F") } )
+				XC   = clim._read_block( "X" , { **block , "forcing" : forcing.index("C") } )
+				stats = np.zeros( XF.shape[:2] + (6,) + XF.shape[2:] + (len(events),) )
+				for idx in sides:
+					if len(idx) == 0:
+						continue
+					pC,pF,IC,IF = fct_block( clim.ns_law , coef , XF , XC , clim.time , [ events[i] for i in idx ] )
+					stats[...,idx] = np.stack( (pC,pF,IC,IF,pF / pC,IF - IC) , axis = 2 )
+				if single:
+					stats = stats[...,0]
+				if ckpt is not None:
+					ckpt.save( block_name , statistics = stats )
+			clim._write_block( "statistics" , stats , block )
+			pb.print()
+	
+	pb.end()
+	
+	return clim
+##}}}
+
+def _events_at_time( fct , events , values ):##{{{
+	"""
+	NSSEA._events_at_time
+	=====================
+	fct( values[...,i] , events[i].time ) for each event, i.e. the function
+	is evaluated only at the time of each event. fct is a method of a law
+	with params of shape (n_time,n_sample_block,n_model_block,1), and the
+	output is of shape (n_sample_block,n_model_block,n_event).
+	"""
+	values = np.asarray(values)
+	return np.concatenate( [ fct( values[...,i:i+1] , e.time ) for i,e in enumerate(events) ] , axis = -1 )
+##}}}
+
+def _events_intensity( law , events , shape , upper_side , anomaly ):##{{{
+	"""
+	NSSEA._events_intensity
+	=======================
+	Intensity defining each event (of the same side), of shape
+	shape + (n_event,): event.value for the types "value" and "anomaly" (plus
+	the mean of the law over event.reference if anomaly is True), and the
+	intensity of probability 1 / event.value ("Rt") or event.value ("p") at
+	event.time for the other types.
+	"""
+	I = np.zeros( shape + (len(events),) ) + np.array( [ e.value for e in events ] , dtype = float )
+	
+	## Mean over the reference period, computed once by reference period
+	if anomaly:
+		means = {}
+		for i,e in enumerate(events):
+			if e.type != "anomaly":
+				continue
+			key = tuple(np.ravel(e.reference))
+			if key not in means:
+				means[key] = np.mean( law.meant(e.reference) , axis = 0 )[...,0]
+			I[...,i] += means[key]
+	
+	## Intensity of a probability
+	idx = [ i for i,e in enumerate(events) if e.type in ["Rt","p"] ]
+	if len(idx) > 0:
+		p = np.array( [ 1. / events[i].value if events[i].type == "Rt" else events[i].value for i in idx ] , dtype = float )
+		I[...,idx] = _events_at_time( law.isf if upper_side else law.icdf , [ events[i] for i in idx ] , p )
+	
+	return I
+##}}}
+
+def _statistics_fixed_IF_block( law , coef , XF , XC , time , events ):##{{{
+	"""
+	NSSEA._statistics_fixed_IF_block
+	================================
+	Statistics of NSSEA.statistics_fixed_IF for one block, see NSSEA._statistics_run.
+	"""
+	upper_side = events[0].side == "upper"
+	
+	## Law with all samples / models of the block, params are of shape (n_time,n_sample_block,n_model_block,1)
+	law.set_params( coef[...,np.newaxis] )
+	
+	## Go to factual world
+	law.set_covariable( XF[...,np.newaxis] , time )
+	shape = XF.shape + (len(events),)
+	
+	## Find value of event definition
+	IF = np.zeros(shape) + _events_intensity( law , events , XF.shape[1:] , upper_side , anomaly = False )
+	
+	## pF
+	pF = law.sf( IF , time ) if upper_side else law.cdf( IF , time )
+	
+	## Go to counter factual world
+	law.set_covariable( XC[...,np.newaxis] , time )
+	pC = law.sf( IF , time ) if upper_side else law.cdf( IF , time )
+	IC = law.isf( pF , time ) if upper_side else law.icdf( pF , time )
+	
+	return pC,pF,IC,IF
+##}}}
+
 def statistics_fixed_IF( clim , event = None , verbose = False ):##{{{
 	"""
 	NSSEA.statistics_fixed_IF
@@ -156,8 +318,9 @@ def statistics_fixed_IF( clim , event = None , verbose = False ):##{{{
 	---------
 	clim : NSSEA.Climatology
 		A clim variable
-	event : NSSEA.Event
-		If None, clim.event is used.
+	event : NSSEA.Event or list of NSSEA.Event
+		If None, clim.event is used. If a list, all events are computed
+		together, and clim.stats has a last dimension "event".
 	verbose: bool
 		Print state of execution or not
 	
@@ -178,72 +341,42 @@ def statistics_fixed_IF( clim , event = None , verbose = False ):##{{{
 	dI: IF - IC
 	
 	"""
-	## Usefull variables
-	if event is None:
-		event = clim.event
-	time           = clim.time
-	n_time         = clim.n_time
-	models         = clim.model
-	n_model        = clim.n_model
-	n_sample       = clim.n_sample
-	samples        = clim.sample
-	n_stat         = 6
-	upper_side     = event.side == "upper"
-	event_time     = event.time
+	return _statistics_run( clim , _statistics_fixed_IF_block , event , "statistics_fixed_IF" , verbose )
+##}}}
+
+def _statistics_fixed_pF_block( law , coef , XF , XC , time , events ):##{{{
+	"""
+	NSSEA._statistics_fixed_pF_block
+	================================
+	Statistics of NSSEA.statistics_fixed_pF for one block, see NSSEA._statistics_run.
+	"""
+	upper_side = events[0].side == "upper"
 	
+	## Law with all samples / models of the block, params are of shape (n_time,n_sample_block,n_model_block,1)
+	law.set_params( coef[...,np.newaxis] )
 	
-	## Output
-	stats = xr.DataArray( np.zeros( (n_time,n_sample + 1,n_stat,n_model) ) , coords = [clim.X.time , clim.X.sample , ["pC","pF","IC","IF","PR","dI"] , models ] , dims = ["time","sample","stats","model"] )
+	## Go to factual world
+	law.set_covariable( XF[...,np.newaxis] , time )
+	shape = XF.shape + (len(events),)
 	
-	## 
-	law = clim.ns_law
-	pb = ProgressBar( n_model * (n_sample + 1) , "statistics_fixed_IF" , verbose = verbose )
-	for m in models:
-		for s in samples:
-			pb.print()
-			
-			## Start with params
-			law.set_params( clim.law_coef.loc[:,s,m].values )
-			
-			## Go to factual world
-			law.set_covariable( clim.X.loc[:,s,"F",m].values , time )
-			
-			## Find value of event definition
-			if event.type in ["anomaly","value"]:
-				IF = np.zeros(n_time) + event.value
-			elif event.type == "Rt":
-				pF = np.zeros(n_time) + 1. / event.value
-				IF = np.zeros(n_time) + ( law.isf( pF , event.time ) if upper_side else law.icdf( pF , event.time ) )
-			elif event.type == "p":
-				pF = np.zeros(n_time) + event.value
-				IF = np.zeros(n_time) + ( law.isf( pF , event.time ) if upper_side else law.icdf( pF , event.time ) )
-			
-			## Set IF
-			stats.loc[:,s,"IF",m] = IF
-			
-			## pF
-			stats.loc[:,s,"pF",m] = law.sf( IF , time ) if upper_side else law.icdf( IF , time )
-			pF = stats.loc[:,s,"pF",m].values.squeeze()
-			
-			## Find pC
-			law.set_covariable( clim.X.loc[:,s,"C",m].values , time )
-			stats.loc[:,s,"pC",m] = law.sf( IF , time ) if upper_side else law.cdf( IF , time )
-			
-			## IC
-			stats.loc[:,s,"IC",m] = law.isf( pF , time ) if upper_side else law.icdf( pF , time )
-	
-	
-	## PR
-	stats.loc[:,:,"PR",:] = stats.loc[:,:,"pF",:] / stats.loc[:,:,"pC",:]
-	
-	## deltaI
-	stats.loc[:,:,"dI",:] = stats.loc[:,:,"IF",:] - stats.loc[:,:,"IC",:]
-	
-	clim.statistics = stats
+	## Find value of event definition
+	pF  = np.zeros( XF.shape[1:] + (len(events),) ) + np.array( [ 1. / e.value if e.type == "Rt" else e.value for e in events ] , dtype = float )
+	idx = [ i for i,e in enumerate(events) if e.type in ["anomaly","value"] ]
+	if len(idx) > 0:
+		l_event = [ events[i] for i in idx ]
+		value   = _events_intensity( law , l_event , XF.shape[1:] , upper_side , anomaly = True )
+		pF[...,idx] = _events_at_time( law.sf if upper_side else law.cdf , l_event , value )
+	pF = np.zeros(shape) + pF
 	
-	pb.end()
+	## IF
+	IF = law.isf( pF , time ) if upper_side else law.icdf( pF , time )
 	
-	return clim
+	## Go to counter factual world
+	law.set_covariable( XC[...,np.newaxis] , time )
+	pC = law.sf( IF , time ) if upper_side else law.cdf( IF , time )
+	IC = law.isf( pF , time ) if upper_side else law.icdf( pF , time )
+	
+	return pC,pF,IC,IF
 ##}}}
 
 def statistics_fixed_pF( clim , event = None , verbose = False ):##{{{
@@ -256,8 +389,9 @@ def statistics_fixed_pF( clim , event = None , verbose = False ):##{{{
 	---------
 	clim : NSSEA.Climatology
 		A clim variable
-	event : NSSEA.Event
-		If None, clim.event is used.
+	event : NSSEA.Event or list of NSSEA.Event
+		If None, clim.event is used. If a list, all events are computed
+		together, and clim.stats has a last dimension "event".
 	verbose: bool
 		Print state of execution or not
 	
@@ -278,74 +412,42 @@ def statistics_fixed_pF( clim , event = None , verbose = False ):##{{{
 	dI: IF - IC
 	
 	"""
-	## Usefull variables
-	if event is None:
-		event = clim.event
-	time           = clim.time
-	n_time         = clim.n_time
-	models         = clim.model
-	n_model        = clim.n_model
-	n_sample       = clim.n_sample
-	samples        = clim.sample
-	n_stat         = 6
-	upper_side     = event.side == "upper"
-	event_time     = event.time
+	return _statistics_run( clim , _statistics_fixed_pF_block , event , "statistics_fixed_pF" , verbose )
+##}}}
+
+def _statistics_attribution_block( law , coef , XF , XC , time , events ):##{{{
+	"""
+	NSSEA._statistics_attribution_block
+	===================================
+	Statistics of NSSEA.statistics_attribution for one block, see NSSEA._statistics_run.
+	"""
+	upper_side = events[0].side == "upper"
 	
+	## Law with all samples / models of the block, params are of shape (n_time,n_sample_block,n_model_block,1)
+	law.set_params( coef[...,np.newaxis] )
 	
-	## Output
-	stats = xr.DataArray( np.zeros( (n_time,n_sample + 1,n_stat,n_model) ) , coords = [clim.X.time , clim.X.sample , ["pC","pF","IC","IF","PR","dI"] , models ] , dims = ["time","sample","stats","model"] )
+	## Go to factual world
+	law.set_covariable( XF[...,np.newaxis] , time )
+	shape = XF.shape + (len(events),)
 	
-	## 
-	law = clim.ns_law
-	pb = ProgressBar( n_model * (n_sample + 1) , "statistics_fixed_pF" , verbose = verbose )
-	for m in models:
-		for s in samples:
-			pb.print()
-			
-			## Start with params
-			law.set_params( clim.law_coef.loc[:,s,m].values )
-			
-			## Go to factual world
-			law.set_covariable( clim.X.loc[:,s,"F",m].values , time )
-			
-			## Find value of event definition
-			if event.type == "anomaly":
-				value = np.mean( law.meant(event.reference) ) + event.value
-				pF = np.zeros(n_time) + ( law.sf( value , event.time ) if upper_side else law.cdf( value , event.time ) )
-			elif event.type == "value":
-				value = event.value
-				pF = np.zeros(n_time) + ( law.sf( value , event.time ) if upper_side else law.cdf( value , event.time ) )
-			elif event.type == "Rt":
-				pF = np.zeros(n_time) + 1. / event.value
-			elif event.type == "p":
-				pF = np.zeros(n_time) + event.value
-			
-			## Set pF
-			stats.loc[:,s,"pF",m] = pF
-			
-			## IF
-			stats.loc[:,s,"IF",m] = law.isf( pF , time ) if upper_side else law.icdf( pF , time )
-			value = stats.loc[:,s,"IF",m].values.squeeze()
-			
-			## Find pC
-			law.set_covariable( clim.X.loc[:,s,"C",m].values , time )
-			stats.loc[:,s,"pC",m] = law.sf( value , time ) if upper_side else law.cdf( value , time )
-			
-			## IC
-			stats.loc[:,s,"IC",m] = law.isf( pF , time ) if upper_side else law.icdf( pF , time )
-	
-	
-	## PR
-	stats.loc[:,:,"PR",:] = stats.loc[:,:,"pF",:] / stats.loc[:,:,"pC",:]
-	
-	## deltaI
-	stats.loc[:,:,"dI",:] = stats.loc[:,:,"IF",:] - stats.loc[:,:,"IC",:]
-	
-	clim.statistics = stats
+	## Find value of event definition
+	value = np.zeros(shape) + _events_intensity( law , events , XF.shape[1:] , upper_side , anomaly = True )
 	
-	pb.end()
+	## Find pF
+	pF = law.sf( value , time ) if upper_side else law.cdf( value , time )
 	
-	return clim
+	## Find probability of the event in factual world
+	pF_event = np.zeros(shape) + np.stack( [ pF[time == e.time,:,:,i] for i,e in enumerate(events) ] , axis = -1 )
+	
+	## IF
+	IF = law.isf( pF_event , time ) if upper_side else law.icdf( pF_event , time )
+	
+	## Go to counter factual world
+	law.set_covariable( XC[...,np.newaxis] , time )
+	pC = law.sf( value , time ) if upper_side else law.cdf( value , time )
+	IC = law.isf( pF_event , time ) if upper_side else law.icdf( pF_event , time )
+	
+	return pC,pF,IC,IF
 ##}}}
 
 def statistics_attribution( clim , event = None , verbose = False ):##{{{
@@ -358,8 +460,9 @@ def statistics_attribution( clim , event = None , verbose = False ):##{{{
 	---------
 	clim : NSSEA.Climatology
 		A clim variable
-	event : NSSEA.Event
-		If None, clim.event is used.
+	event : NSSEA.Event or list of NSSEA.Event
+		If None, clim.event is used. If a list, all events are computed
+		together, and clim.stats has a last dimension "event".
 	verbose: bool
 		Print state of execution or not
 	
@@ -380,74 +483,27 @@ def statistics_attribution( clim , event = None , verbose = False ):##{{{
 	dI: IF - IC
 	
 	"""
-	## Usefull variables
-	if event is None:
-		event = clim.event
-	time           = clim.time
-	n_time         = clim.n_time
-	models         = clim.model
-	n_model        = clim.n_model
-	n_sample       = clim.n_sample
-	samples        = clim.sample
-	n_stat         = 6
-	upper_side     = event.side == "upper"
-	event_time     = event.time
-	
-	
-	## Output
-	stats = xr.DataArray( np.zeros( (n_time,n_sample + 1,n_stat,n_model) ) , coords = [clim.X.time , clim.X.sample , ["pC","pF","IC","IF","PR","dI"] , models ] , dims = ["time","sample","stats","model"] )
-	
-	## 
-	law = clim.ns_law
-	pb = ProgressBar( n_model * (n_sample + 1) , "statistics_attribution" , verbose = verbose )
-	for m in models:
-		for s in samples:
+	return _statistics_run( clim , _statistics_attribution_block , event , "statistics_attribution" , verbose )
+##}}}
+
+def _statistics_block_map( clim , fct , names , new_names , pb ):##{{{
+	"""
+	NSSEA._statistics_block_map
+	===========================
+	Add the stats new_names to clim.statistics, equal to fct applied to the
+	stats names, block by block (see NSSEA.Climatology.blocks), so only one
+	block of the statistics is in memory. A stat of new_names already in
+	clim.statistics is overwritten.
+	"""
+	stats = clim.data.stats.values.tolist()
+	clim._extend( "stats" , [ s for s in new_names if s not in stats ] )
+	stats = clim.data.stats.values.tolist()
+	with clim._stage():
+		for block in clim.blocks():
+			for s,ns in zip(names,new_names):
+				S = clim._read_block( "statistics" , { **block , "stats" : stats.index(s) } )
+				clim._write_block( "statistics" , fct(S) , { **block , "stats" : stats.index(ns) } )
 			pb.print()
-			
-			## Start with params
-			law.set_params( clim.law_coef.loc[:,s,m].values )
-			
-			## Go to factual world
-			law.set_covariable( clim.X.loc[:,s,"F",m].values , time )
-			
-			## Find value of event definition
-			if event.type == "anomaly":
-				value = np.zeros(n_time) + np.mean( law.meant(event.reference) ) + event.value
-			elif event.type == "value":
-				value = np.zeros(n_time) + event.value
-			elif event.type == "Rt":
-				value = np.zeros(n_time) + ( law.isf( 1. / event.value , event.time ) if upper_side else law.icdf( 1. / event.value , event.time ) )
-			elif event.type == "p":
-				value = np.zeros(n_time) + ( law.isf( event.value , event.time ) if upper_side else law.icdf( event.value , event.time ) )
-			
-			## Find pF
-			stats.loc[:,s,"pF",m] = law.sf( value , time ) if upper_side else law.cdf( value , time )
-			
-			## Find probability of the event in factual world
-			pF = np.zeros(n_time) + float(stats.loc[event.time,s,"pF",m])
-			
-			## IF
-			stats.loc[:,s,"IF",m] = law.isf( pF , time ) if upper_side else law.icdf( pF , time )
-			
-			## Find pC
-			law.set_covariable( clim.X.loc[:,s,"C",m].values , time )
-			stats.loc[:,s,"pC",m] = law.sf( value , time ) if upper_side else law.cdf( value , time )
-			
-			## IC
-			stats.loc[:,s,"IC",m] = law.isf( pF , time ) if upper_side else law.icdf( pF , time )
-	
-	
-	## PR
-	stats.loc[:,:,"PR",:] = stats.loc[:,:,"pF",:] / stats.loc[:,:,"pC",:]
-	
-	## deltaI
-	stats.loc[:,:,"dI",:] = stats.loc[:,:,"IF",:] - stats.loc[:,:,"IC",:]
-	
-	clim.statistics = stats
-	
-	pb.end()
-	
-	return clim
 ##}}}
 
 def add_return_time( clim , verbose = False ):##{{{
@@ -468,16 +524,11 @@ def add_return_time( clim , verbose = False ):##{{{
 	
 	"""
 	
-	pb = ProgressBar( 1 , "add_return_time" , verbose )
+	pb = ProgressBar( clim.n_blocks , "add_return_time" , verbose )
 	
-	xrdims   = ["time","sample","stats","model"]
-	xrcoords = [clim.time,clim.sample,["RtC","RtF"],clim.model]
-	Rt = xr.DataArray( np.zeros( (clim.n_time,clim.n_sample+1,2,clim.n_model) ) , dims = xrdims , coords = xrcoords )
-	Rt.loc[:,:,:,:,] = 1. / clim.statistics.loc[:,:,["pC","pF"]].values
-	pb.print()
-	
-	data = xr.Dataset( { "X" : None , "law_coef" : None , "statistics" : Rt } )
-	clim.data = xr.concat( [clim.data,data] , dim = "stats" , data_vars = ["statistics"] , coords = "minimal" , compat = "override" )
+	## Rt = 1 / p, written block by block in new stats of clim.statistics
+	## (the statistics can have a dimension event after the model)
+	_statistics_block_map( clim , lambda p : 1. / p , ["pC","pF"] , ["RtC","RtF"] , pb )
 	
 	pb.end()
 	
@@ -501,16 +552,12 @@ def add_FAR( clim , verbose = False ):##{{{
 		A clim variable with FAR
 	
 	"""
-	pb = ProgressBar( 1 , "add_FAR" , verbose )
-	
-	xrdims   = ["time","sample","stats","model"]
-	xrcoords = [clim.time,clim.sample,["FAR"],clim.model]
-	FAR = xr.DataArray( np.zeros( (clim.n_time,clim.n_sample+1,1,clim.n_model) ) , dims = xrdims , coords = xrcoords )
-	FAR.loc[:,:,"FAR",:] =  1. - 1. / clim.statistics.loc[:,:,"PR",:].values
-	pb.print()
+	pb = ProgressBar( clim.n_blocks , "add_FAR" , verbose )
 	
-	data = xr.Dataset( { "X" : None , "law_coef" : None , "statistics" : FAR } )
-	clim.data = xr.concat( [clim.data,data] , dim = "stats" , data_vars = ["statistics"] , coords = "minimal" , compat = "override" )
+	## FAR = 1 - 1 / PR, written block by block in a new stat of
+	## clim.statistics (the statistics can have a dimension event after the
+	## model)
+	_statistics_block_map( clim , lambda PR : 1. - 1. / PR , ["PR"] , ["FAR"] , pb )
 	
 	pb.end()
 	
@@ -538,14 +585,17 @@ def add_bias( clim , bias , verbose = False ):##{{{
 	
 	"""
 	
-	pb = ProgressBar( clim.n_model , "add_bias" , verbose )
+	pb = ProgressBar( clim.n_blocks , "add_bias" , verbose )
 	
-	stats = clim.statistics
-	for m in clim.model:
-		stats.loc[:,:,"IF",m] += bias[m]
-		stats.loc[:,:,"IC",m] += bias[m]
-		pb.print()
-	clim.statistics = stats
+	stats = clim.data.stats.values.tolist()
+	with clim._stage():
+		for block in clim.blocks():
+			b = np.array( [ bias[m] for m in clim.model[block["model"]] ] )
+			for s in ["IF","IC"]:
+				sblock = { **block , "stats" : stats.index(s) }
+				S = clim._read_block( "statistics" , sblock )
+				clim._write_block( "statistics" , S + b.reshape( (1,1,-1) + (1,) * ( S.ndim - 3 ) ) , sblock )
+			pb.print()
 	pb.end()
 	
 	return clim
@@ -578,16 +628,15 @@ def build_params_along_time( clim , verbose = False ):##{{{
 	s_params = xr.DataArray( np.zeros( (clim.n_time,clim.n_sample+1,2,len(l_params),clim.n_model) ) , dims = xrdims , coords = xrcoords )
 	
 	
-	pb = ProgressBar(  clim.n_model * (clim.n_sample + 1) , "build_params_along_time" , verbose = verbose )
-	for m in clim.model:
-		for s in s_params.sample:
-			pb.print()
-			
-			clim.ns_law.set_params( clim.law_coef.loc[:,s,m].values )
-			for f in s_params.forcing:
-				clim.ns_law.set_covariable( clim.X.loc[clim.time,s,f,m].values , clim.time )
-				for p in l_params:
-					s_params.loc[:,s,f,p,m] = clim.ns_law.lparams[p](clim.time)
+	pb = ProgressBar( 2 , "build_params_along_time" , verbose = verbose )
+	
+	## All samples / models are set together
+	ns_law.set_params( clim.law_coef.values )
+	for i,f in enumerate(s_params.forcing.values):
+		pb.print()
+		ns_law.set_covariable( clim.X.loc[clim.time,:,f,:].values , clim.time )
+		for j,p in enumerate(l_params):
+			s_params.values[:,:,i,j,:] = ns_law.lparams[p](clim.time)
 	
 	
 	if verbose: pb.end()
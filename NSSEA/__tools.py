@@ -89,8 +89,8 @@
 ###############
 
 import os
+import concurrent.futures as cf
 import numpy as np
-import scipy.linalg as scl
 
 
 class ProgressBar: ##{{{
@@ -150,40 +150,150 @@ class ProgressBar: ##{{{
 ## Functions ##
 ###############
 
+def pool_map( fct , l_args , n_jobs = 1 , executor = None ):##{{{
+	"""
+	NSSEA.pool_map
+	==============
+	Apply fct to each element of l_args, serially or in a pool of process.
+	Results are yielded in the order of l_args.
+	
+	Arguments
+	---------
+	fct     : callable
+		Function of one argument, must be picklable if a pool is used
+	l_args  : list
+		List of arguments
+	n_jobs  : integer
+		Number of process. If n_jobs > 1, a concurrent.futures.ProcessPoolExecutor
+		is used. If n_jobs < 0, all CPU are used. Default is 1 (serial)
+	executor: concurrent.futures.Executor or None
+		An executor already started, used instead of n_jobs
+	
+	Return
+	------
+	out : generator
+		Generator of fct(args) for args in l_args
+	"""
+	if n_jobs is not None and n_jobs < 0:
+		n_jobs = os.cpu_count()
+	
+	if executor is not None:
+		yield from executor.map( fct , l_args )
+	elif n_jobs is not None and n_jobs > 1:
+		with cf.ProcessPoolExecutor( max_workers = n_jobs ) as pool:
+			yield from pool.map( fct , l_args )
+	else:
+		yield from map( fct , l_args )
+##}}}
+
+class SymmetricEigen:##{{{
+	"""
+	NSSEA.SymmetricEigen
+	====================
+	Eigen decomposition of a symmetric matrix (with np.linalg.eigh). The
+	decomposition is kept, so the square root, the positive part and the
+	pseudo inverse of the matrix are all built from one factorization.
+	
+	Example
+	-------
+	>> eig = SymmetricEigen(cov)
+	>> root_cov = eig.squareroot()
+	>> inv_cov  = eig.pinv()
+	"""
+	
+	def __init__( self , M ):##{{{
+		"""
+		Constructor
+		
+		Arguments
+		---------
+		M : np.array
+			A symmetric matrix, only the symmetric part (M + M.T) / 2 is used
+		"""
+		M = np.asarray(M)
+		self.lbda,self.v = np.linalg.eigh( ( M + M.T ) / 2 )
+	##}}}
+	
+	@property
+	def lbda_positive(self):##{{{
+		return np.where( self.lbda > 0 , self.lbda , 0 )
+	##}}}
+	
+	def _build( self , d ):##{{{
+		return ( self.v * d ) @ self.v.T
+	##}}}
+	
+	def positive_part(self):##{{{
+		"""
+		Positive part, i.e. negative eigen values are set to 0
+		"""
+		return self._build( self.lbda_positive )
+	##}}}
+	
+	def squareroot(self):##{{{
+		"""
+		Symmetric square root of the positive part
+		"""
+		return self._build( np.sqrt(self.lbda_positive) )
+	##}}}
+	
+	def factor(self):##{{{
+		"""
+		Matrix L such that L @ L.T is the positive part
+		"""
+		return self.v * np.sqrt(self.lbda_positive)
+	##}}}
+	
+	def pinv( self , rtol = None ):##{{{
+		"""
+		Pseudo inverse, eigen values lower than rtol * max(|eigen values|) are
+		ignored. If rtol is None, it is n * machine precision.
+		"""
+		if rtol is None:
+			rtol = self.lbda.size * np.finfo(float).eps
+		tol  = rtol * np.max( np.abs(self.lbda) , initial = 0 )
+		ilbda = np.zeros_like(self.lbda)
+		idx   = np.abs(self.lbda) > tol
+		ilbda[idx] = 1. / self.lbda[idx]
+		return self._build( ilbda )
+	##}}}
+	
+##}}}
+
 def matrix_squareroot( M , disp = False ):##{{{
 	"""
 	NSSEA.matrix_squareroot
 	=======================
-	Method which compute the square root of a matrix (in fact just call scipy.linalg.sqrtm), but if disp == False, never print warning
+	Method which compute the square root of a symmetric matrix, with
+	np.linalg.eigh. Negative eigen values (numerical noise of a covariance
+	matrix) are set to 0.
 	
 	Arguments
 	---------
 	M   : np.array
-		A matrix
+		A symmetric matrix
 	disp: bool
-		disp error (or not)
+		Not used, kept for compatibility with the previous version based on
+		scipy.linalg.sqrtm
 	
 	Return
 	------
 	Mp : np.array
 		The square root of M
 	"""
-	Mh = scl.sqrtm( M , disp = disp )
-	if not disp:
-		Mh = Mh[0]
-	return np.real(Mh)
+	return SymmetricEigen(M).squareroot()
 ##}}}
 
 def matrix_positive_part( M ):##{{{
 	"""
 	NSSEA.matrix_positive_part
 	==========================
-	Return the positive part of a matrix
+	Return the positive part of a symmetric matrix
 	
 	Arguments
 	---------
 	M  : np.array
-		A matrix
+		A symmetric matrix
 	
 	Return
 	------
@@ -191,11 +301,7 @@ def matrix_positive_part( M ):##{{{
 		The positive part of M
 	
 	"""
-	lbda,v = np.linalg.eig(M)
-	lbda   = np.real(lbda)
-	v      = np.real(v)
-	lbda[lbda<0] = 0
-	return v @ np.diag(lbda) @ v.T
+	return SymmetricEigen(M).positive_part()
 ##}}}
 
 def barycenter_covariance( lcov , weights = None , maxit = 50 , tol = 1e-3 , verbose = False ):##{{{
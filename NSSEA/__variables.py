@@ -89,8 +89,14 @@
 ## Libraries ##
 ###############
 
+import os
+import contextlib
 import numpy   as np
 import xarray  as xr
+import netCDF4 as nc4
+
+from .__checkpoint import Checkpoint
+from .__checkpoint import _hash
 
 
 #############
@@ -148,6 +154,47 @@ class Event: ##{{{
 		return out
 ##}}}
 
+def _netcdf_engine( ifile ):##{{{
+	"""
+	Engine used to read ifile: "scipy" (memory-mapped) for a netcdf3 file,
+	else None (the default engine of xarray).
+	"""
+	try:
+		with open( ifile , "rb" ) as f:
+			magic = f.read(4)
+	except OSError:
+		return None
+	return "scipy" if magic in [b"CDF\x01",b"CDF\x02"] else None
+##}}}
+
+## Dimensions of a store which can grow in place (new statistics, or the
+## multi-model synthesis), see Climatology._extend
+_UNLIMITED_DIMS = ["stats","model"]
+
+def _unlimited_dims( data ):##{{{
+	"""
+	Dimensions of data written as unlimited in a store.
+	"""
+	return [ d for d in _UNLIMITED_DIMS if d in data.dims ]
+##}}}
+
+def _netcdf_chunks( ifile ):##{{{
+	"""
+	Chunks along sample and model of the variables of ifile, None if the
+	variables are not chunked.
+	"""
+	with nc4.Dataset( ifile , "r" ) as ncfile:
+		for var in ncfile.variables.values():
+			dims = var.dimensions
+			if not ( "sample" in dims and "model" in dims ):
+				continue
+			chunking = var.chunking()
+			if chunking == "contiguous":
+				return None
+			return { d : c for d,c in zip(dims,chunking) if d in ["sample","model"] }
+	return None
+##}}}
+
 class Climatology: ##{{{
 	"""
 	NSSEA.Climatology
@@ -158,7 +205,39 @@ class Climatology: ##{{{
 	- law_coef: the coefficient of the law fitted
 	- statistics: the statistics computed
 	- mm_mean : the multi-model mean
-	- mm_cov : the multi-model covariance matrix
+	- mm_cov : the multi-model covariance matrix (or its factored form
+	  mm_cov_U, mm_cov_s and mm_cov_d, see NSSEA.infer_multi_model)
+	- mcmc_info : the statistics of the chains drawn by constrain_law
+	
+	By default the dataset is in memory. With Climatology.to_store, the
+	dataset is backed by a netcdf file, chunked along sample and model, and
+	the statistics, the multi-model synthesis and the quantiles of the plots
+	are computed block by block (see Climatology.blocks), so the variables
+	are never fully in memory. A stage opens the file once for all its
+	blocks, and writes the variables in place: the dimensions stats and
+	model are unlimited, so the new stats (add_return_time, add_FAR) and the
+	model Multi_Synthesis are appended without re-writing the file.
+	
+	If Climatology.checkpoint is a directory, the stages covariates_FC_GAM,
+	nslaw_fit, constrain_law and the statistics save their blocks of
+	(model,sample) in this directory as soon as they are computed, and skip
+	the blocks already saved when they are restarted with the same inputs
+	and seed (see NSSEA.Checkpoint).
+	
+	If Climatology.cache is a NSSEA.StageCache, the results of the stages
+	covariates_FC_GAM, nslaw_fit and infer_multi_model are saved in the cache,
+	and read from the cache when the stage is called again with the same
+	inputs (for example with another event). The hash of the inputs of the
+	stage which has computed X or law_coef is kept with the climatology, and
+	forgotten as soon as the variable is written or accessed through
+	Climatology.X or law_coef, so infer_multi_model finds its result from
+	these hashes without reading X and law_coef.
+	
+	Climatology.copy is a copy-on-write copy: the variables are shared with
+	the original climatology, and a variable is duplicated only when it is
+	accessed through Climatology.X, law_coef, statistics or mcmc_info (which
+	can be modified in place). Climatology.data gives a read access without
+	copy.
 	
 	"""
 	
@@ -180,6 +259,13 @@ class Climatology: ##{{{
 		clim: [NSSEA.Climatology]
 		"""
 		samples = ["BE"] + [ 'S{0:{fill}{align}{n}}'.format(i,fill="0",align=">",n=int(np.floor(np.log10(n_sample))+1)) for i in range(n_sample)]
+		self.store  = None
+		self.chunks = None
+		self._ncfile = None
+		self.checkpoint = None
+		self.cache  = None
+		self._shared = set()
+		self._inputs = {}
 		self.event  = event
 		self.data   = xr.Dataset( { "time" : time , "model" : models , "sample" : samples , "anomaly_period" : event.reference } )
 		self.ns_law = ns_law
@@ -206,27 +292,301 @@ class Climatology: ##{{{
 		return self.__str__()
 	##}}}
 	
+	## Storage {{{
+	
+	@property
+	def data(self):
+		return self._data
+	
+	@data.setter
+	def data( self , data ):
+		if self.store is None:
+			self._data = data
+			return
+		## The store is re-written, data can be read from the current store
+		data.attrs = { **self._data.attrs , **data.attrs }
+		tmp = self.store + ".tmp"
+		data.to_netcdf( tmp , encoding = self._encoding( data , self.chunks ) , unlimited_dims = _unlimited_dims(data) )
+		data.close()
+		self._data.close()
+		os.replace( tmp , self.store )
+		self._data = xr.open_dataset( self.store )
+	
+	def _encoding( self , data , chunks ):##{{{
+		"""
+		Encoding of the netcdf file: variables with a sample or model
+		dimension are chunked with the sizes given in chunks.
+		"""
+		if chunks is None:
+			return None
+		encoding = {}
+		for name in data.data_vars:
+			var = data[name]
+			if "sample" in var.dims or "model" in var.dims:
+				encoding[name] = { "chunksizes" : tuple( max( 1 , min( chunks.get( d , var.sizes[d] ) , var.sizes[d] ) ) for d in var.dims ) }
+		return encoding
+	##}}}
+	
+	def to_store( self , ofile , chunks = { "sample" : 100 , "model" : 1 } ):##{{{
+		"""
+		Write the clim in the netcdf file ofile, chunked along the dimensions
+		sample and model, and use this file as storage: the dataset is then
+		read lazily from the file, variables are written in the file, and the
+		statistics functions write their results block by block.
+		
+		Arguments
+		---------
+		ofile  : [file name] File of the store
+		chunks : [dict] Size of the chunks along "sample" and "model"
+		"""
+		self.to_netcdf( ofile , chunks )
+		self._data.close()
+		self.store  = ofile
+		self.chunks = chunks
+		self._data  = xr.open_dataset( ofile )
+	##}}}
+	
+	def blocks( self , full_sample = False ):##{{{
+		"""
+		Generator of the blocks of (sample,model) following clim.chunks, each
+		block is a dict { "sample" : slice , "model" : slice }, usable with
+		DataArray.isel. Only one block if clim.chunks is None. If full_sample
+		is True, a block contains all the samples of its models (used for the
+		reductions along the samples, e.g. the quantiles).
+		"""
+		chunks   = self.chunks if self.chunks is not None else {}
+		n_sample = self.n_sample + 1
+		n_model  = self.n_model
+		c_sample = n_sample if full_sample else chunks.get( "sample" , n_sample )
+		c_model  = chunks.get( "model"  , n_model  )
+		for m in range(0,n_model,c_model):
+			for s in range(0,n_sample,c_sample):
+				yield { "sample" : slice( s , min( s + c_sample , n_sample ) ) , "model" : slice( m , min( m + c_model , n_model ) ) }
+	##}}}
+	
+	@property
+	def n_blocks(self):
+		return sum( 1 for _ in self.blocks() )
+	
+	def _checkpoint( self , stage , *inputs ):##{{{
+		"""
+		NSSEA.Checkpoint of the stage for these inputs, None if
+		clim.checkpoint is None.
+		"""
+		if self.checkpoint is None:
+			return None
+		return Checkpoint( self.checkpoint , stage , *inputs )
+	##}}}
+	
+	def _cache_get( self , stage , inputs ):##{{{
+		"""
+		Result of the stage for these inputs read in clim.cache, None if
+		there is no cache, if inputs is None or if the result is not cached.
+		"""
+		if self.cache is None or inputs is None:
+			return None
+		return self.cache.get( stage , *inputs )
+	##}}}
+	
+	def _cache_put( self , stage , inputs , **arrays ):##{{{
+		"""
+		Save the result of the stage for these inputs in clim.cache, if
+		there is a cache and inputs is not None.
+		"""
+		if self.cache is None or inputs is None:
+			return
+		self.cache.put( stage , inputs , **arrays )
+	##}}}
+	
+	def _set_inputs( self , name , stage , inputs ):##{{{
+		"""
+		Keep the hash of the inputs of the stage which has computed the
+		variable name (nothing if inputs is None), see _get_inputs.
+		"""
+		self._inputs.pop( name , None )
+		if inputs is not None:
+			self._inputs[name] = _hash( stage , *inputs )
+	##}}}
+	
+	def _get_inputs( self , name ):##{{{
+		"""
+		Hash of the inputs of the stage which has computed the variable name,
+		None if it is unknown or if the variable has been modified since.
+		"""
+		return self._inputs.get(name)
+	##}}}
+	
+	@contextlib.contextmanager
+	def _stage( self ):##{{{
+		"""
+		Context of a stage writing in the store: the netcdf file is opened
+		once, and all the blocks are read (_read_block) and written
+		(_write_block) with this handle. The lazy dataset clim.data is closed
+		during the stage (a netcdf file can not be opened twice), and opened
+		again at the end. Nothing is done without store, or in a stage.
+		"""
+		if self.store is None or self._ncfile is not None:
+			yield
+			return
+		self._data.close()
+		self._ncfile = nc4.Dataset( self.store , "a" )
+		self._ncfile.set_auto_mask(False)
+		try:
+			yield
+		finally:
+			self._ncfile.close()
+			self._ncfile = None
+			self._data = xr.open_dataset( self.store )
+	##}}}
+	
+	def _new_variable( self , name , coords , dims ):##{{{
+		"""
+		Allocate the variable name (filled by nan), to be written with
+		_write_block. With a store, the variable is created in the file, or,
+		if it already exists with the same dimensions, re-used in place (only
+		its coordinates are written, all its blocks must then be written).
+		The store is re-written only if the variable exists with other
+		dimensions, because a netcdf variable can not be removed.
+		"""
+		shape = tuple( len(c) for c in coords )
+		if name in self._data.variables and ( self._data[name].dims != tuple(dims) or self._data[name].shape != shape ):
+			## The variable is removed, with the coordinates used only by it
+			others = [ v.dims for k,v in self._data.data_vars.items() if k != name ]
+			unused = [ d for d in self._data[name].dims if d in self._data.coords and d not in ["time","sample","model"] and not any( d in o for o in others ) ]
+			self.data = self._data.drop_vars( [name] + unused )
+		if self.store is None:
+			self._add_variable( name , xr.DataArray( np.zeros(shape) + np.nan , coords = coords , dims = dims ) )
+			return
+		with self._stage():
+			ncfile = self._ncfile
+			for d,c in zip(dims,coords):
+				c = np.asarray(c)
+				c = c.astype(object) if c.dtype.kind in ["U","S","O"] else c
+				if d not in ncfile.dimensions:
+					ncfile.createDimension( d , None if d in _UNLIMITED_DIMS else c.size )
+					ncfile.createVariable( d , str if c.dtype.kind == "O" else c.dtype , (d,) )
+				if d in ncfile.variables:
+					ncfile[d][:c.size] = c
+			if name not in ncfile.variables:
+				chunksizes = tuple( max( 1 , min( self.chunks.get( d , n ) , n ) ) for d,n in zip(dims,shape) )
+				ncfile.createVariable( name , "f8" , dims , fill_value = np.nan , chunksizes = chunksizes )
+	##}}}
+	
+	def _read_block( self , name , block ):##{{{
+		"""
+		Values of the block (dict of slices or indices by dimension) of the
+		variable name. In a stage (see _stage), they are read with the handle
+		of the stage.
+		"""
+		if self._ncfile is None:
+			return self._data[name].isel( { d : i for d,i in block.items() if d in self._data[name].dims } ).values
+		var = self._ncfile[name]
+		return var[tuple( block.get( d , slice(None) ) for d in var.dimensions )]
+	##}}}
+	
+	def _write_block( self , name , values , block ):##{{{
+		"""
+		Write values in the block (dict of slices or indices by dimension) of
+		the variable name. With a store, the values are written with the
+		handle of the current stage (see _stage), a single block written
+		outside of a stage opens the file for it.
+		"""
+		self._inputs.pop( name , None )
+		if self.store is None:
+			idx = tuple( block.get( d , slice(None) ) for d in self._data[name].dims )
+			self._own(name)
+			self._data[name].values[idx] = values
+			return
+		with self._stage():
+			var = self._ncfile[name]
+			var[tuple( block.get( d , slice(None) ) for d in var.dimensions )] = values
+	##}}}
+	
+	def _extend( self , dim , labels ):##{{{
+		"""
+		Append labels to the coordinate dim, the variables along dim are
+		extended with nan (to be written with _write_block). In a store where
+		dim is unlimited (see _UNLIMITED_DIMS), only the coordinate is written
+		in place, else the dataset is re-indexed.
+		"""
+		labels = np.asarray(labels)
+		if labels.size == 0:
+			return
+		self._inputs = { name : h for name,h in self._inputs.items() if name not in self._data.variables or dim not in self._data[name].dims }
+		if self.store is not None and dim in self._data.encoding.get( "unlimited_dims" , [] ):
+			n = self._data.sizes[dim]
+			with self._stage():
+				self._ncfile[dim][n:(n+labels.size)] = labels.astype(object) if labels.dtype.kind in ["U","S"] else labels
+			return
+		self._shared = { name for name in self._shared if name not in self._data.variables or dim not in self._data[name].dims }
+		self.data = self._data.reindex( { dim : np.hstack( (self._data[dim].values,labels) ) } )
+	##}}}
+	
+	def _own( self , name ):##{{{
+		"""
+		Copy-on-write: if the variable name is shared with another
+		climatology (see Climatology.copy), it is duplicated before being
+		returned for a possible modification in place.
+		"""
+		self._inputs.pop( name , None )
+		if name not in self._shared:
+			return
+		self._shared.discard(name)
+		if name in self._data.variables:
+			var = self._data[name].variable
+			var.values = np.array( var.values )
+	##}}}
+	
 	def _add_variable( self , name , variable ):##{{{
-		if name in self.data.variables:
-			self.data[name] = variable
+		self._inputs.pop( name , None )
+		if self.store is None:
+			self._shared.discard(name)
+			if name in self.data.variables:
+				self.data[name] = variable
+			else:
+				self.data = self.data.assign( { name : variable } )
+		elif name in self._data.variables and self._data[name].dims == variable.dims and self._data[name].shape == variable.shape:
+			## Same variable, values are written in the store
+			self._write_block( name , variable.values , {} )
+		elif name not in self._data.variables and all( self._data.sizes.get( d , n ) == n for d,n in variable.sizes.items() ):
+			## New variable, appended to the store
+			data = variable.to_dataset( name = name ).load()
+			self._data.close()
+			data.to_netcdf( self.store , mode = "a" , encoding = self._encoding( data , self.chunks ) , unlimited_dims = _unlimited_dims(data) )
+			self._data = xr.open_dataset( self.store )
 		else:
-			self.data = self.data.assign( { name : variable } )
+			## Dimensions are modified, the store is re-written
+			self.data = self.data.drop_vars( name , errors = "ignore" ).assign( { name : variable } )
+	##}}}
+	
 	##}}}
 	
 	def copy(self): ##{{{
 		"""
-		Build a copy of the NSSEA.Climatology variable.
+		Build a copy of the NSSEA.Climatology variable. In memory, the copy is
+		a copy-on-write: the arrays are shared by the two climatologies until
+		one of them accesses a variable through Climatology.X, law_coef,
+		statistics or mcmc_info, so only the variables modified are
+		duplicated. A climatology backed by a store is fully copied.
 		
 		Return
 		------
 		clim: [NSSEA.Climatology]
 		"""
 		clim = Climatology( self.event , self.time , self.model , self.n_sample , self.ns_law )
-		clim.data = self.data.copy(deep=True)
+		if self.store is None:
+			clim.data    = self.data.copy(deep=False)
+			clim._shared = set(clim.data.data_vars)
+			self._shared = self._shared | clim._shared
+		else:
+			clim.data = self.data.copy(deep=True)
+		clim.checkpoint = self.checkpoint
+		clim.cache      = self.cache
+		clim._inputs    = dict(self._inputs)
 		return clim
 	##}}}
 	
-	def to_netcdf( self , ofile ): ##{{{
+	def to_netcdf( self , ofile , chunks = None , format = None ): ##{{{
 		"""
 		Write NSSEA.Climatology to a netcdf file. The ns_law is not written int
 		the file.
@@ -234,6 +594,13 @@ class Climatology: ##{{{
 		Arguments
 		---------
 		ofile : [file name] File to write.
+		chunks: [dict or None] If not None, size of the chunks of the file
+		        along "sample" and "model", e.g. { "sample" : 100 , "model" : 1 },
+		        the dimensions "stats" and "model" are then unlimited (the
+		        file can be used as store, see Climatology.to_store)
+		format: [str or None] Format of the file (see xarray.Dataset.to_netcdf),
+		        a netcdf3 file ("NETCDF3_64BIT") is memory-mapped by
+		        Climatology.from_netcdf, but can not be chunked.
 		
 		"""
 		self.data.attrs["BE_is_median"]   = str(self.BE_is_median)
@@ -244,24 +611,39 @@ class Climatology: ##{{{
 		self.data.attrs["event.side"]     = self.event.side
 		self.data.attrs["event.variable"] = self.event.variable
 		self.data.attrs["event.unit"]     = self.event.unit
-		self.data.to_netcdf(ofile)
+		if format is not None and format.startswith("NETCDF3"):
+			## Encoding of a netcdf4 file (vlen strings, chunks) is not valid in netcdf3
+			data = self.data.copy()
+			for v in data.variables.values():
+				v.encoding = {}
+			data.to_netcdf( ofile , format = format , engine = "scipy" )
+		else:
+			self.data.to_netcdf( ofile , format = format , encoding = self._encoding( self.data , chunks ) , unlimited_dims = None if chunks is None else _unlimited_dims(self.data) )
 	
 	##}}}
 	
-	def from_netcdf( ifile , ns_law ):##{{{
+	def from_netcdf( ifile , ns_law , cache = False , store = False ):##{{{
 		"""
-		Read a NSSEA.Climatology from a netcdf file.
+		Read a NSSEA.Climatology from a netcdf file. The file is opened lazily:
+		only the attributes (event, BE_is_median) and the coordinates are read,
+		and the data variables are read when (and where) they are accessed. A
+		netcdf3 file is memory-mapped.
 		
 		Arguments
 		---------
 		ifile : [file name] File to read.
 		ns_law: [NSSEA.models.*] The statistical distribution
+		cache : [bool] If True, a data variable read is kept in memory (the
+		        behavior of xarray.open_dataset). Default is False, only the
+		        slices accessed are read, each time.
+		store : [bool] If True, ifile (a netcdf4 file) is used as store of the
+		        clim, with the chunks of the file (see Climatology.to_store).
 		
 		Return
 		------
 		clim: [NSSEA.Climatology]
 		"""
-		data = xr.open_dataset(ifile)
+		data = xr.open_dataset( ifile , cache = cache , engine = _netcdf_engine(ifile) )
 		args = (data.attrs["event.name"] , data.attrs["event.time"] , data.anomaly_period.values)
 		try:
 			args = args + (data.attrs["event.value"],)
@@ -269,9 +651,12 @@ class Climatology: ##{{{
 			args = args + (data.attrs["event.anomaly"],)
 		args = args + (data.attrs["event.type"] , data.attrs["event.side"] , data.attrs["event.variable"] , data.attrs["event.unit"])
 		event = Event(*args)
-		clim = Climatology( event , data.time.values , data.model.values , data.sample.size , ns_law )
+		clim = Climatology( event , data.time.values , data.model.values , data.sample.size - 1 , ns_law )
 		clim.data = data
-		clim.BE_is_median = bool(data.attrs["BE_is_median"])
+		clim.BE_is_median = str(data.attrs["BE_is_median"]) == "True"
+		if store:
+			clim.store  = ifile
+			clim.chunks = _netcdf_chunks(ifile)
 		return clim
 	##}}}
 	
@@ -331,6 +716,7 @@ class Climatology: ##{{{
 		models: [array] List of models to keep
 		"""
 		if type(models) is not list: models = [models]
+		self._inputs = {}
 		self.data = self.data.sel( model = models , drop = False )
 	##}}}
 	
@@ -387,6 +773,7 @@ class Climatology: ##{{{
 	@property
 	def X(self):
 		try:
+			self._own("X")
 			return self.data.X
 		except:
 			return None
@@ -402,6 +789,7 @@ class Climatology: ##{{{
 	@property
 	def law_coef(self):
 		try:
+			self._own("law_coef")
 			return self.data.law_coef
 		except:
 			return None
@@ -417,6 +805,7 @@ class Climatology: ##{{{
 	@property
 	def statistics(self):
 		try:
+			self._own("statistics")
 			return self.data.statistics
 		except:
 			return None
@@ -427,5 +816,21 @@ class Climatology: ##{{{
 	
 	##}}}
 	
+	## mcmc properties {{{
+	
+	@property
+	def mcmc_info(self):
+		try:
+			self._own("mcmc_info")
+			return self.data.mcmc_info
+		except:
+			return None
+	
+	@mcmc_info.setter
+	def mcmc_info( self , info ):
+		self._add_variable( "mcmc_info" , info )
+	
+	##}}}
+	
 ##}}}
 
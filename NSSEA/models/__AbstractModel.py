@@ -89,17 +89,76 @@
 ## Libraries ##
 ###############
 
+import warnings
 import numpy             as np
 import scipy.stats       as sc
-import scipy.interpolate as sci
 import SDFC              as sd
 import SDFC.link         as sdl
 
+from .__kernels import kernel_of
+from ..__mcmc   import adaptive_mcmc
+from ..__mcmc   import _adaptive_mcmc_kwargs
+
+
+###############
+## Functions ##
+###############
+
+def _warn_rate_accept( rate_accept , min_rate_accept , n_try ):##{{{
+	"""
+	Warning of a chain kept with a rate of acceptance lower than
+	min_rate_accept after n_try tries.
+	"""
+	warnings.warn( "drawn_bayesian: chain kept with a rate of acceptance {:.3f} lower than {} after {} tries".format( rate_accept , min_rate_accept , n_try ) , RuntimeWarning )
+##}}}
+
 
 #############
 ## Classes ##
 #############
 
+class ParamsTrajectory:##{{{
+	"""
+	NSSEA.models.ParamsTrajectory
+	=============================
+	Trajectory of a parameter along a time axis, stored in a contiguous array
+	of shape (time,...). Values are read by index when the time asked are
+	points of the time axis, and linearly interpolated otherwise.
+	"""
+	
+	def __init__( self , t , values ):##{{{
+		t      = np.asarray(t).ravel()
+		values = np.asarray(values)
+		if t.size > 1 and np.any( np.diff(t) < 0 ):
+			idx    = np.argsort(t)
+			t      = t[idx]
+			values = values[idx,...]
+		self.t      = t
+		self.values = np.ascontiguousarray(values)
+	##}}}
+	
+	def __call__( self , t ):##{{{
+		t   = np.asarray(t)
+		if np.any( t < self.t[0] ) or np.any( t > self.t[-1] ):
+			raise ValueError( "A value in t is outside of the time axis." )
+		idx = np.searchsorted( self.t , t )
+		
+		## Grid points, just an index
+		if np.all( self.t[idx] == t ):
+			return self.values[idx,...]
+		
+		## Linear interpolation
+		idx = np.clip( idx , 1 , self.t.size - 1 )
+		t0  = self.t[idx-1]
+		t1  = self.t[idx]
+		w   = np.reshape( (t - t0) / (t1 - t0) , t.shape + (1,) * (self.values.ndim - 1) )
+		v0  = self.values[idx-1,...]
+		v1  = self.values[idx,...]
+		return np.where( w == 0 , v0 , v0 + w * (v1 - v0) )
+	##}}}
+	
+##}}}
+
 class Params:##{{{
 	
 	def __init__( self , name , is_cst , link , name_tex = None ):##{{{
@@ -118,11 +177,21 @@ class Params:##{{{
 		return self._paramst(t)
 	##}}}
 	
+	def __getstate__( self ):##{{{
+		## The covariable is not sent to other process
+		state = self.__dict__.copy()
+		state["_paramst"] = None
+		return state
+	##}}}
+	
 	def set_covariable( self , X , t ):##{{{
+		## coef_ can be of shape (n_params,...), in this case X is of shape (t.size,...)
+		X = np.reshape( X , (-1,) + np.shape(self.coef_)[1:] )
 		if self.is_cst:
-			self._paramst = lambda x : self.link(self.coef_) + np.zeros_like(x)
+			values = self.link(self.coef_[0]) + np.zeros_like(X)
 		else:
-			self._paramst = sci.interp1d( t , self.link(  self.coef_[0] + X.ravel() * self.coef_[1] ) )
+			values = self.link( self.coef_[0] + X * self.coef_[1] )
+		self._paramst = ParamsTrajectory( t , values )
 	##}}}
 ##}}}
 
@@ -133,6 +202,7 @@ class AbstractModel:
 		self.name    = name
 		self.law     = law
 		self.sdlaw   = sdlaw
+		self.use_scipy = kwargs.get("use_scipy",False)
 		self.lparams = { p["name"] : Params(**p) for p in lparams }
 		self.n_ns_params = 0
 		for p in self.lparams:
@@ -183,17 +253,85 @@ class AbstractModel:
 		self.set_params(sdlaw.coef_)
 	##}}}
 	
-	def drawn_bayesian( self , Y , X  , n_mcmc_drawn , prior , min_rate_accept = 0.25 , **kwargs ):##{{{
+	def drawn_bayesian( self , Y , X  , n_mcmc_drawn , prior , min_rate_accept = 0.25 , seed = None , return_info = False , **kwargs ):##{{{
+		"""
+		Draw a Markov chain of the coefficients (with SDFC), the chain is drawn
+		again while its rate of acceptance is lower than min_rate_accept.
+		
+		Parameters
+		----------
+		seed : None or integer or list of integer
+			If not None, a new seed, drawn from a generator initialized with
+			seed, is given to np.random before each try.
+		return_info : bool
+			If True, a dict with the rate of acceptance and the number of try
+			is also returned.
+		adaptive : bool
+			If True (in kwargs), the chain is drawn by NSSEA.adaptive_mcmc
+			instead of SDFC: n_mcmc_drawn is the maximal length, the chain
+			stops as soon as it has converged and only the draws after the
+			burn-in are returned. See _drawn_bayesian_adaptive.
+		n_try_max : integer or None
+			In kwargs, maximal number of tries. The last chain is returned
+			(with a warning) if its rate of acceptance is still lower than
+			min_rate_accept. Default is 10 with adaptive, else None (no
+			limit).
+		"""
+		if kwargs.pop( "adaptive" , False ):
+			return self._drawn_bayesian_adaptive( Y , X , n_mcmc_drawn , prior , min_rate_accept , seed , return_info , **kwargs )
+		n_try_max = kwargs.pop( "n_try_max" , None )
 		sdkwargs = self._get_sdkwargs(X)
 		sdkwargs = {**sdkwargs,**kwargs}
 		sdlaw = self.sdlaw( method = "bayesian" )
+		rng   = None if seed is None else np.random.default_rng(seed)
 		test_rate = False
+		n_try     = 0
 		while not test_rate:
+			if rng is not None:
+				np.random.seed( rng.integers( 2**32 ) )
 			sdlaw.fit( Y , n_mcmc_drawn = n_mcmc_drawn , prior = prior , **sdkwargs )
 			test_rate = sdlaw.info_.rate_accept > min_rate_accept
+			n_try += 1
+			if not test_rate and n_try_max is not None and n_try >= n_try_max:
+				_warn_rate_accept( sdlaw.info_.rate_accept , min_rate_accept , n_try )
+				break
+		if return_info:
+			return sdlaw.info_.draw,{ "rate_accept" : sdlaw.info_.rate_accept , "n_try" : n_try }
 		return sdlaw.info_.draw
 	##}}}
 	
+	def _drawn_bayesian_adaptive( self , Y , X , n_mcmc_drawn , prior , min_rate_accept = 0.25 , seed = None , return_info = False , **kwargs ):##{{{
+		"""
+		Draw a Markov chain of the coefficients with NSSEA.adaptive_mcmc, the
+		initial state is drawn from the prior, and the chain is drawn again
+		while its rate of acceptance is lower than min_rate_accept. The
+		keywords n_burn, transition_scale, target_rate, rhat_max, ess_min,
+		check_every and n_mcmc_drawn_min are given to NSSEA.adaptive_mcmc, the
+		others are ignored. At most n_try_max chains are drawn (keyword,
+		default is 10), the last one is returned with a warning if its rate
+		of acceptance is still too low (rate_accept and n_try of the info
+		report it).
+		If return_info is True, the length of the chain, its R-hat, effective
+		sample size and convergence are also returned.
+		"""
+		mcmc_kwargs = _adaptive_mcmc_kwargs(kwargs)
+		rng = np.random.default_rng(seed)
+		test_rate = False
+		n_try     = 0
+		n_try_max = kwargs.get( "n_try_max" , 10 )
+		while not test_rate:
+			init = prior.rvs( random_state = rng ).reshape(1,-1)
+			draw,info = adaptive_mcmc( self , Y , X , prior , init , n_mcmc_drawn , seed = int(rng.integers( 2**32 )) , **mcmc_kwargs )
+			test_rate = info["rate_accept"][0] > min_rate_accept
+			n_try += 1
+			if not test_rate and n_try_max is not None and n_try >= n_try_max:
+				_warn_rate_accept( info["rate_accept"][0] , min_rate_accept , n_try )
+				break
+		if return_info:
+			return draw[0],{ "rate_accept" : info["rate_accept"][0] , "n_try" : n_try , "n_mcmc_drawn" : info["n_mcmc_drawn"][0] , "rhat" : info["rhat"][0] , "ess" : info["ess"][0] , "converged" : info["converged"][0] }
+		return draw[0]
+	##}}}
+	
 	def check( self , Y , X , t = None ):##{{{
 		return True
 	##}}}
@@ -215,14 +353,17 @@ class AbstractModel:
 	##}}}
 	
 	def get_params(self):##{{{
-		coef_ = np.array([])
-		for p in self.lparams:
-			coef_ = np.hstack( (coef_,self.lparams[p].coef_) )
-		return coef_
+		return np.concatenate( [self.lparams[p].coef_ for p in self.lparams] , axis = 0 )
 	##}}}
 	
 	def set_params( self , coef_ ):##{{{
-		if not coef_.size == self.n_ns_params:
+		"""
+		Set the coefficients. coef_ can be of shape (n_ns_params,...), the
+		extra dimensions (e.g. sample,model) are then broadcasted by
+		set_covariable and all stats methods.
+		"""
+		coef_ = np.asarray(coef_)
+		if not coef_.shape[0] == self.n_ns_params:
 			return
 		a,b = 0,0
 		for p in self.lparams:
@@ -240,6 +381,15 @@ class AbstractModel:
 	## Stats methods
 	##==============
 	
+	@property
+	def dist(self):##{{{
+		"""
+		Distribution used by the stats methods: the closed form kernels of
+		NSSEA.models (default), or the scipy.stats law if use_scipy is True.
+		"""
+		return self.law if self.use_scipy else kernel_of(self.law)
+	##}}}
+	
 	def _get_sckwargs( self , t ):##{{{
 		sckwargs = {}
 		for p in self.lparams:
@@ -262,7 +412,27 @@ class AbstractModel:
 			A time series following the NS law
 		"""
 		sckwargs = self._get_sckwargs(t)
-		return self.law.rvs( size = t.size , **sckwargs )
+		return self.dist.rvs( size = t.size , **sckwargs )
+	##}}}
+	
+	def logpdf( self , Y , t ):##{{{
+		"""
+		Log of the Probability Density Function
+		
+		Parameters
+		----------
+		Y : np.array
+			Value to estimate the log-density
+		t : np.array
+			Time
+		
+		Returns
+		-------
+		lp : np.array
+			log-density value
+		"""
+		sckwargs = self._get_sckwargs(t)
+		return self.dist.logpdf( Y , **sckwargs )
 	##}}}
 	
 	def cdf( self , Y , t ):##{{{
@@ -282,7 +452,7 @@ class AbstractModel:
 			CDF value
 		"""
 		sckwargs = self._get_sckwargs(t)
-		return self.law.cdf( Y , **sckwargs )
+		return self.dist.cdf( Y , **sckwargs )
 	##}}}
 	
 	def icdf( self , q , t ):##{{{
@@ -302,7 +472,7 @@ class AbstractModel:
 			Quantile
 		"""
 		sckwargs = self._get_sckwargs(t)
-		return self.law.ppf( q , **sckwargs )
+		return self.dist.ppf( q , **sckwargs )
 	##}}}
 	
 	def sf( self , Y , t ):##{{{
@@ -322,7 +492,7 @@ class AbstractModel:
 			survival value
 		"""
 		sckwargs = self._get_sckwargs(t)
-		return self.law.sf( Y , **sckwargs )
+		return self.dist.sf( Y , **sckwargs )
 	##}}}
 	
 	def isf( self , q , t ):##{{{
@@ -342,7 +512,7 @@ class AbstractModel:
 			values
 		"""
 		sckwargs = self._get_sckwargs(t)
-		return self.law.isf( q , **sckwargs )
+		return self.dist.isf( q , **sckwargs )
 	##}}}
 
 
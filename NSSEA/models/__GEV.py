@@ -129,9 +129,9 @@ class GEV(AbstractModel):
 	def meant( self , t ):##{{{
 		shapet = self.shapet(t)
 		idx = np.abs(shapet) > 1e-8
-		cst = np.zeros(shapet) + np.euler_gamma
+		cst = np.zeros_like(shapet) + np.euler_gamma
 		cst[idx] = ( scs.gamma( 1 - shapet[idx] ) - 1 ) / shapet[idx]
-		return self._loct(t) + self._scalet(t) * cst
+		return self.loct(t) + self.scalet(t) * cst
 	##}}}
 	
 	def mediant( self , t ):##{{{
@@ -139,8 +139,11 @@ class GEVMin(AbstractModel):
 		AbstractModel.fit( self , -Y , X )
 	##}}}
 	
-	def drawn_bayesian( self , Y , X  , n_mcmc_drawn , prior , min_rate_accept = 0.25 , **kwargs ):##{{{
-		return AbstractModel.drawn_bayesian( self , -Y , X , n_mcmc_drawn , prior , min_rate_accept , **kwargs )
+	def drawn_bayesian( self , Y , X  , n_mcmc_drawn , prior , min_rate_accept = 0.25 , seed = None , return_info = False , **kwargs ):##{{{
+		if kwargs.pop( "adaptive" , False ):
+			## logpdf of GEVMin already takes the opposite of Y
+			return self._drawn_bayesian_adaptive( Y , X , n_mcmc_drawn , prior , min_rate_accept , seed , return_info , **kwargs )
+		return AbstractModel.drawn_bayesian( self , -Y , X , n_mcmc_drawn , prior , min_rate_accept , seed , return_info , **kwargs )
 	##}}}
 	
 	## Stats methods
@@ -161,9 +164,9 @@ class GEVMin(AbstractModel):
 	def meant( self , t ):##{{{
 		shapet = self.shapet(t)
 		idx = np.abs(shapet) > 1e-8
-		cst = np.zeros(shapet) + np.euler_gamma
+		cst = np.zeros_like(shapet) + np.euler_gamma
 		cst[idx] = ( scs.gamma( 1 - shapet[idx] ) - 1 ) / shapet[idx]
-		return - (self._loct(t) + self._scalet(t) * cst)
+		return self.loct(t) - self.scalet(t) * cst
 	##}}}
 	
 	def mediant( self , t ):##{{{
@@ -239,7 +242,27 @@ class GEVMin(AbstractModel):
 			A time series following the NS law
 		"""
 		sckwargs = self._get_sckwargs(t)
-		return - self.law.rvs( size = t.size , **sckwargs )
+		return - self.dist.rvs( size = t.size , **sckwargs )
+	##}}}
+	
+	def logpdf( self , Y , t ):##{{{
+		"""
+		Log of the Probability Density Function
+		
+		Parameters
+		----------
+		Y : np.array
+			Value to estimate the log-density
+		t : np.array
+			Time
+		
+		Returns
+		-------
+		lp : np.array
+			log-density value
+		"""
+		sckwargs = self._get_sckwargs(t)
+		return self.dist.logpdf( -Y , **sckwargs )
 	##}}}
 	
 	def cdf( self , Y , t ):##{{{
@@ -259,7 +282,7 @@ class GEVMin(AbstractModel):
 			CDF value
 		"""
 		sckwargs = self._get_sckwargs(t)
-		return self.law.sf( -Y , **sckwargs )
+		return self.dist.sf( -Y , **sckwargs )
 	##}}}
 	
 	def icdf( self , q , t ):##{{{
@@ -279,7 +302,7 @@ class GEVMin(AbstractModel):
 			Quantile
 		"""
 		sckwargs = self._get_sckwargs(t)
-		return -self.law.isf( q , **sckwargs )
+		return -self.dist.isf( q , **sckwargs )
 	##}}}
 	
 	def sf( self , Y , t ):##{{{
@@ -299,7 +322,7 @@ class GEVMin(AbstractModel):
 			survival value
 		"""
 		sckwargs = self._get_sckwargs(t)
-		return self.law.cdf( -Y , **sckwargs )
+		return self.dist.cdf( -Y , **sckwargs )
 	##}}}
 	
 	def isf( self , q , t ):##{{{
@@ -319,7 +342,7 @@ class GEVMin(AbstractModel):
 			values
 		"""
 		sckwargs = self._get_sckwargs(t)
-		return -self.law.ppf( q , **sckwargs )
+		return -self.dist.ppf( q , **sckwargs )
 	##}}}
 	
 	def kstest( self , Y ): ##{{{
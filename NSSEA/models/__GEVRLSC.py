@@ -97,6 +97,7 @@ import SDFC              as sd
 import SDFC.link         as sdl
 
 from .__AbstractModel import AbstractModel
+from .__AbstractModel import ParamsTrajectory
 
 
 #############
@@ -106,6 +107,8 @@ from .__AbstractModel import AbstractModel
 class GEVRLSC(AbstractModel):
 	
 	def __init__( self , mle_with_bayesian = False , **kwargs ):##{{{
+		self.law    = sc.genextreme
+		self.use_scipy = kwargs.get("use_scipy",False)
 		self._coefs = np.zeros(4)
 		self._mle_with_bayesian = mle_with_bayesian
 		self.n_ns_params = 4
@@ -136,7 +139,7 @@ class GEVRLSC(AbstractModel):
 	def meant( self , t ):##{{{
 		shapet = self.shapet(t)
 		idx = np.abs(shapet) > 1e-8
-		cst = np.zeros(shapet) + np.euler_gamma
+		cst = np.zeros_like(shapet) + np.euler_gamma
 		cst[idx] = ( scs.gamma( 1 - shapet[idx] ) - 1 ) / shapet[idx]
 		return self._loct(t) + self._scalet(t) * cst
 	##}}}
@@ -208,19 +211,21 @@ class GEVRLSC(AbstractModel):
 	##}}}
 	
 	def set_params( self , coefs ):##{{{
-		self._coefs = coefs
+		self._coefs = np.asarray(coefs)
 	##}}}
 	
 	def set_covariable( self , X , t ):##{{{
+		## _coefs can be of shape (4,...), in this case X is of shape (t.size,...)
+		X     = np.reshape( X , (-1,) + np.shape(self._coefs)[1:] )
 		ratio = self._coefs[2] / self._coefs[0]
-		loc   = np.squeeze( self._coefs[0] * np.exp( ratio * X ) )
-		scale = np.squeeze( self._coefs[1] * np.exp( ratio * X ) )
-		alpha = np.zeros_like(X.squeeze()) + self._coefs[2]
-		shape = np.zeros_like(X.squeeze()) + self._coefs[3]
-		self._loct   = sci.interp1d( t , loc   )
-		self._scalet = sci.interp1d( t , scale )
-		self._shapet = sci.interp1d( t , shape )
-		self._alphat = sci.interp1d( t , alpha )
+		loc   = self._coefs[0] * np.exp( ratio * X )
+		scale = self._coefs[1] * np.exp( ratio * X )
+		alpha = np.zeros_like(X) + self._coefs[2]
+		shape = np.zeros_like(X) + self._coefs[3]
+		self._loct   = ParamsTrajectory( t , loc   )
+		self._scalet = ParamsTrajectory( t , scale )
+		self._shapet = ParamsTrajectory( t , shape )
+		self._alphat = ParamsTrajectory( t , alpha )
 	##}}}
 	
 	def loct( self , t ):##{{{
@@ -256,7 +261,9 @@ class GEVRLSC(AbstractModel):
 		
 	##}}}
 	
-	def drawn_bayesian( self , Y , X  , n_mcmc_drawn , prior , min_rate_accept = 0.25 , **kwargs ):##{{{
+	def drawn_bayesian( self , Y , X  , n_mcmc_drawn , prior , min_rate_accept = 0.25 , seed = None , return_info = False , **kwargs ):##{{{
+		if kwargs.pop( "adaptive" , False ):
+			return self._drawn_bayesian_adaptive( Y , X , n_mcmc_drawn , prior , min_rate_accept , seed , return_info , **kwargs )
 		X = X.reshape(-1,1)
 		Y = Y.reshape(-1,1)
 		
@@ -264,14 +271,21 @@ class GEVRLSC(AbstractModel):
 		kwargs["prior"]           = prior
 		kwargs["min_rate_accept"] = min_rate_accept
 		
+		rng = None if seed is None else np.random.default_rng(seed)
 		test_rate = False
+		n_try     = 0
 		while not test_rate:
+			if rng is not None:
+				np.random.seed( rng.integers( 2**32 ) )
 			gev = sd.GEV( method = "bayesian" )
 			gev.fit( Y , c_global = [X] , l_global = sdl.GEVRatioLocScaleConstant(Y.size) , **kwargs )
 			draw        = gev.info_.draw
 			rate_accept = gev.info_.rate_accept
 			test_rate = rate_accept > min_rate_accept
+			n_try += 1
 		
+		if return_info:
+			return draw,{ "rate_accept" : rate_accept , "n_try" : n_try }
 		return draw
 	##}}}
 	
@@ -299,7 +313,27 @@ class GEVRLSC(AbstractModel):
 			A time series following the NS law
 		"""
 		kwargs = { "loc" : self.loct(t) , "scale" : self.scalet(t) , "c" : - self.shapet(t) }
-		return sc.genextreme.rvs( size = t.size , **kwargs )
+		return self.dist.rvs( size = t.size , **kwargs )
+	##}}}
+	
+	def logpdf( self , Y , t ):##{{{
+		"""
+		Log of the Probability Density Function
+		
+		Parameters
+		----------
+		Y : np.array
+			Value to estimate the log-density
+		t : np.array
+			Time
+		
+		Returns
+		-------
+		lp : np.array
+			log-density value
+		"""
+		kwargs = { "loc" : self.loct(t) , "scale" : self.scalet(t) , "c" : - self.shapet(t) }
+		return self.dist.logpdf( Y , **kwargs )
 	##}}}
 	
 	def cdf( self , Y , t ):##{{{
@@ -319,7 +353,7 @@ class GEVRLSC(AbstractModel):
 			CDF value
 		"""
 		kwargs = { "loc" : self.loct(t) , "scale" : self.scalet(t) , "c" : - self.shapet(t) }
-		return sc.genextreme.cdf( Y , **kwargs )
+		return self.dist.cdf( Y , **kwargs )
 	##}}}
 	
 	def icdf( self , q , t ):##{{{
@@ -339,7 +373,7 @@ class GEVRLSC(AbstractModel):
 			Quantile
 		"""
 		kwargs = { "loc" : self.loct(t) , "scale" : self.scalet(t) , "c" : - self.shapet(t) }
-		return sc.genextreme.ppf( q , **kwargs )
+		return self.dist.ppf( q , **kwargs )
 	##}}}
 	
 	def sf( self , Y , t ):##{{{
@@ -359,7 +393,7 @@ class GEVRLSC(AbstractModel):
 			survival value
 		"""
 		kwargs = { "loc" : self.loct(t) , "scale" : self.scalet(t) , "c" : - self.shapet(t) }
-		return sc.genextreme.sf( Y , **kwargs )
+		return self.dist.sf( Y , **kwargs )
 	##}}}
 	
 	def isf( self , q , t ):##{{{
@@ -379,7 +413,7 @@ class GEVRLSC(AbstractModel):
 			values
 		"""
 		kwargs = { "loc" : self.loct(t) , "scale" : self.scalet(t) , "c" : - self.shapet(t) }
-		return sc.genextreme.isf( q , **kwargs )
+		return self.dist.isf( q , **kwargs )
 	##}}}
 	
 	##}}}
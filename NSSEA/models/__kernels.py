@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+
+##################################################################################
+##################################################################################
+##                                                                              ##
+## Copyright Yoann Robin, 2020                                                  ##
+##                                                                              ##
+## yoann.robin.k@gmail.com                                                      ##
+##                                                                              ##
+## This software is a computer program that is part of the NSSEA                ##
+## (Non-Stationary Statistics for Extreme Attribution) This library makes it    ##
+## possible to infer the probability of an (extreme) event in the factual /     ##
+## counter-factual world (without anthropic forcing) to attribute it to climate ##
+## change.                                                                      ##
+##                                                                              ##
+## This software is governed by the CeCILL-C license under French law and       ##
+## abiding by the rules of distribution of free software.  You can  use,        ##
+## modify and/ or redistribute the software under the terms of the CeCILL-C     ##
+## license as circulated by CEA, CNRS and INRIA at the following URL            ##
+## "http://www.cecill.info".                                                    ##
+##                                                                              ##
+## As a counterpart to the access to the source code and  rights to copy,       ##
+## modify and redistribute granted by the license, users are provided only      ##
+## with a limited warranty  and the software's author,  the holder of the       ##
+## economic rights,  and the successive licensors  have only  limited           ##
+## liability.                                                                   ##
+##                                                                              ##
+## In this respect, the user's attention is drawn to the risks associated       ##
+## with loading,  using,  modifying and/or developing or reproducing the        ##
+## software by the user in light of its specific status of free software,       ##
+## that may mean  that it is complicated to manipulate,  and  that  also        ##
+## therefore means  that it is reserved for developers  and  experienced        ##
+## professionals having in-depth computer knowledge. Users are therefore        ##
+## encouraged to load and test the software's suitability as regards their      ##
+## requirements in conditions enabling the security of their systems and/or     ##
+## data to be ensured and,  more generally, to use and operate it in the        ##
+## same conditions as regards security.                                         ##
+##                                                                              ##
+## The fact that you are presently reading this means that you have had         ##
+## knowledge of the CeCILL-C license and that you accept its terms.             ##
+##                                                                              ##
+##################################################################################
+##################################################################################
+
+##################################################################################
+##################################################################################
+##                                                                              ##
+## Copyright Yoann Robin, 2020                                                  ##
+##                                                                              ##
+## yoann.robin.k@gmail.com                                                      ##
+##                                                                              ##
+## Ce logiciel est un programme informatique faisant partie de la librairie     ##
+## NSSEA (Non-Stationary Statistics for Extreme Attribution). Cette librairie   ##
+## permet d'estimer la probabilité d'un evenement (extreme) dans le monde       ##
+## factuel / contre factuel (sans forcage anthropogenique) et de l'attribuer au ##
+## changement climatique.                                                       ##
+##                                                                              ##
+## Ce logiciel est régi par la licence CeCILL-C soumise au droit français et    ##
+## respectant les principes de diffusion des logiciels libres. Vous pouvez      ##
+## utiliser, modifier et/ou redistribuer ce programme sous les conditions       ##
+## de la licence CeCILL-C telle que diffusée par le CEA, le CNRS et l'INRIA     ##
+## sur le site "http://www.cecill.info".                                        ##
+##                                                                              ##
+## En contrepartie de l'accessibilité au code source et des droits de copie,    ##
+## de modification et de redistribution accordés par cette licence, il n'est    ##
+## offert aux utilisateurs qu'une garantie limitée.  Pour les mêmes raisons,    ##
+## seule une responsabilité restreinte pèse sur l'auteur du programme, le       ##
+## titulaire des droits patrimoniaux et les concédants successifs.              ##
+##                                                                              ##
+## A cet égard  l'attention de l'utilisateur est attirée sur les risques        ##
+## associés au chargement,  à l'utilisation,  à la modification et/ou au        ##
+## développement et à la reproduction du logiciel par l'utilisateur étant       ##
+## donné sa spécificité de logiciel libre, qui peut le rendre complexe à        ##
+## manipuler et qui le réserve donc à des développeurs et des professionnels    ##
+## avertis possédant  des  connaissances  informatiques approfondies.  Les      ##
+## utilisateurs sont donc invités à charger  et  tester  l'adéquation  du       ##
+## logiciel à leurs besoins dans des conditions permettant d'assurer la         ##
+## sécurité de leurs systèmes et ou de leurs données et, plus généralement,     ##
+## à l'utiliser et l'exploiter dans les mêmes conditions de sécurité.           ##
+##                                                                              ##
+## Le fait que vous puissiez accéder à cet en-tête signifie que vous avez       ##
+## pris connaissance de la licence CeCILL-C, et que vous en avez accepté les    ##
+## termes.                                                                      ##
+##                                                                              ##
+##################################################################################
+
+###############
+## Libraries ##
+###############
+
+import numpy         as np
+import scipy.special as scs
+
+
+#############
+## Classes ##
+#############
+
+class GEVKernel:##{{{
+	"""
+	NSSEA.models.GEVKernel
+	======================
+	Closed form and vectorized GEV distribution, with the same interface and
+	the same parametrization than scipy.stats.genextreme (c = - shape), but
+	without the arguments checks of scipy. All arguments are broadcasted.
+	
+	Values of the shape parameter with |shape| < eps are treated as the Gumbel
+	limit. Outside of the support, the cdf / sf are 0 or 1 and the logpdf is
+	-inf. A scale <= 0 gives nan.
+	"""
+	
+	name = "genextreme"
+	
+	def __init__( self , eps = 1e-12 ):##{{{
+		self.eps = eps
+	##}}}
+	
+	def _log_t( self , x , loc , scale , c ):##{{{
+		## log of t(x) = (1 + shape * z)^(-1/shape), with z = (x - loc) / scale
+		## returns also the mask of value inside the support (nan are propagated)
+		shape = - np.asarray(c , dtype = float)
+		z     = ( np.asarray(x , dtype = float) - loc ) / scale
+		shape,z = np.broadcast_arrays( shape , z )
+		gumbel  = np.abs(shape) < self.eps
+		sshape  = np.where( gumbel , 1. , shape )
+		u       = sshape * z
+		valid   = np.logical_or( np.logical_or( gumbel , u > -1 ) , np.isnan(u) )
+		with np.errstate( divide = "ignore" , invalid = "ignore" ):
+			log_t = np.where( gumbel , -z , - np.log1p( np.where( valid , u , 0 ) ) / sshape )
+		return log_t,valid,shape
+	##}}}
+	
+	def _nan_scale( self , out , scale ):##{{{
+		return np.where( np.asarray(scale) > 0 , out , np.nan )
+	##}}}
+	
+	def cdf( self , x , loc = 0. , scale = 1. , c = 0. ):##{{{
+		log_t,valid,shape = self._log_t( x , loc , scale , c )
+		out = np.where( valid , np.exp( - np.exp(log_t) ) , np.where( shape > 0 , 0. , 1. ) )
+		return self._nan_scale( out , scale )
+	##}}}
+	
+	def sf( self , x , loc = 0. , scale = 1. , c = 0. ):##{{{
+		log_t,valid,shape = self._log_t( x , loc , scale , c )
+		out = np.where( valid , - np.expm1( - np.exp(log_t) ) , np.where( shape > 0 , 1. , 0. ) )
+		return self._nan_scale( out , scale )
+	##}}}
+	
+	def logpdf( self , x , loc = 0. , scale = 1. , c = 0. ):##{{{
+		log_t,valid,shape = self._log_t( x , loc , scale , c )
+		with np.errstate( invalid = "ignore" ):
+			out = - np.log(scale) + (1. + shape) * log_t - np.exp(log_t)
+		out = np.where( np.logical_and( valid , log_t != np.inf ) , out , - np.inf )
+		return self._nan_scale( out , scale )
+	##}}}
+	
+	def pdf( self , x , loc = 0. , scale = 1. , c = 0. ):##{{{
+		return np.exp( self.logpdf( x , loc , scale , c ) )
+	##}}}
+	
+	def _ppf_from_loglogq( self , mloglogq , loc , scale , c ):##{{{
+		## mloglogq = -log(-log(q))
+		shape  = - np.asarray(c , dtype = float)
+		shape,mloglogq = np.broadcast_arrays( shape , mloglogq )
+		gumbel = np.abs(shape) < self.eps
+		sshape = np.where( gumbel , 1. , shape )
+		z      = np.where( gumbel , mloglogq , np.expm1( sshape * mloglogq ) / sshape )
+		return self._nan_scale( loc + scale * z , scale )
+	##}}}
+	
+	def ppf( self , q , loc = 0. , scale = 1. , c = 0. ):##{{{
+		q = np.asarray( q , dtype = float )
+		q = np.where( np.logical_and( q >= 0 , q <= 1 ) , q , np.nan )
+		with np.errstate( divide = "ignore" ):
+			mloglogq = - np.log( - np.log(q) )
+		return self._ppf_from_loglogq( mloglogq , loc , scale , c )
+	##}}}
+	
+	def isf( self , q , loc = 0. , scale = 1. , c = 0. ):##{{{
+		q = np.asarray( q , dtype = float )
+		q = np.where( np.logical_and( q >= 0 , q <= 1 ) , q , np.nan )
+		with np.errstate( divide = "ignore" ):
+			mloglogq = - np.log( - np.log1p(-q) )
+		return self._ppf_from_loglogq( mloglogq , loc , scale , c )
+	##}}}
+	
+	def rvs( self , loc = 0. , scale = 1. , c = 0. , size = None ):##{{{
+		return self.ppf( np.random.uniform( size = size ) , loc , scale , c )
+	##}}}
+	
+##}}}
+
+class NormalKernel:##{{{
+	"""
+	NSSEA.models.NormalKernel
+	=========================
+	Closed form and vectorized Normal distribution, with the same interface
+	than scipy.stats.norm, but without the arguments checks of scipy. All
+	arguments are broadcasted. A scale <= 0 gives nan.
+	"""
+	
+	name = "norm"
+	
+	def _nan_scale( self , out , scale ):##{{{
+		return np.where( np.asarray(scale) > 0 , out , np.nan )
+	##}}}
+	
+	def cdf( self , x , loc = 0. , scale = 1. ):##{{{
+		return self._nan_scale( scs.ndtr( ( x - loc ) / scale ) , scale )
+	##}}}
+	
+	def sf( self , x , loc = 0. , scale = 1. ):##{{{
+		return self._nan_scale( scs.ndtr( ( loc - x ) / scale ) , scale )
+	##}}}
+	
+	def logpdf( self , x , loc = 0. , scale = 1. ):##{{{
+		z = ( x - loc ) / scale
+		return self._nan_scale( - 0.5 * z**2 - np.log(scale) - 0.5 * np.log( 2 * np.pi ) , scale )
+	##}}}
+	
+	def pdf( self , x , loc = 0. , scale = 1. ):##{{{
+		return np.exp( self.logpdf( x , loc , scale ) )
+	##}}}
+	
+	def ppf( self , q , loc = 0. , scale = 1. ):##{{{
+		return self._nan_scale( loc + scale * scs.ndtri(q) , scale )
+	##}}}
+	
+	def isf( self , q , loc = 0. , scale = 1. ):##{{{
+		return self._nan_scale( loc - scale * scs.ndtri(q) , scale )
+	##}}}
+	
+	def rvs( self , loc = 0. , scale = 1. , size = None ):##{{{
+		return self.ppf( np.random.uniform( size = size ) , loc , scale )
+	##}}}
+	
+##}}}
+
+
+###############
+## Functions ##
+###############
+
+_kernels = { "genextreme" : GEVKernel() , "norm" : NormalKernel() }
+
+def kernel_of( law ):##{{{
+	"""
+	NSSEA.models.kernel_of
+	======================
+	Return the closed form kernel associated to a scipy.stats distribution,
+	or the distribution itself if no kernel is available.
+	
+	Arguments
+	---------
+	law : scipy.stats distribution
+	
+	Return
+	------
+	kernel : NSSEA.models.GEVKernel, NSSEA.models.NormalKernel or law
+	"""
+	return _kernels.get( getattr( law , "name" , None ) , law )
+##}}}
+
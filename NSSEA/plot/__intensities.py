@@ -130,10 +130,14 @@ def intensities( clim , ofile , event = None , ci = 0.05 , verbose = False ): ##
 	if event is None:
 		event = clim.event
 	
-	## Find quantile and best estimate
-	qstats = clim.statistics[:,1:,:,:].loc[:,:,["IC","IF","dI"],:].quantile( [ ci / 2. , 0.5 , 1 - ci / 2] , dim = "sample" ).assign_coords( quantile = ["ql","BE","qu"] )
+	## Find quantile and best estimate, block of models by block of models
+	## (see NSSEA.Climatology.blocks)
+	stats  = clim.data["statistics"].loc[:,:,["IC","IF","dI"],:]
+	qstats = xr.DataArray( np.zeros( (3,clim.n_time,3,clim.n_model) ) , dims = ["quantile","time","stats","model"] , coords = [["ql","BE","qu"],clim.time,["IC","IF","dI"],clim.model] )
+	for block in clim.blocks( full_sample = True ):
+		qstats[:,:,:,block["model"]] = np.nanquantile( stats.isel(block).values[:,1:,:,:] , [ ci / 2. , 0.5 , 1 - ci / 2] , axis = 1 )
 	if not clim.BE_is_median:
-		qstats.loc["BE",:,:,:] = clim.statistics.loc[:,"BE",["IC","IF","dI"],:]
+		qstats.loc["BE",:,:,:] = stats.loc[:,"BE",:,:]
 	pb.print()
 	
 	pdf = mpdf.PdfPages( ofile )
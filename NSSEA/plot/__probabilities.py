@@ -151,18 +151,21 @@ def probabilities( clim , ofile , event = None , ci = 0.05 , verbose = False ):#
 	
 	if event is None:
 		event = clim.event
-	stats = clim.statistics
+	stats = clim.data["statistics"]
 	
-	## Find impossible values
-	##=======================
-	nan_idx    = np.logical_and( stats[:,1:,:,:].loc[:,:,"pF",:] == 0 , stats[:,1:,:,:].loc[:,:,"pC",:] == 0 )
-	nan_values = nan_idx.sum( dim = "sample" ) / ( stats.sample.size - 1 )
-	imp_values = ( stats[:,1:,:,:].loc[:,:,"pC",:] == 0 ).sum( dim = "sample" ) / ( stats.sample.size - 1 )
+	## Find impossible values and quantiles, block of models by block of
+	## models (see NSSEA.Climatology.blocks)
+	##===================================================================
+	istats     = stats.stats.values.tolist()
+	nan_values = xr.DataArray( np.zeros( (clim.n_time,clim.n_model) ) , dims = ["time","model"] , coords = [clim.time,clim.model] )
+	imp_values = nan_values.copy()
+	qstats     = xr.DataArray( np.zeros( (3,clim.n_time,len(istats),clim.n_model) ) , dims = ["quantile","time","stats","model"] , coords = [["ql","qu","BE"],clim.time,istats,clim.model] )
+	for block in clim.blocks( full_sample = True ):
+		S = stats.isel(block).values[:,1:,:,:]
+		nan_values[:,block["model"]] = np.logical_and( S[:,:,istats.index("pF"),:] == 0 , S[:,:,istats.index("pC"),:] == 0 ).sum( axis = 1 ) / S.shape[1]
+		imp_values[:,block["model"]] = ( S[:,:,istats.index("pC"),:] == 0 ).sum( axis = 1 ) / S.shape[1]
+		qstats[:,:,:,block["model"]] = np.nanquantile( S , [ci / 2 , 1 - ci / 2 , 0.5 ] , axis = 1 )
 	pb.print()
-	
-	## Find quantiles
-	##===============
-	qstats = stats[:,1:,:,:].quantile( [ci / 2 , 1 - ci / 2 , 0.5 ] , dim = "sample" ).assign_coords( quantile = [ "ql" , "qu" , "BE" ] )
 	if not clim.BE_is_median:
 		qstats.loc["BE",:,:,:] = stats[:,0,:,:]
 	pb.print()
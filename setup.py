@@ -112,7 +112,7 @@ setup(
 	author_email = "yoann.robin.k@gmail.com" ,
 	license = "CeCILL-C" ,
 	platforms = [ "linux" , "macosx" ] ,
-	requires = [ "numpy(>=1.15.0)" , "scipy(>=0.19)" , "xarray" , "pandas" , "matplotlib" , "pygam(>=0.8.0)" , "netCDF4" , "SDFC(>=0.6.0a0)" , "statsmodels(>=0.12.0)" , "texttable" ],
+	requires = [ "numpy(>=1.17.0)" , "scipy(>=0.19)" , "xarray" , "pandas" , "matplotlib" , "pygam(>=0.8.0)" , "netCDF4" , "SDFC(>=0.6.0a0)" , "statsmodels(>=0.12.0)" , "texttable" ],
 	packages = list_packages,
 	package_dir = { "NSSEA" : "NSSEA" },
 	include_package_data = True